@@ -0,0 +1,5 @@
+"""benchmarks -- timing scripts for the vitamins hot paths.
+
+Run them from the repository root, e.g.:
+    python -m benchmarks.bench_geometry
+"""
@@ -0,0 +1,168 @@
+"""benchmarks.bench_geometry -- Vec3 allocation and time costs.
+
+Each workload is run twice: once written with the allocating operators, the way most
+bot code is written, and once with the in-place operators. The same workloads are
+also run against `DictVec3`, a copy of the old un-slotted Vec3, as a reference.
+
+    python -m benchmarks.bench_geometry
+"""
+import math
+import sys
+import tracemalloc
+from timeit import Timer
+
+from vitamins.geometry import Vec3
+
+
+class DictVec3:
+    """The un-slotted, always-allocating Vec3 we used to have, for comparison."""
+
+    def __init__(self, x=0, y=0, z=0):
+        if hasattr(x, "x"):
+            self.x = float(x.x)
+            self.y = float(x.y) if hasattr(x, "y") else 0
+            self.z = float(x.z) if hasattr(x, "z") else 0
+        else:
+            self.x = float(x)
+            self.y = float(y)
+            self.z = float(z)
+
+    def __add__(self, other):
+        return DictVec3(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return DictVec3(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, scale):
+        return DictVec3(self.x * scale, self.y * scale, self.z * scale)
+
+    def __rmul__(self, scale):
+        return self * scale
+
+    def __truediv__(self, scale):
+        return self * (1 / float(scale))
+
+    def flat(self):
+        return DictVec3(self.x, self.y, 0)
+
+    def length(self):
+        return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
+
+    def normalized(self):
+        return self / self.length()
+
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def proj(self, other):
+        other_dir = other.normalized()
+        return self.dot(other_dir) * other_dir
+
+
+def integrate(cls, steps=120, dt=1 / 120):
+    """Ballistic integration, allocating a new vector per operation."""
+    p, v, g = cls(0, 0, 100), cls(500, 1000, 800), cls(0, 0, -650)
+    for _ in range(steps):
+        v = v + g * dt
+        p = p + v * dt
+    return p
+
+
+def integrate_inplace(steps=120, dt=1 / 120):
+    """Ballistic integration with fused in-place updates."""
+    p, v, g = Vec3(0, 0, 100), Vec3(500, 1000, 800), Vec3(0, 0, -650)
+    for _ in range(steps):
+        v.iadd_scaled(g, dt)
+        p.iadd_scaled(v, dt)
+    return p
+
+
+def score_targets(cls, targets, car, fwd):
+    """Score candidate targets by alignment and distance."""
+    best, best_score = None, -1e9
+    for target in targets:
+        to_target = (target - car).flat()
+        direction = to_target.normalized()
+        score = direction.dot(fwd) - to_target.length() / 5000
+        side = (to_target - to_target.proj(fwd)).length()
+        score -= side / 10000
+        if score > best_score:
+            best, best_score = target, score
+    return best
+
+
+def score_targets_inplace(targets, car, fwd):
+    """Same as `score_targets`, but reusing a single scratch vector."""
+    best, best_score = None, -1e9
+    to_target = Vec3()
+    for target in targets:
+        to_target.assign(target)
+        to_target -= car
+        to_target.iflat()
+        dist = to_target.length()
+        along = to_target.dot(fwd)
+        score = along / dist - dist / 5000
+        side = math.sqrt(max(dist * dist - along * along / fwd.dot(fwd), 0))
+        score -= side / 10000
+        if score > best_score:
+            best, best_score = target, score
+    return best
+
+
+def make_targets(cls, n=50):
+    return [cls(137 * i % 8000 - 4000, 311 * i % 10000 - 5000, 93) for i in range(n)]
+
+
+def measure(label, func, repeat=5):
+    timer = Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<28} {best * 1e6:9.1f} us   peak {peak / 1024:7.1f} KiB")
+    return best
+
+
+def main():
+    print(f"Instance size: Vec3 {sys.getsizeof(Vec3())} bytes, ", end="")
+    old = DictVec3()
+    print(f"DictVec3 {sys.getsizeof(old) + sys.getsizeof(old.__dict__)} bytes")
+
+    print("\nBallistic integration, 120 steps:")
+    t_old = measure("DictVec3 operators", lambda: integrate(DictVec3))
+    t_ops = measure("Vec3 operators", lambda: integrate(Vec3))
+    t_inp = measure("Vec3 in-place", integrate_inplace)
+    print(f"  speedup vs DictVec3: {t_old / t_ops:.2f}x operators, "
+          f"{t_old / t_inp:.2f}x in-place")
+
+    print("\nTarget scoring, 50 candidates:")
+    old_targets = make_targets(DictVec3)
+    old_car, old_fwd = DictVec3(100, -2000, 17), DictVec3(0.6, 0.8, 0)
+    new_targets = make_targets(Vec3)
+    car, fwd = Vec3(100, -2000, 17), Vec3(0.6, 0.8, 0)
+    t_old = measure(
+        "DictVec3 operators",
+        lambda: score_targets(DictVec3, old_targets, old_car, old_fwd),
+    )
+    t_ops = measure(
+        "Vec3 operators", lambda: score_targets(Vec3, new_targets, car, fwd)
+    )
+    t_inp = measure(
+        "Vec3 in-place", lambda: score_targets_inplace(new_targets, car, fwd)
+    )
+    print(f"  speedup vs DictVec3: {t_old / t_ops:.2f}x operators, "
+          f"{t_old / t_inp:.2f}x in-place")
+
+    print("\nConstruction of 1000 vectors:")
+    measure("DictVec3(x, y, z)", lambda: [DictVec3(1, 2, 3) for _ in range(1000)])
+    measure("Vec3(x, y, z)", lambda: [Vec3(1, 2, 3) for _ in range(1000)])
+    measure(
+        "Vec3._new(x, y, z)",
+        lambda: [Vec3._new(1.0, 2.0, 3.0) for _ in range(1000)],
+    )
+
+
+if __name__ == "__main__":
+    main()
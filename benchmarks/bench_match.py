@@ -0,0 +1,27 @@
+"""benchmarks.bench_match -- cost of ingesting a GameTickPacket with Match.update.
+
+    python -m benchmarks.bench_match
+"""
+from timeit import Timer
+
+from vitamins.match.match import Match
+from benchmarks.fixtures import StubAgent, game_tick_packet
+
+
+def bench_update(num_cars: int, repeat: int = 5) -> float:
+    """Return the best time in seconds for a single Match.update call."""
+    packet = game_tick_packet(num_cars)
+    Match.initialize(StubAgent(packet), packet)
+    timer = Timer(lambda: Match.update(packet))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    print("Match.update:")
+    for label, num_cars in [("1v1", 2), ("3v3", 6), ("4v4", 8)]:
+        print(f"  {label}  {bench_update(num_cars) * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
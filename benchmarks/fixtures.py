@@ -0,0 +1,81 @@
+"""benchmarks.fixtures -- realistic packets for benchmarking without a running game."""
+import math
+import random
+
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction, MAX_SLICES
+from rlbot.utils.structures.game_data_struct import GameTickPacket
+
+from vitamins.sim import BOOST_PADS, field_info
+
+
+def game_tick_packet(num_cars: int = 2, seed: int = 0, time: float = 10.0):
+    """A mid-game packet with cars scattered around the field."""
+    rng = random.Random(seed)
+    packet = GameTickPacket()
+    packet.game_info.seconds_elapsed = time
+    packet.game_info.is_round_active = True
+    packet.num_cars = num_cars
+    for i in range(num_cars):
+        car = packet.game_cars[i]
+        car.team = i % 2
+        car.name = f"bot{i}"
+        car.is_bot = True
+        car.boost = rng.randint(0, 100)
+        car.has_wheel_contact = rng.random() < 0.8
+        car.hitbox.length, car.hitbox.width, car.hitbox.height = 118.01, 84.2, 36.16
+        phys = car.physics
+        phys.location.x = rng.uniform(-4000, 4000)
+        phys.location.y = rng.uniform(-5000, 5000)
+        phys.location.z = 17.0
+        phys.rotation.yaw = rng.uniform(-math.pi, math.pi)
+        phys.velocity.x = rng.uniform(-1500, 1500)
+        phys.velocity.y = rng.uniform(-1500, 1500)
+        phys.angular_velocity.z = rng.uniform(-2, 2)
+    packet.num_boost = len(BOOST_PADS)
+    for i in range(packet.num_boost):
+        packet.game_boosts[i].is_active = rng.random() < 0.7
+        packet.game_boosts[i].timer = rng.uniform(0, 4)
+    ball = packet.game_ball.physics
+    ball.location.x, ball.location.y, ball.location.z = 200.0, -300.0, 600.0
+    ball.velocity.x, ball.velocity.y, ball.velocity.z = 400.0, 1200.0, 500.0
+    return packet
+
+
+def ball_prediction(packet: GameTickPacket, num_slices: int = MAX_SLICES):
+    """A simple bouncing prediction starting from the ball in `packet`."""
+    prediction = BallPrediction()
+    prediction.num_slices = num_slices
+    phys = packet.game_ball.physics
+    x, y, z = phys.location.x, phys.location.y, phys.location.z
+    vx, vy, vz = phys.velocity.x, phys.velocity.y, phys.velocity.z
+    dt = 1 / 60
+    for i in range(num_slices):
+        s = prediction.slices[i]
+        s.game_seconds = packet.game_info.seconds_elapsed + i * dt
+        s.physics.location.x, s.physics.location.y, s.physics.location.z = x, y, z
+        s.physics.velocity.x, s.physics.velocity.y, s.physics.velocity.z = vx, vy, vz
+        vz -= 650 * dt
+        x, y, z = x + vx * dt, y + vy * dt, z + vz * dt
+        if z < 92.75 and vz < 0:
+            z, vz = 92.75, -0.6 * vz
+        if abs(y) > 5120 - 92.75 and y * vy > 0:
+            vy = -0.6 * vy
+        if abs(x) > 4096 - 92.75 and x * vx > 0:
+            vx = -0.6 * vx
+    return prediction
+
+
+class StubAgent:
+    """Just enough of an RLBot agent for `Match.initialize`."""
+
+    def __init__(self, packet: GameTickPacket, index: int = 0):
+        self.index = index
+        self.team = packet.game_cars[index].team
+        self.packet = packet
+        self.field_info = field_info()
+
+    def get_field_info(self):
+        return self.field_info
+
+    def get_ball_prediction_struct(self):
+        return ball_prediction(self.packet)
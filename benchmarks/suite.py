@@ -0,0 +1,308 @@
+"""benchmarks.suite -- microbenchmarks of the per-tick hot paths, with baselines.
+
+    python -m benchmarks.suite                        # print the results
+    python -m benchmarks.suite --save baseline.json   # ...and save them
+    python -m benchmarks.suite --compare baseline.json --threshold 0.15
+
+In compare mode, every benchmark that got slower than the baseline by more than
+`threshold` (a fraction) is flagged, and the exit status is 1 if there were any.
+`--filter` runs only the benchmarks whose name contains the given string.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from statistics import median
+from timeit import Timer
+
+import numpy as np
+
+from vitamins import draw, physics
+from vitamins.geometry import Orientation, Vec3
+from vitamins.match.field import Field
+from vitamins.match.intercept import earliest_intercepts
+from vitamins.match.match import Match
+from vitamins.match.prediction import BallPredictor
+from vitamins.match.state import MatchState
+from vitamins.match.structs import player_table
+from vitamins.math import Lerp
+from vitamins.replay import StubRenderer
+from vitamins.sim import Simulator
+from benchmarks.fixtures import StubAgent, field_info, game_tick_packet
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark. The decorated function does the setup and returns the
+    zero-argument callable to time."""
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+@benchmark("vec3.add")
+def vec3_add():
+    a, b = Vec3(1, 2, 3), Vec3(4, 5, 6)
+    return lambda: a + b
+
+
+@benchmark("vec3.scaled_add")
+def vec3_scaled_add():
+    a, b = Vec3(1, 2, 3), Vec3(4, 5, 6)
+    return lambda: a + b * 0.5
+
+
+@benchmark("vec3.normalized")
+def vec3_normalized():
+    a = Vec3(1, 2, 3)
+    return a.normalized
+
+
+@benchmark("vec3.dot")
+def vec3_dot():
+    a, b = Vec3(1, 2, 3), Vec3(4, 5, 6)
+    return lambda: a.dot(b)
+
+
+@benchmark("vec3.cross")
+def vec3_cross():
+    a, b = Vec3(1, 2, 3), Vec3(4, 5, 6)
+    return lambda: a.cross(b)
+
+
+@benchmark("vec3.iadd_scaled")
+def vec3_iadd_scaled():
+    a, b = Vec3(1, 2, 3), Vec3(4, 5, 6)
+    return lambda: a.iadd_scaled(b, 1e-9)
+
+
+@benchmark("orientation.construct")
+def orientation_construct():
+    rotation = Vec3(0.1, 1.2, -0.3)
+    return lambda: Orientation(rotation)
+
+
+@benchmark("orientation.basis")
+def orientation_basis():
+    rotation = Vec3(0.1, 1.2, -0.3)
+    return lambda: Orientation(rotation).forward
+
+
+def _car():
+    packet = game_tick_packet(2)
+    Match.initialize(StubAgent(packet), packet)
+    return Match.cars[0]
+
+
+@benchmark("hitbox.location")
+def hitbox_location():
+    hitbox = _car().hitbox
+    return lambda: hitbox.location("FLU")
+
+
+@benchmark("hitbox.location_dt")
+def hitbox_location_dt():
+    hitbox = _car().hitbox
+    return lambda: hitbox.location("BRD", 0.05)
+
+
+@benchmark("hitbox.draw")
+def hitbox_draw():
+    hitbox = _car().hitbox
+    draw.set_renderer(StubRenderer())
+    return lambda: hitbox.draw("red", 0.05)
+
+
+@benchmark("lerp.call")
+def lerp_call():
+    speeds = [0, 500, 1000, 1500, 1750, 2300]
+    curvatures = [0.0069, 0.00398, 0.00235, 0.001375, 0.0011, 0.00088]
+    lerp = Lerp(speeds, curvatures)
+    return lambda: lerp(1234.5)
+
+
+@benchmark("lerp.array_1000")
+def lerp_array():
+    speeds = np.linspace(0, 2300, 1000)
+    return lambda: physics.CURVATURE(speeds)
+
+
+@benchmark("physics.travel_time_2160")
+def physics_travel_time():
+    rng = np.random.default_rng(0)
+    distance = rng.uniform(0, 8000, 2160)
+    angle = rng.uniform(0, np.pi, 2160)
+    speed = rng.uniform(-500, 2300, 2160)
+    return lambda: physics.travel_time(distance, angle, speed, True)
+
+
+def _predictor():
+    sim = Simulator(num_cars=2, seed=3)
+    return sim, BallPredictor(sim.ball_prediction())
+
+
+@benchmark("prediction.analyze")
+def prediction_analyze():
+    sim, _ = _predictor()
+    prediction = sim.ball_prediction()
+
+    def run():
+        BallPredictor(prediction).analyze()
+
+    return run
+
+
+@benchmark("prediction.predict")
+def prediction_predict():
+    _, predictor = _predictor()
+    predictor.analyze()
+    return lambda: predictor.predict(2.345)
+
+
+@benchmark("prediction.predict_hermite")
+def prediction_predict_hermite():
+    _, predictor = _predictor()
+    predictor.analyze()
+    return lambda: predictor.predict(2.345, "hermite")
+
+
+@benchmark("prediction.next_bounce")
+def prediction_next_bounce():
+    sim, predictor = _predictor()
+    predictor.analyze()
+    game_time = sim.time + 1
+    return lambda: predictor.next_bounce(game_time)
+
+
+@benchmark("intercept.earliest_6x360")
+def intercept_earliest():
+    sim = Simulator(num_cars=6, seed=1)
+    sim.step()
+    state = MatchState()
+    state.refresh(sim.packet)
+    state.boost[::2] = 0  # both boost groups
+    predictor = BallPredictor(sim.ball_prediction())
+    return lambda: earliest_intercepts(predictor, state)
+
+
+@benchmark("field.update")
+def field_update():
+    packet = game_tick_packet(6)
+    field = Field(0, field_info())
+    return lambda: field.update(packet)
+
+
+@benchmark("field.nearest_ready_6")
+def field_nearest_ready():
+    packet = game_tick_packet(6)
+    field = Field(0, field_info())
+    field.update(packet)
+    points = player_table(packet)[:, :3]
+    return lambda: field.boost_index.nearest_ready(points, 1.0)
+
+
+def _match_update(num_cars: int):
+    sim = Simulator(num_cars=num_cars, seed=num_cars)
+    Match.initialize(sim.agent(0), sim.packet)
+    packet = sim.packet
+    return lambda: Match.update(packet)
+
+
+@benchmark("match.update_1v1")
+def match_update_1v1():
+    return _match_update(2)
+
+
+@benchmark("match.update_3v3")
+def match_update_3v3():
+    return _match_update(6)
+
+
+@benchmark("match.update_4v4")
+def match_update_4v4():
+    return _match_update(8)
+
+
+def measure(func, repeat: int = 5) -> dict:
+    """Best and median time per call, in seconds."""
+    timer = Timer(func)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return dict(best=min(times), median=median(times), number=number)
+
+
+def run(pattern: str = "", repeat: int = 5) -> dict:
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern in name:
+            results[name] = measure(setup(), repeat)
+    return results
+
+
+def environment() -> dict:
+    return dict(
+        python=platform.python_version(),
+        numpy=np.__version__,
+        machine=platform.machine(),
+        processor=platform.processor(),
+        node=platform.node(),
+        time=time.strftime("%Y-%m-%dT%H:%M:%S"),
+    )
+
+
+def save(path: str, results: dict):
+    with open(path, "w") as f:
+        json.dump(dict(environment=environment(), results=results), f, indent=2)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print the change of each benchmark against the baseline, and return the
+    names of the ones that regressed by more than `threshold`."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"  {name:<28} {result['best'] * 1e6:10.2f} us   (new)")
+            continue
+        ratio = result["best"] / baseline[name]["best"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"  {name:<28} {result['best'] * 1e6:10.2f} us   "
+            f"was {baseline[name]['best'] * 1e6:10.2f} us   {ratio:5.2f}x{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the vitamins benchmarks.")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--filter", default="", help="only run matching benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.filter, args.repeat)
+    if args.save:
+        save(args.save, results)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}.")
+            sys.exit(1)
+    else:
+        for name, result in results.items():
+            print(f"  {name:<28} {result['best'] * 1e6:10.2f} us")
+
+
+if __name__ == "__main__":
+    main()
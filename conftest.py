@@ -0,0 +1 @@
+"""Lets pytest import `vitamins`, `ramen` and `benchmarks` from the repo root."""
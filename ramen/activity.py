@@ -1,7 +1,8 @@
 """ramen.activity -- encapsulating bot actions."""
-
+from types import GeneratorType, MethodType
 
 from vitamins.match.match import Match
+from vitamins.match.planning import PlanFuture
 
 
 class Activity:
@@ -11,6 +12,14 @@ class Activity:
     tick: 0
     wake_time: float = 0
     subtask: "Activity" = None
+    future: PlanFuture = None  # the job started by `plan`
+    running: GeneratorType = None  # a generator step in progress
+    scheduled: "ScheduledActivity" = None  # set by a Scheduler running this activity
+    steps: dict  # step functions by step name, built for each class
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.steps = step_table(cls)
 
     def __init__(self):
         self.stepfunc = self.step_0
@@ -41,18 +50,44 @@ class Activity:
             self.countdown -= 1
         else:
             self.before()
-            self.stepfunc()
+            self.run_step()
             self.after()
 
+    @property
+    def paused(self) -> bool:
+        """Whether the activity is sleeping (see `sleep`)."""
+        return Match.time < self.wake_time or self.countdown > 0
+
+    def run_step(self):
+        """Run the current step. A step can also be a generator. Then each call
+        resumes it up to its next `yield`, over as many calls (and ticks) as it
+        needs, before the next step starts. A step that calls `step` runs to its
+        end anyway. To wait for the next tick inside a generator, use
+        `self.sleep(ticks=1)` followed by `yield`."""
+        if self.running is None:
+            result = self.stepfunc()
+            if type(result) is not GeneratorType:
+                return
+            self.running = result
+        try:
+            next(self.running)
+        except StopIteration:
+            self.running = None
+
     def step(self, step_name=None, ticks=0, ms=0):
         self.current_step = step_name
         self.sleep(ticks, ms)
-        try:
-            funcname = f"step_{self.current_step}"
-            self.stepfunc = getattr(self, funcname)
-        except AttributeError:
+        func = self.steps.get(step_name)
+        if func is not None:
+            self.stepfunc = MethodType(func, self)
+            return
+        # Steps added to the instance, or to the class after it was created:
+        funcname = f"step_{step_name}"
+        stepfunc = getattr(self, funcname, None)
+        if stepfunc is None:
             self.done = True
             raise UndefinedStepError(f"{funcname} is not defined.")
+        self.stepfunc = stepfunc
 
     def sleep(self, ticks=0, ms=0):
         """Pause execution for a specified number of ticks or milliseconds. The
@@ -67,6 +102,36 @@ class Activity:
         """Cancel any pause in progress."""
         self.countdown = 0
         self.wake_time = 0.0
+        if self.scheduled is not None:
+            self.scheduled.scheduler.wake(self.scheduled)
+
+    def plan(self, fn, *args, max_age: float = None):
+        """Start `fn(world, *args)` in the planner process pool (see `Match.plan`).
+        Poll for the result with `plan_result` on later ticks."""
+        if self.future is not None:
+            self.future.cancel()
+        self.future = Match.plan(fn, *args, max_age=max_age)
+
+    @property
+    def planning(self) -> bool:
+        """Whether a job started by `plan` is still on the way."""
+        return self.future is not None
+
+    def plan_result(self, default=None):
+        """The result of the job started by `plan` once it is done, else `default`.
+        A job that goes stale (see `PlanFuture.stale`) is dropped, and `default` is
+        returned; check `planning` to tell the two apart."""
+        future = self.future
+        if future is None:
+            return default
+        if future.stale(Match.time):
+            future.cancel()
+            self.future = None
+            return default
+        if not future.done():
+            return default
+        self.future = None
+        return future.result()
 
     def before(self):
         """This will be called before the current step is executed."""
@@ -115,5 +180,22 @@ class Activity:
         pass
 
 
+def step_table(cls) -> dict:
+    """The `step_<name>` methods of an Activity class, by name. Names that are
+    numbers written the usual way (e.g. "1" but not "01") are in the table both
+    as ints and as strings."""
+    table = {}
+    for attr in dir(cls):
+        if attr.startswith("step_") and callable(getattr(cls, attr)):
+            name = attr[len("step_") :]
+            table[name] = getattr(cls, attr)
+            if name.isdigit() and str(int(name)) == name:
+                table[int(name)] = table[name]
+    return table
+
+
+Activity.steps = step_table(Activity)
+
+
 class UndefinedStepError(Exception):
     pass
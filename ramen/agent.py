@@ -3,14 +3,36 @@
 from rlbot.agents.base_agent import BaseAgent, SimpleControllerState
 from rlbot.utils.structures.game_data_struct import GameTickPacket
 
+from ramen.scheduler import Scheduler
 from vitamins.match.match import Match
+from vitamins.replay import PacketRecorder
+from vitamins.util import TickProfiler
 
 
 class Agent(BaseAgent):
+    profile: bool = False  # time the stages of each tick with `self.profiler`
+    recorder: PacketRecorder = None  # set by start_recording
+
     def __init__(self, name, team, index):
         super().__init__(name, team, index)
         self.controls = SimpleControllerState()
         self.tick: int = 0
+        self.profiler = TickProfiler(enabled=self.profile)
+        self.scheduler = Scheduler()  # run every tick, after `every_tick`
+
+    def start_recording(self, path: str, max_cars: int = 8):
+        """Record every packet from now on, for `vitamins.replay`."""
+        self.recorder = PacketRecorder(path, self.get_field_info(), max_cars)
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def retire(self):
+        self.stop_recording()
+        Match.retire(self)
+        super().retire()
 
     def clear_controls(self):
         self.controls.yaw = 0
@@ -24,19 +46,34 @@ class Agent(BaseAgent):
         self.controls.use_item = False
 
     def get_output(self, packet: GameTickPacket) -> SimpleControllerState:
+        profiler = self.profiler
+        profiler.start_tick()
         self.renderer.begin_rendering()
 
         if self.tick == 0:
             # First tick setup:
+            Match.profiler = profiler
             Match.initialize(self, packet)
             self.first_tick()
+        elif Match.shared:
+            Match.activate(self)
 
         Match.update(packet)
+        if self.recorder is not None:
+            # The prediction the Match uses; fetching another one would refill the
+            # struct behind it.
+            self.recorder.record(packet, Match.current_prediction.prediction)
 
-        self.every_tick()
+        with profiler.section("every_tick"):
+            self.every_tick()
+        if self.scheduler.entries:
+            with profiler.section("scheduler"):
+                self.scheduler.run()
 
         self.tick += 1
-        self.renderer.end_rendering()
+        with profiler.section("rendering"):
+            self.renderer.end_rendering()
+        profiler.end_tick()
         return self.controls
 
     def every_tick(self, match:type):
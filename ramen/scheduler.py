@@ -0,0 +1,267 @@
+"""ramen.scheduler -- run many Activities each tick within a time budget.
+
+    scheduler = Scheduler(budget_ms=3)
+    scheduler.add(drive, priority=10, required=True)
+    scheduler.add(ShotSearch(), priority=1)
+    scheduler.add(Telemetry(), priority=0)
+    ...
+    scheduler.run()  # once per tick; `Agent` does this for `self.scheduler`
+
+Activities are called once per tick, highest priority first. Once the budget is
+used up, the rest are skipped for the tick, except `required` ones. Leftover
+budget goes to generator steps that are still in progress (see
+`Activity.run_step`), so long computations that yield often are spread over as
+many ticks as they need. Finished activities are removed.
+
+Activities that go to sleep (see `Activity.sleep`) are parked on a timer heap and
+not called at all until they wake up, unless they override `when_paused`.
+"""
+from bisect import insort
+from heapq import heappop, heappush
+from typing import List
+
+from ramen.activity import Activity
+from vitamins.match.match import Match
+from vitamins.util import perf_counter_ns
+
+
+def _resumable(activity: Activity) -> bool:
+    return activity.running is not None and not activity.paused
+
+
+def _finished(activity: Activity) -> bool:
+    return activity.done and activity.current_step is None
+
+
+def _parkable(activity: Activity) -> bool:
+    """Whether `activity` is asleep and has nothing to do until it wakes."""
+    return (
+        activity.subtask is None
+        and not activity.done
+        and activity.paused
+        and type(activity).when_paused is Activity.when_paused
+    )
+
+
+class ScheduledActivity:
+    """An Activity in a Scheduler, and the time it has used."""
+
+    def __init__(
+        self,
+        scheduler: "Scheduler",
+        activity: Activity,
+        priority: float,
+        required: bool,
+        order: int,
+    ):
+        self.scheduler = scheduler
+        self.activity = activity
+        self.priority = priority
+        self.required = required
+        self.sort_key = (-priority, order, self)
+        self.parked = False
+        self.wake_key = None  # its key in the timer heaps while parked
+        self.calls = 0
+        self.skipped = 0  # ticks it wasn't called because the budget ran out
+        self.total_ns = 0
+        self.max_ns = 0
+        self.tick_ns = 0  # time used in the latest tick
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_ns / 1e6
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ns / self.calls / 1e6 if self.calls else 0.0
+
+    @property
+    def max_ms(self) -> float:
+        return self.max_ns / 1e6
+
+    def __str__(self):
+        return (
+            f"{self.activity}: {self.calls} calls, {self.total_ms:.1f} ms total, "
+            f"mean {self.mean_ms:.3f} ms, max {self.max_ms:.3f} ms, "
+            f"skipped {self.skipped}"
+        )
+
+
+class Scheduler:
+    budget_ms: float = 2.0  # per tick
+
+    def __init__(self, budget_ms: float = None):
+        if budget_ms is not None:
+            self.budget_ms = budget_ms
+        self.entries: List[ScheduledActivity] = []  # highest priority first
+        self.active = []  # sort keys of the entries that aren't parked, in order
+        self.timers = []  # heap of (game time, order, entry) of parked entries
+        self.tick_timers = []  # heap of (tick, order, entry) of parked entries
+        self.woken: List[ScheduledActivity] = []  # to go back into `active`
+        self.added = 0
+        self.running = False  # inside `run`
+        self.added_in_run: List[ScheduledActivity] = []
+        self.removed_in_run = False
+        self.ticks = 0
+        self.overruns = 0  # ticks that went over the budget
+        self.tick_ms = 0.0  # time used in the latest tick
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(
+        self, activity: Activity, priority: float = 0, required: bool = False
+    ) -> ScheduledActivity:
+        """Schedule `activity`. Among equal priorities, the first added runs first.
+        Required activities run every tick, whatever the budget."""
+        self.added += 1
+        entry = ScheduledActivity(self, activity, priority, required, self.added)
+        activity.scheduled = entry
+        index = next(
+            (i for i, e in enumerate(self.entries) if e.priority < priority),
+            len(self.entries),
+        )
+        self.entries.insert(index, entry)
+        if self.running:
+            self.added_in_run.append(entry)  # it starts on the next tick
+        else:
+            insort(self.active, entry.sort_key)
+        return entry
+
+    def remove(self, activity: Activity):
+        entry = activity.scheduled
+        if entry is None or entry.scheduler is not self:
+            return
+        self.entries.remove(entry)
+        if entry in self.woken:
+            self.woken.remove(entry)
+        if self.running:
+            self.removed_in_run = True  # `run` drops it from `active` afterwards
+        elif entry.sort_key in self.active:
+            self.active.remove(entry.sort_key)
+        entry.parked = False
+        activity.scheduled = None
+
+    def park(self, entry: ScheduledActivity):
+        """Put a sleeping entry on the timer heap for its wake-up time."""
+        activity = entry.activity
+        order = entry.sort_key[1]
+        if Match.time < activity.wake_time:
+            entry.wake_key = activity.wake_time
+            heappush(self.timers, (activity.wake_time, order, entry))
+        else:
+            # It would be called `countdown` more times while paused:
+            entry.wake_key = self.ticks + activity.countdown + 1
+            heappush(self.tick_timers, (entry.wake_key, order, entry))
+        entry.parked = True
+
+    def wake(self, entry: ScheduledActivity):
+        """Return a parked entry to the active ones, from the start of the next run.
+        Its stale timer is skipped when it comes up."""
+        if entry.parked:
+            entry.parked = False
+            entry.wake_key = None
+            self.woken.append(entry)
+
+    def wake_due(self):
+        """Wake the parked entries whose time has come."""
+        time = Match.time
+        while self.timers and self.timers[0][0] <= time:
+            key, _, entry = heappop(self.timers)
+            if entry.parked and entry.wake_key == key:
+                self.wake(entry)
+        while self.tick_timers and self.tick_timers[0][0] <= self.ticks:
+            key, _, entry = heappop(self.tick_timers)
+            if entry.parked and entry.wake_key == key:
+                entry.activity.countdown = 0
+                self.wake(entry)
+        for entry in self.woken:
+            if entry.activity.scheduled is entry:
+                insort(self.active, entry.sort_key)
+        self.woken.clear()
+
+    def call(self, entry: ScheduledActivity, resume: bool = False):
+        """Call the activity, or with `resume`, only continue its generator step."""
+        start = perf_counter_ns()
+        if resume:
+            entry.activity.run_step()
+        else:
+            entry.activity()
+        elapsed = perf_counter_ns() - start
+        entry.calls += 1
+        entry.total_ns += elapsed
+        entry.tick_ns += elapsed
+        if elapsed > entry.max_ns:
+            entry.max_ns = elapsed
+
+    def run(self):
+        """Run one tick of every activity the budget allows."""
+        start = perf_counter_ns()
+        deadline = start + self.budget_ms * 1e6
+        self.ticks += 1
+        self.wake_due()
+        self.running = True
+        try:
+            finished = self.run_active(deadline)
+        finally:
+            self.running = False
+        if self.removed_in_run:
+            self.active = [k for k in self.active if k[2].activity.scheduled is k[2]]
+            self.removed_in_run = False
+        for entry in self.added_in_run:
+            if entry.activity.scheduled is entry:
+                insort(self.active, entry.sort_key)
+        self.added_in_run.clear()
+        if finished:
+            for entry in [e for e in self.entries if _finished(e.activity)]:
+                self.remove(entry.activity)
+        self.tick_ms = (perf_counter_ns() - start) / 1e6
+        if self.tick_ms > self.budget_ms:
+            self.overruns += 1
+
+    def run_active(self, deadline: float) -> bool:
+        """Call the active entries, then resume generator steps until `deadline`.
+        Returns whether any activity finished. Entries added or removed meanwhile
+        are sorted out by `run`."""
+        active = []
+        finished = False
+        for key in list(self.active):
+            entry = key[2]
+            if entry.activity.scheduled is not entry:
+                continue  # removed earlier in this tick
+            entry.tick_ns = 0
+            if entry.required or perf_counter_ns() < deadline:
+                self.call(entry)
+            else:
+                entry.skipped += 1
+            if _finished(entry.activity):
+                finished = True
+            elif _parkable(entry.activity):
+                self.park(entry)
+            else:
+                active.append(key)
+        self.active = active
+        # Use what's left of the budget to continue generator steps:
+        busy = [key[2] for key in active if _resumable(key[2].activity)]
+        while busy and perf_counter_ns() < deadline:
+            for entry in busy:
+                if perf_counter_ns() >= deadline:
+                    break
+                if entry.activity.scheduled is entry:
+                    self.call(entry, resume=True)
+                    finished = finished or _finished(entry.activity)
+            busy = [
+                e
+                for e in busy
+                if e.activity.scheduled is e and _resumable(e.activity)
+            ]
+        return finished
+
+    def report(self) -> str:
+        """Time use of every activity, most expensive first."""
+        lines = [
+            f"{self.ticks} ticks, {self.overruns} over the {self.budget_ms} ms budget"
+        ]
+        by_time = sorted(self.entries, key=lambda e: e.total_ns, reverse=True)
+        lines.extend(f"  {e}" for e in by_time)
+        return "\n".join(lines)
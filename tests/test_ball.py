@@ -0,0 +1,37 @@
+import pytest
+
+from vitamins.geometry import Vec3
+from vitamins.match.ball import Ball, BallSliceView
+from vitamins.match.structs import slice_table
+from vitamins.sim import Simulator
+
+VECTORS = [
+    "position",
+    "velocity",
+    "angular_velocity",
+    "up",
+    "down",
+    "left",
+    "right",
+    "forward",
+    "backward",
+]
+SCALARS = ["x", "y", "z", "time", "yaw", "pitch", "roll"]
+SCALARS += ["yaw_rate", "pitch_rate", "roll_rate"]
+
+
+@pytest.mark.parametrize("index", [0, 37, 200])
+def test_slice_view_matches_ball(index):
+    sim = Simulator(num_cars=2, seed=1)
+    sim.step()
+    prediction = sim.ball_prediction()
+    s = prediction.slices[index]
+    ball = Ball(phys=s.physics, time=s.game_seconds)
+    view = BallSliceView(slice_table(prediction), index)
+    for name in VECTORS:
+        assert tuple(getattr(view, name)) == pytest.approx(tuple(getattr(ball, name)))
+    for name in SCALARS:
+        assert getattr(view, name) == pytest.approx(getattr(ball, name)), name
+    target = Vec3(-1500, 3000, 17)
+    assert view.yaw_to(target) == pytest.approx(ball.yaw_to(target))
+    assert view.is_rolling() == ball.is_rolling()
@@ -0,0 +1,72 @@
+import math
+
+import pytest
+
+from vitamins.geometry import Vec3
+from vitamins.match.ball import Ball
+from vitamins.match.car import Car
+from vitamins.match.contact import CAR_REST_HEIGHT, GRAVITY, first_contacts
+from vitamins.match.prediction import BallPredictor
+from vitamins.match.state import MatchState
+from vitamins.sim import Simulator
+
+
+def reference_distance(car, state, ball, dt):
+    """Ball-to-hitbox distance minus the ball's radius, for one car and slice, with
+    scalars and the car's own axes."""
+    row = car.index
+    position = Vec3(*state.position[row]) + dt * Vec3(*state.velocity[row])
+    if not state.has_wheel_contact[row]:
+        position.z = max(position.z - 0.5 * GRAVITY * dt * dt, CAR_REST_HEIGHT)
+    hitbox = car.hitbox
+    axes = (car.forward, car.right, car.up)
+    center = position
+    for axis, offset in zip(axes, hitbox.local_center.tolist()):
+        center = center + offset * axis
+    offset = ball - center
+    squared = 0.0
+    for axis, half in zip(axes, hitbox.half_extents.tolist()):
+        local = offset.dot(axis)
+        outside = local - max(-half, min(half, local))
+        squared += outside * outside
+    return math.sqrt(squared) - Ball.radius
+
+
+def test_matches_scalar_reference():
+    hits = 0
+    for seed in range(3):
+        sim = Simulator(num_cars=4, seed=seed)
+        for _ in range(40):
+            sim.step()
+        state = MatchState()
+        state.refresh(sim.packet)
+        cars = [Car(index=i, packet=sim.packet) for i in range(state.num_cars)]
+        predictor = BallPredictor(sim.ball_prediction())
+        # Park car 0 where the ball comes low:
+        low = int((predictor.positions[:, 2] < 150).argmax())
+        state.position[0, :2] = predictor.positions[low, :2]
+        state.position[0, 2] = CAR_REST_HEIGHT
+        state.velocity[0] = 0
+        state.has_wheel_contact[0] = True
+        contacts = first_contacts(predictor, cars, state, margin=100)
+        start = int(predictor.times.searchsorted(state.time))
+        for car in cars:
+            expected = -1
+            for i in range(start, predictor.prediction.num_slices):
+                dt = float(predictor.times[i]) - state.time
+                ball = Vec3(*predictor.positions[i].tolist())
+                distance = reference_distance(car, state, ball, dt)
+                actual = contacts.distance[car.index, i - start]
+                assert actual == pytest.approx(distance, abs=1e-6)
+                if expected < 0 and distance <= 100:
+                    expected = i
+            assert contacts.index[car.index] == expected
+            if expected >= 0:
+                ball = Vec3(*predictor.positions[expected].tolist())
+                point = Vec3(*contacts.point[car.index])
+                dt = float(predictor.times[expected]) - state.time
+                touch = reference_distance(car, state, ball, dt)
+                assert ball.dist(point) - Ball.radius == pytest.approx(touch, abs=1e-6)
+            hits += expected >= 0
+    assert hits > 0
+
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from vitamins.geometry import Vec3
+from vitamins.match.field import BoostEvent, Field
+from vitamins.match.structs import BOOST_STATE_DTYPE
+from vitamins.sim import field_info
+
+
+def make_field():
+    return Field(0, field_info())
+
+
+def states(field, ready, timer=None):
+    result = np.zeros(len(field.boosts), BOOST_STATE_DTYPE)
+    result["is_active"] = ready
+    result["timer"] = 0 if timer is None else timer
+    return result
+
+
+def test_first_refresh_has_no_events():
+    pads = make_field().boost_index
+    ready = np.ones(len(pads), dtype=bool)
+    ready[3] = False
+    timer = np.zeros(len(pads))
+    timer[3] = 1.5
+    pads.refresh(states(pads, ready, timer), 20.0)
+    assert pads.events == []
+    assert pads.respawn_at[3] == 20.0 - 1.5 + pads.respawn_time[3]
+    assert pads.next_respawn() == (pads.respawn_at[3], 3)
+    pads.refresh(states(pads, ready, timer), 20.1)
+    assert pads.events == [] and not pads.changed
+
+
+def test_events_match_state_changes():
+    pads = make_field().boost_index
+    rng = np.random.default_rng(0)
+    ready = np.ones(len(pads), dtype=bool)
+    pads.refresh(states(pads, ready), 1.0)
+    for tick in range(1, 200):
+        time = 1.0 + tick / 60
+        new = ready.copy()
+        flip = rng.random(len(pads)) < 0.05
+        new[flip] = ~new[flip]
+        pads.refresh(states(pads, new), time)
+        expected = [
+            BoostEvent(time, i, not new[i]) for i in (ready != new).nonzero()[0]
+        ]
+        assert pads.events == expected
+        assert pads.changed == bool(expected)
+        assert set(pads.timeline_pads.tolist()) == set((~new).nonzero()[0].tolist())
+        assert (np.diff(pads.timeline_times) >= 0).all()
+        ready = new
+
+
+def test_time_going_back_reseeds():
+    pads = make_field().boost_index
+    ready = np.ones(len(pads), dtype=bool)
+    pads.refresh(states(pads, ready), 100.0)
+    ready[0] = False
+    pads.refresh(states(pads, ready), 0.0)
+    assert pads.events == []
+    assert pads.respawn_at[0] == pads.respawn_time[0]
+
+
+def test_pickup_setters_write_through():
+    field = make_field()
+    pads = field.boost_index
+    pads.refresh(states(pads, True), 5.0)
+    boost = field.big_boosts[0]
+    boost.is_ready = False
+    assert not pads.is_ready[boost.index]
+    assert boost.respawn_at == 5.0 + pads.big_respawn
+    assert pads.next_respawn() == (boost.respawn_at, boost.index)
+    boost.timer = 4.0
+    assert boost.respawn_at == 5.0 - 4.0 + pads.big_respawn
+    boost.respawn_at = 7.0
+    assert pads.timeline_times.tolist() == [7.0]
+    boost.is_ready = True
+    assert pads.next_respawn() == (np.inf, -1)
+
+
+def reference_nearest_ready(field, point, dt, big=None):
+    best, best_dist = -1, np.inf
+    for boost in field.boosts:
+        ready_in = max(boost.respawn_at - field.boost_index.time, 0)
+        if ready_in > dt or (big is not None and boost.is_big != big):
+            continue
+        dist = boost.dist(point)
+        if dist < best_dist:
+            best, best_dist = boost.index, dist
+    return best
+
+
+def test_queries_match_scalar_loops():
+    field = make_field()
+    pads = field.boost_index
+    rng = np.random.default_rng(3)
+    ready = rng.random(len(pads)) < 0.6
+    timer = np.where(ready, 0, rng.uniform(0, 4, len(pads)))
+    pads.refresh(states(pads, ready, timer), 30.0)
+    points = np.column_stack(
+        [rng.uniform(-4000, 4000, 20), rng.uniform(-5000, 5000, 20), np.full(20, 17)]
+    )
+    dts = rng.uniform(0, 6, 20)
+    mask = pads.is_big | (np.arange(len(pads)) % 3 == 0)
+
+    distances = pads.distances(points)
+    for row, point in enumerate(points.tolist()):
+        point = Vec3(*point)
+        by_distance = sorted(field.boosts, key=lambda b: b.dist(point))
+        expected = [b.dist(point) for b in field.boosts]
+        assert distances[row] == pytest.approx(expected)
+        assert pads.distances(point) == pytest.approx(expected)
+        assert pads.nearest(point, 3).tolist() == [b.index for b in by_distance[:3]]
+        masked = [b.index for b in by_distance if mask[b.index]][:4]
+        assert pads.nearest(point, 4, mask).tolist() == masked
+        within = [b.dist(point) <= 1500 for b in field.boosts]
+        assert pads.within(point, 1500).tolist() == within
+        for big in (None, True, False):
+            expected = reference_nearest_ready(field, point, dts[row], big)
+            assert pads.nearest_ready(point, dts[row], big) == expected
+        assert pads.nearest_ready(points, dts)[row] == reference_nearest_ready(
+            field, point, dts[row]
+        )
+    assert pads.nearest(points, 2).tolist() == [
+        pads.nearest(p, 2).tolist() for p in points
+    ]
+
+    for until in (30.0, 31.5, 33.0, 40.0):
+        waiting = [b for b in field.boosts if not b.is_ready]
+        due = sorted(
+            (b for b in waiting if b.respawn_at <= until), key=lambda b: b.respawn_at
+        )
+        assert pads.respawns_until(until).tolist() == [b.index for b in due]
+    soonest = min(waiting, key=lambda b: b.respawn_at)
+    assert pads.next_respawn() == (soonest.respawn_at, soonest.index)
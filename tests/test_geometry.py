@@ -0,0 +1,57 @@
+import numpy as np
+from rlbot.utils.structures.game_data_struct import Vector3
+
+from vitamins.geometry import Line, Vec3, Vec3Array
+
+
+def test_vec3_arithmetic():
+    a = Vec3(1, 2, 3)
+    b = Vec3(4, 5, 6)
+    assert tuple(a + b) == (5, 7, 9)
+    assert tuple(b - a) == (3, 3, 3)
+    a += b
+    assert tuple(a) == (5, 7, 9)
+
+
+def test_vec3_with_vec3array():
+    points = Vec3Array([[1, 2, 3], [4, 5, 6]])
+    one = Vec3(1, 1, 1)
+    added = one + points
+    assert isinstance(added, Vec3Array)
+    np.testing.assert_array_equal(added.data, [[2, 3, 4], [5, 6, 7]])
+    subtracted = one - points
+    assert isinstance(subtracted, Vec3Array)
+    np.testing.assert_array_equal(subtracted.data, [[0, -1, -2], [-3, -4, -5]])
+    np.testing.assert_array_equal((points - one).data, -subtracted.data)
+
+
+def test_vec3array_matches_vec3():
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(20, 3)) * 1000
+    points = Vec3Array(data)
+    other = Vec3(10, -20, 30)
+    vecs = points.to_vecs()
+    np.testing.assert_allclose(points.dot(other), [v.dot(other) for v in vecs])
+    np.testing.assert_allclose(
+        points.cross(other).data, [tuple(v.cross(other)) for v in vecs]
+    )
+    np.testing.assert_allclose(points.length(), [v.length() for v in vecs])
+
+
+def test_line_offset_array():
+    line = Line(Vec3(0, 0, 0), Vec3(1, 0, 0))
+    points = Vec3Array([[5, 3, 0], [-2, -4, 10]])
+    offsets = line.offset(points)
+    for offset, point in zip(offsets.to_vecs(), points.to_vecs()):
+        assert tuple(offset) == tuple(line.offset(point))
+
+
+def test_vec3_with_anything_xyz():
+    a = Vec3(1, 2, 3)
+    b = Vector3(4, 5, 6)
+    assert tuple(a + b) == (5, 7, 9)
+    assert tuple(a - b) == (-3, -3, -3)
+    a += b
+    assert tuple(a) == (5, 7, 9)
+    a -= b
+    assert tuple(a) == (1, 2, 3)
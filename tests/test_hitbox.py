@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from vitamins.geometry import Vec3
+from vitamins.match.car import Car
+from vitamins.match.hitbox import POINT_NAMES
+from vitamins.sim import Simulator
+
+
+def reference_location(hitbox, name, dt):
+    """Hitbox.location as it was before the point tables: sums of the car's axes,
+    moved along the velocity only."""
+    car = hitbox.car
+    pos = car.position + dt * car.velocity
+    if "F" in name:
+        pos += car.forward * hitbox.root_to_front
+    if "B" in name:
+        pos += car.backward * hitbox.root_to_back
+    if "L" in name:
+        pos += car.left * hitbox.root_to_side
+    if "R" in name:
+        pos -= car.left * hitbox.root_to_side
+    if "U" in name:
+        pos += car.up * hitbox.root_to_top
+    if "D" in name:
+        pos += car.down * (hitbox.height - hitbox.root_to_top)
+    return pos
+
+
+def make_car():
+    sim = Simulator(num_cars=2, seed=3)
+    for _ in range(30):
+        sim.step()
+    return Car(index=0, packet=sim.packet)
+
+
+@pytest.mark.parametrize("dt", [0, 0.05])
+def test_location_matches_reference(dt):
+    car = make_car()
+    for name in POINT_NAMES:
+        expected = reference_location(car.hitbox, name, dt)
+        actual = car.hitbox.location(name, dt, spin=False)
+        assert tuple(actual) == pytest.approx(tuple(expected))
+
+
+def test_points_follow_a_velocity_change():
+    car = make_car()
+    car.hitbox.points(0.1)
+    car.velocity = car.velocity + Vec3(500, 0, 0)
+    car.angular_velocity = Vec3(0, 0, 2)
+    for spin in (False, True):
+        car.hitbox.points(0.1, spin)
+        car.velocity = car.velocity + Vec3(0, 300, 0)
+        actual = car.hitbox.location("FLU", 0.1, spin=False)
+        expected = reference_location(car.hitbox, "FLU", 0.1)
+        assert tuple(actual) == pytest.approx(tuple(expected))
+    before = car.hitbox.points(0.1).copy()
+    car.angular_velocity = Vec3(0, 0, -2)
+    assert not np.allclose(car.hitbox.points(0.1), before)
@@ -0,0 +1,55 @@
+import math
+
+import numpy as np
+
+from vitamins.geometry import Vec3
+from vitamins.match.intercept import earliest_intercepts
+from vitamins.match.prediction import BallPredictor
+from vitamins.match.state import MatchState
+from vitamins.physics import travel_time
+from vitamins.sim import Simulator
+
+
+def reference_intercept(predictor, state, car, max_height=150, reach=92.75):
+    """earliest_intercepts for one car, one slice at a time with scalars."""
+    if state.is_demolished[car]:
+        return -1
+    position = Vec3(*state.position[car])
+    velocity = Vec3(*state.velocity[car])
+    forward = Vec3(*state.forward[car])
+    forward.z = 0
+    forward = forward.normalized()
+    boost = bool(state.boost[car] > 0)
+    for i in range(predictor.prediction.num_slices):
+        time = float(predictor.times[i])
+        ball = Vec3(*predictor.positions[i].tolist())
+        if time < state.time or ball.z > max_height:
+            continue
+        offset = ball - position
+        offset.z = 0
+        dist = offset.length()
+        direction = offset / max(dist, 1e-6)
+        angle = math.acos(max(-1.0, min(1.0, forward.dot(direction))))
+        speed = velocity.x * direction.x + velocity.y * direction.y
+        needed = travel_time(max(dist - reach, 0), angle, speed, boost)
+        if needed <= time - state.time:
+            return i
+    return -1
+
+
+def test_matches_scalar_reference():
+    for seed in range(4):
+        sim = Simulator(num_cars=6, seed=seed)
+        for _ in range(20 + 30 * seed):
+            sim.step()
+        state = MatchState()
+        state.refresh(sim.packet)
+        state.boost[::3] = 0
+        state.is_demolished[5] = True
+        predictor = BallPredictor(sim.ball_prediction())
+        result = earliest_intercepts(predictor, state)
+        for car in range(state.num_cars):
+            assert result.index[car] == reference_intercept(predictor, state, car)
+            if result.index[car] >= 0:
+                assert result.time[car] == predictor.times[result.index[car]]
+        assert np.isinf(result.time[5])
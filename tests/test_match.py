@@ -0,0 +1,52 @@
+import pytest
+
+from vitamins.match.match import Match
+from vitamins.sim import SimAgent, Simulator
+
+
+@pytest.fixture
+def shared_match(monkeypatch):
+    monkeypatch.setattr(Match, "shared", True)
+    monkeypatch.setattr(Match, "prediction_thread", True)
+    sim = Simulator(num_cars=2, seed=1)
+    sim.step()
+    agents = [SimAgent(sim, 0), SimAgent(sim, 1)]
+    for agent in agents:
+        Match.initialize(agent, sim.packet)
+    yield sim, agents
+    for agent in agents:
+        Match.retire(agent)
+
+
+def test_shared_fields_refresh_pads_once(shared_match, monkeypatch):
+    sim, agents = shared_match
+    pads = Match.fields[0].boost_index
+    assert Match.fields[1].boost_index is pads
+    assert Match.fields[1].boosts is Match.fields[0].boosts
+    times = []
+    refresh = pads.refresh
+
+    def counting_refresh(states, time):
+        times.append(time)
+        refresh(states, time)
+
+    monkeypatch.setattr(pads, "refresh", counting_refresh)
+    for _ in range(5):
+        sim.step()
+        for agent in agents:
+            Match.activate(agent)
+            Match.update(sim.packet)
+    assert len(times) == len(set(times)) == 5
+
+
+def test_retire_hands_over_the_prediction_worker(shared_match):
+    sim, agents = shared_match
+    worker = Match.prediction_worker
+    Match.activate(agents[0])
+    Match.retire(agents[0])
+    assert Match.prediction_worker is worker
+    assert worker.fetch.__self__ is agents[1]
+    assert Match.agent is agents[1]
+    Match.retire(agents[1])
+    assert Match.prediction_worker is None
+    assert worker.stopped
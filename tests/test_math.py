@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from vitamins.math import Lerp
+from vitamins.physics import CURVATURE, THROTTLE_ACCELERATION
+
+
+def uniform():
+    return Lerp.sample(lambda x: x * x - 3 * x, -2.0, 5.0, 50)
+
+
+@pytest.mark.parametrize(
+    "lerp",
+    [CURVATURE, THROTTLE_ACCELERATION, uniform()],
+    ids=["curvature", "throttle", "uniform"],
+)
+def test_array_matches_scalar_calls(lerp):
+    lo, hi = lerp.x_list[0], lerp.x_list[-1]
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.uniform(lo, hi, 500), lerp.x_list])
+    expected = [lerp(float(v)) for v in x]
+    assert lerp(x) == pytest.approx(expected, rel=1e-12, abs=1e-12)
+    grid = x.reshape(-1, 1)
+    assert lerp(grid)[:, 0] == pytest.approx(expected, rel=1e-12, abs=1e-12)
+
+
+def test_clamp_and_bounds():
+    clamped = Lerp([0, 1, 3], [0, 10, 30], clamp=True)
+    x = np.array([-5.0, 0.5, 2.0, 9.0])
+    assert clamped(x).tolist() == [clamped(float(v)) for v in x] == [0, 5, 20, 30]
+    strict = Lerp([0, 1, 3], [0, 10, 30])
+    with pytest.raises(ValueError):
+        strict(np.array([0.5, 4.0]))
+    with pytest.raises(ValueError):
+        strict(4.0)
+    assert strict(np.zeros(0)).shape == (0,)
+
+
+def test_uniform_grid_detection():
+    assert uniform().inv_step
+    assert not CURVATURE.inv_step
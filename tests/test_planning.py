@@ -0,0 +1,34 @@
+import pickle
+
+import numpy as np
+
+from vitamins.match.field import Field
+from vitamins.match.planning import WorldSnapshot
+from vitamins.match.prediction import BallPredictor
+from vitamins.match.state import MatchState
+from vitamins.sim import Simulator
+
+
+def test_snapshot_round_trip():
+    sim = Simulator(num_cars=4, seed=5)
+    sim.step()
+    state = MatchState()
+    state.refresh(sim.packet)
+    field = Field(0, sim.field_info)
+    field.update(sim.packet)
+    pads = field.boost_index
+    for boost in field.boosts[::5]:
+        boost.is_ready = False
+        boost.timer = boost.index / 10
+    predictor = BallPredictor(sim.ball_prediction())
+    predictor.analyze()
+
+    world = pickle.loads(pickle.dumps(WorldSnapshot(state, pads, predictor)))
+    copy = world.pads()
+    assert copy.next_respawn() == pads.next_respawn()
+    assert pads.next_respawn()[1] >= 0
+    for time in (state.time + 1, state.time + 5, state.time + 20):
+        assert copy.respawns_until(time).tolist() == pads.respawns_until(time).tolist()
+    assert np.array_equal(copy.ready_in(), pads.ready_in())
+    assert np.array_equal(world.state().physics, state.physics)
+    assert np.array_equal(world.predictor().contacts, predictor.contacts)
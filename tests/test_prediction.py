@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from vitamins.match.match import Match
+from vitamins.match.prediction import BallPredictor, PredictionWorker
+from vitamins.sim import Simulator
+
+
+def make_predictor():
+    sim = Simulator(num_cars=2, seed=1)
+    sim.step()
+    return BallPredictor(sim.ball_prediction())
+
+
+def test_incremental_matches_full():
+    full = make_predictor()
+    full.analyze()
+    incremental = make_predictor()
+    incremental.incremental = True
+    while not incremental.ready:
+        incremental.analyze(max_ms=0.01)
+    assert [i for i, _ in incremental.bounces] == [i for i, _ in full.bounces]
+    assert incremental.roll_time == full.roll_time
+    assert (incremental.contacts == full.contacts).all()
+    assert incremental.bounce_surfaces == full.bounce_surfaces
+
+
+def test_incremental_out_of_time_on_last_slice():
+    predictor = make_predictor()
+    predictor.incremental = True
+    predictor.slices_analyzed = predictor.prediction.num_slices - 1
+    predictor.analyze(max_ms=-1)  # the budget is always used up
+    assert predictor.ready
+    assert predictor.contacts is not None
+
+
+def test_predictor_owns_its_slices():
+    sim = Simulator(num_cars=2, seed=1)
+    sim.step()
+    predictor = BallPredictor(sim.ball_prediction())
+    predictor.update(sim.packet)
+    ball = predictor.predict(1.0)
+    position = tuple(ball)
+    time = ball.time
+    for _ in range(60):
+        sim.step()
+    sim.ball_prediction()  # RLBot refills the same struct
+    assert tuple(ball) == position
+    assert ball.time == time
+
+
+def test_worker_and_match_never_fetch_at_once():
+    sim = Simulator(num_cars=2, seed=1)
+    sim.step()
+    inside = []
+    overlaps = []
+
+    class FakeAgent:
+        def get_ball_prediction_struct(self):
+            inside.append(1)
+            overlaps.append(len(inside))
+            time.sleep(0.001)
+            prediction = sim.ball_prediction()
+            inside.pop()
+            return prediction
+
+    agent = FakeAgent()
+    worker = PredictionWorker(agent.get_ball_prediction_struct, Match.fetch_lock)
+    worker.start()
+    previous, Match.agent = Match.agent, agent
+    try:
+        for _ in range(20):
+            worker.request()
+            worker.take()
+            Match.fetch_prediction()
+    finally:
+        Match.agent = previous
+        worker.stop()
+    assert worker.fetches > 0
+    assert max(overlaps) == 1
+
+
+def reference_hermite(prediction, t):
+    """The ball at time `t`, interpolated from the ctypes slices one axis at a time."""
+    slices = prediction.slices
+    i = next(i for i in range(prediction.num_slices) if slices[i].game_seconds >= t)
+    a, b = slices[max(i - 1, 0)], slices[i]
+    h = b.game_seconds - a.game_seconds
+    u = (t - a.game_seconds) / h if h > 0 else 0.0
+    position, velocity = [], []
+    for axis in "xyz":
+        p0 = getattr(a.physics.location, axis)
+        p1 = getattr(b.physics.location, axis)
+        v0 = getattr(a.physics.velocity, axis)
+        v1 = getattr(b.physics.velocity, axis)
+        h00, h10 = 2 * u**3 - 3 * u**2 + 1, u**3 - 2 * u**2 + u
+        h01, h11 = -2 * u**3 + 3 * u**2, u**3 - u**2
+        position.append(h00 * p0 + h10 * h * v0 + h01 * p1 + h11 * h * v1)
+        d00, d10 = 6 * u**2 - 6 * u, 3 * u**2 - 4 * u + 1
+        d01, d11 = -6 * u**2 + 6 * u, 3 * u**2 - 2 * u
+        velocity.append(
+            (d00 * p0 + d01 * p1) / (h if h > 0 else 1.0) + d10 * v0 + d11 * v1
+        )
+    return position, velocity
+
+
+def test_hermite_matches_scalar_reference():
+    sim = Simulator(num_cars=2, seed=4)
+    sim.step()
+    predictor = BallPredictor(sim.ball_prediction())
+    predictor.update(sim.packet)
+    dts = [0.0, 0.004, 0.013, 0.5, 1.0 / 3, 2.71, 5.9]
+    many = predictor.predict_many(dts, "hermite")
+    for row, dt in enumerate(dts):
+        ball = predictor.predict(dt, "hermite")
+        position, velocity = reference_hermite(predictor.prediction, ball.time)
+        assert tuple(ball.position) == pytest.approx(position, abs=1e-3)
+        assert tuple(ball.velocity) == pytest.approx(velocity, abs=1e-3)
+        assert many.position[row].tolist() == pytest.approx(position, abs=1e-3)
+        assert many.velocity[row].tolist() == pytest.approx(velocity, abs=1e-3)
+    # At a slice it is the slice:
+    s = predictor.prediction.slices[40]
+    ball = predictor.predict(s.game_seconds - predictor.game_time, "hermite")
+    location = s.physics.location
+    assert tuple(ball.position) == pytest.approx((location.x, location.y, location.z))
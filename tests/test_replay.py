@@ -0,0 +1,51 @@
+import ctypes
+
+from ramen.agent import Agent
+from vitamins.match.match import Match
+from vitamins.replay import PACKET_TAIL_OFFSET, Recording, replay
+from vitamins.sim import record_scenario, run_scenario
+
+
+class Bot(Agent):
+    def first_tick(self):
+        pass
+
+    def every_tick(self):
+        pass
+
+
+def packet_bytes(packet, num_cars):
+    address = ctypes.addressof(packet)
+    cars = ctypes.string_at(address, num_cars * ctypes.sizeof(packet.game_cars[0]))
+    tail = ctypes.string_at(
+        address + PACKET_TAIL_OFFSET, ctypes.sizeof(packet) - PACKET_TAIL_OFFSET
+    )
+    return cars + tail
+
+
+def test_round_trip(tmp_path):
+    path = record_scenario(str(tmp_path / "a.rec"), seed=3, num_cars=2, ticks=50)
+    recording = Recording(path)
+    assert len(recording) == 50
+    for i, (packet, prediction) in enumerate(run_scenario(3, 2, 50)):
+        assert packet_bytes(recording.packet(i), 2) == packet_bytes(packet, 2)
+        assert bytes(recording.prediction(i)) == bytes(prediction)
+
+
+def test_replay_and_rerecord(tmp_path):
+    path = record_scenario(str(tmp_path / "a.rec"), seed=4, num_cars=2, ticks=40)
+    bot = Bot("bot", 0, 0)
+    bot.get_field_info = lambda: Recording(path).field_info
+    bot.start_recording(str(tmp_path / "b.rec"), max_cars=2)
+    stats = replay(bot, path)
+    bot.stop_recording()
+    Match.stop_prediction_worker()
+    assert stats.ticks == 40
+    original = Recording(path)
+    again = Recording(str(tmp_path / "b.rec"))
+    assert len(again) == 40
+    for i in range(40):
+        assert packet_bytes(again.packet(i), 2) == packet_bytes(original.packet(i), 2)
+        # What the bot recorded is the prediction its Match was using:
+        time = again.packet(i).game_info.seconds_elapsed
+        assert again.prediction(i).slices[0].game_seconds <= time + 1e-3
@@ -0,0 +1,214 @@
+from types import MethodType
+
+import pytest
+
+from ramen.activity import Activity, UndefinedStepError
+from ramen.scheduler import Scheduler
+from vitamins.match.match import Match
+
+
+@pytest.fixture(autouse=True)
+def match_time():
+    Match.time = 0.0
+    yield
+    Match.time = 0.0
+
+
+class Counter(Activity):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def step_0(self):
+        self.calls += 1
+
+
+def run_ticks(scheduler, ticks, start=0):
+    for tick in range(start, start + ticks):
+        Match.time = tick / 120
+        scheduler.run()
+
+
+def test_priority_order():
+    order = []
+
+    class Named(Activity):
+        def __init__(self, name):
+            super().__init__()
+            self.name = name
+
+        def step_0(self):
+            order.append(self.name)
+
+    scheduler = Scheduler()
+    scheduler.add(Named("low"), priority=0)
+    scheduler.add(Named("high"), priority=5)
+    scheduler.add(Named("mid"), priority=1)
+    scheduler.run()
+    assert order == ["high", "mid", "low"]
+
+
+def test_add_during_run():
+    scheduler = Scheduler()
+    child = Counter()
+
+    class Spawner(Counter):
+        def step_0(self):
+            super().step_0()
+            if self.calls == 1:
+                scheduler.add(child, priority=10)
+
+    spawner = Spawner()
+    scheduler.add(spawner)
+    scheduler.run()
+    assert spawner.calls == 1
+    assert child.calls == 0
+    scheduler.run()
+    assert spawner.calls == 2
+    assert child.calls == 1
+
+
+def test_remove_during_run():
+    scheduler = Scheduler()
+    victim = Counter()
+
+    class Remover(Activity):
+        def step_0(self):
+            scheduler.remove(victim)
+
+    scheduler.add(Remover(), priority=1)
+    scheduler.add(victim)
+    run_ticks(scheduler, 3)
+    assert victim.calls == 0
+    assert victim.scheduled is None
+    assert len(scheduler) == 1
+    assert len(scheduler.active) == 1
+
+
+def test_sleeping_activities_are_not_called():
+    class Sleeper(Counter):
+        def step_0(self):
+            super().step_0()
+            self.sleep(ms=100)
+
+    scheduler = Scheduler()
+    sleeper = Sleeper()
+    entry = scheduler.add(sleeper)
+    run_ticks(scheduler, 24)  # 0.2 s
+    assert sleeper.calls == 2
+    assert entry.calls == 2  # no calls while parked
+
+
+def test_tick_sleep_matches_direct_calls():
+    class Napper(Counter):
+        def step_0(self):
+            super().step_0()
+            self.sleep(ticks=2)
+
+    direct = Napper()
+    for tick in range(30):
+        Match.time = tick / 120
+        direct()
+    scheduler = Scheduler()
+    scheduled = Napper()
+    scheduler.add(scheduled)
+    run_ticks(scheduler, 30)
+    assert scheduled.calls == direct.calls
+
+
+def test_wake_then_remove():
+    class Sleeper(Counter):
+        def step_0(self):
+            super().step_0()
+            self.sleep(ms=1000)
+
+    scheduler = Scheduler()
+    sleeper = Sleeper()
+    scheduler.add(sleeper)
+    scheduler.run()
+    sleeper.wake()
+    scheduler.remove(sleeper)
+    run_ticks(scheduler, 3, start=1)
+    assert sleeper.calls == 1
+    assert scheduler.active == []
+
+
+def test_finished_activities_are_removed():
+    class Once(Activity):
+        def step_0(self):
+            self.done = True
+
+    scheduler = Scheduler()
+    scheduler.add(Once())
+    run_ticks(scheduler, 3)
+    assert len(scheduler) == 0
+
+
+def test_generator_resumes_skip_hooks():
+    class Search(Activity):
+        hooks = 0
+
+        def before(self):
+            self.hooks += 1
+
+        def step_0(self):
+            for _ in range(1000):
+                yield
+            self.done = True
+
+    scheduler = Scheduler(budget_ms=1000)
+    search = Search()
+    scheduler.add(search)
+    scheduler.run()
+    assert search.running is None
+    assert search.hooks == 1
+
+
+def test_budget_skips_low_priority():
+    class Slow(Activity):
+        def step_0(self):
+            total = 0
+            while total < 10**6:
+                total += 1
+
+    scheduler = Scheduler(budget_ms=0.001)
+    low = Counter()
+    must = Counter()
+    scheduler.add(Slow(), priority=2)
+    scheduler.add(must, priority=0, required=True)
+    entry = scheduler.add(low, priority=1)
+    scheduler.run()
+    assert low.calls == 0
+    assert entry.skipped == 1
+    assert must.calls == 1
+
+
+def test_step_dispatch():
+    class Steps(Activity):
+        def step_01(self):
+            pass
+
+        def step_go(self):
+            pass
+
+    assert Steps.steps[1] is Activity.step_1
+    assert Steps.steps["01"] is Steps.step_01
+    activity = Steps()
+    activity.step("go")
+    assert activity.stepfunc.__func__ is Steps.step_go
+
+    def step_late(self):
+        self.status = "late"
+
+    Steps.step_late = step_late
+    activity.step("late")
+    activity.stepfunc()
+    assert activity.status == "late"
+
+    activity.step_extra = MethodType(step_late, activity)
+    activity.step("extra")
+    assert activity.stepfunc == activity.step_extra
+
+    with pytest.raises(UndefinedStepError):
+        activity.step("missing")
+    assert activity.done
@@ -0,0 +1,123 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from vitamins.match.field import Field
+from vitamins.match.prediction import BallPredictor
+from vitamins.match.snapshot import SnapshotPublisher, SnapshotReader
+from vitamins.match.state import MatchState
+from vitamins.sim import Simulator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_tick(sim):
+    sim.step()
+    state = MatchState()
+    state.refresh(sim.packet)
+    field = Field(0, sim.field_info)
+    field.update(sim.packet)
+    predictor = BallPredictor(sim.ball_prediction())
+    predictor.analyze()
+    return state, field.boost_index, predictor
+
+
+def test_round_trip():
+    sim = Simulator(num_cars=4, seed=2)
+    state, pads, predictor = make_tick(sim)
+    name = f"test_snapshot_{os.getpid()}"
+    publisher = SnapshotPublisher(name, max_cars=4)
+    reader = SnapshotReader(name)
+    try:
+        copy = MatchState()
+        assert not reader.read_state(copy)
+        assert reader.predictor() is None
+        publisher.publish(state, pads, predictor)
+        assert reader.read_state(copy)
+        assert copy.time == state.time
+        assert np.array_equal(copy.physics, state.physics)
+        assert np.array_equal(copy.ball_physics, state.ball_physics)
+        read = reader.predictor()
+        assert read.ready
+        assert np.array_equal(read.slices, predictor.slices)
+        assert np.array_equal(read.contacts, predictor.contacts)
+        assert [i for i, _ in read.bounces] == [i for i, _ in predictor.bounces]
+        assert read.roll_time == predictor.roll_time
+        assert reader.predictor() is read  # unchanged, so not read again
+    finally:
+        reader.close()
+        publisher.close()
+
+
+def test_retry_after_a_write():
+    sim = Simulator(num_cars=2, seed=3)
+    state, pads, predictor = make_tick(sim)
+    name = f"test_snapshot_retry_{os.getpid()}"
+    publisher = SnapshotPublisher(name, max_cars=2)
+    reader = SnapshotReader(name)
+    try:
+        seq = reader.begin()
+        assert not reader.retry(seq)
+        publisher.publish(state, pads, predictor)
+        assert reader.retry(seq)
+        assert reader.begin() == seq + 2
+    finally:
+        reader.close()
+        publisher.close()
+
+
+def test_reader_leaves_the_publishers_registration_alone():
+    # Reader and publisher in one process share a resource tracker.
+    script = (
+        "from vitamins.match.snapshot import SnapshotPublisher, SnapshotReader\n"
+        "publisher = SnapshotPublisher('test_snapshot_tracker')\n"
+        "reader = SnapshotReader('test_snapshot_tracker')\n"
+        "reader.close()\n"
+        "publisher.close()\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert "Traceback" not in result.stderr
+    assert "leaked" not in result.stderr
+
+
+def test_reader_gives_up_on_a_stuck_publisher():
+    sim = Simulator(num_cars=2, seed=3)
+    state, pads, predictor = make_tick(sim)
+    name = f"test_snapshot_stuck_{os.getpid()}"
+    publisher = SnapshotPublisher(name, max_cars=2)
+    reader = SnapshotReader(name)
+    try:
+        publisher.publish(state, pads, predictor)
+        publisher.sequence += 1  # died in the middle of a write
+        assert reader.begin() is None
+        assert not reader.read_state(MatchState())
+        assert reader.predictor() is None
+    finally:
+        reader.close()
+        publisher.close()
+
+
+def test_failed_publish_ends_the_write(monkeypatch):
+    sim = Simulator(num_cars=2, seed=3)
+    state, pads, predictor = make_tick(sim)
+    name = f"test_snapshot_failed_{os.getpid()}"
+    publisher = SnapshotPublisher(name, max_cars=2)
+    reader = SnapshotReader(name)
+    try:
+
+        def fail(predictor):
+            raise RuntimeError("write failed")
+
+        monkeypatch.setattr(publisher, "write_prediction", fail)
+        with pytest.raises(RuntimeError):
+            publisher.publish(state, pads, predictor)
+        assert reader.begin() == 2
+    finally:
+        reader.close()
+        publisher.close()
@@ -0,0 +1,32 @@
+import numpy as np
+
+from benchmarks.fixtures import game_tick_packet
+from vitamins.geometry import Vec3
+from vitamins.match.intercept import travel_times
+from vitamins.match.state import MatchState
+
+
+def test_time_to_ball_matches_travel_times():
+    state = MatchState()
+    state.refresh(game_tick_packet(6))
+    state.is_demolished[2] = True
+    time = state.time_to_ball()
+    rows = np.arange(state.num_cars)
+    expected = travel_times(state, rows, state.ball_position[None])[:, 0]
+    assert np.allclose(time, expected)
+    assert time[2] == np.inf
+    assert state.first_to_ball() == int(expected.argmin())
+    odd = rows % 2 == 1
+    assert state.first_to_ball(odd) == int(np.where(odd, expected, np.inf).argmin())
+
+
+def test_queries_take_a_vec3():
+    state = MatchState()
+    state.refresh(game_tick_packet(6))
+    point = Vec3(1000, -2000, 17)
+    array = np.array([1000.0, -2000.0, 17.0])
+    assert np.array_equal(state.distances_to(point), state.distances_to(array))
+    assert np.array_equal(state.time_to_ball(point), state.time_to_ball(array))
+    assert state.nearest_cars(point) == state.distances_to(array).argmin()
+    ball = Vec3(*state.ball_position)
+    assert np.array_equal(state.time_to_ball(ball), state.time_to_ball())
@@ -0,0 +1,18 @@
+import time
+
+from vitamins.util import TickProfiler
+
+
+def test_reentered_section_times_each_with():
+    profiler = TickProfiler()
+    profiler.start_tick()
+    with profiler.section("search"):
+        time.sleep(0.02)
+        with profiler.section("search"):
+            time.sleep(0.001)
+    profiler.end_tick()
+    stats = profiler.stages["search"]
+    assert stats.tick == 2
+    assert stats.summary()["max"] >= 21  # the outer `with`, not the inner one
+    assert stats.total_all >= 22
+    assert profiler.stages["tick"].tick == 1
@@ -1,15 +1,28 @@
 """geometry.py -- like it says
 """
+import heapq
 import math
 
+import numpy as np
+
+_alloc = object.__new__
+_NUMBERS = {float, int}
+
 
 class Vec3:
     """Remember that the in-match axis are left-handed.
 
     When in doubt visit the wiki: https://github.com/RLBot/RLBot/wiki/Useful-Game-Values
+
+    Vec3 is slotted and mutable. The arithmetic operators return new vectors, while
+    the in-place operators (`+=`, `-=`, `*=`, `/=`) and the `i`-prefixed methods
+    modify the vector they are called on, which avoids allocations in hot loops.
+    Be careful with in-place operations on vectors you don't own, e.g. `car.velocity`.
     """
 
-    def __init__(self, x: object = 0, y: object = 0, z: object = 0) -> object:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x: object = 0, y: object = 0, z: object = 0):
         """ Create a new Vec3. The x component can alternatively be another vector with
         an x, y, and z component, in which case the created vector is a copy of the
         given vector and the y and z parameter is ignored. Examples:
@@ -18,31 +31,64 @@ class Vec3:
 
         b = Vec3(a)
         """
-
-        if hasattr(x, "x"):
-            # We have been given a vector. Copy it
-            self.x = float(x.x)
-            self.y = float(x.y) if hasattr(x, "y") else 0
-            self.z = float(x.z) if hasattr(x, "z") else 0
-        else:
+        if type(x) in _NUMBERS or not hasattr(x, "x"):
             self.x = float(x)
             self.y = float(y)
             self.z = float(z)
+        else:
+            # We have been given a vector. Copy it
+            self.x = float(x.x)
+            self.y = float(x.y) if hasattr(x, "y") else 0.0
+            self.z = float(x.z) if hasattr(x, "z") else 0.0
+
+    @classmethod
+    def _new(cls, x: float, y: float, z: float) -> "Vec3":
+        """Fast constructor: no type checks or conversions. Only use with floats."""
+        v = _alloc(Vec3)
+        v.x = x
+        v.y = y
+        v.z = z
+        return v
 
     def __getitem__(self, item: int) -> float:
         return (self.x, self.y, self.z)[item]
 
+    def __iter__(self):
+        yield self.x
+        yield self.y
+        yield self.z
+
     def __add__(self, other: "Vec3") -> "Vec3":
-        return Vec3(self.x + other.x, self.y + other.y, self.z + other.z)
+        if type(other) is not Vec3 and isinstance(other, (Vec3Array, np.ndarray)):
+            return NotImplemented  # they handle it
+        v = _alloc(Vec3)
+        v.x = self.x + other.x
+        v.y = self.y + other.y
+        v.z = self.z + other.z
+        return v
 
     def __sub__(self, other: "Vec3") -> "Vec3":
-        return Vec3(self.x - other.x, self.y - other.y, self.z - other.z)
+        if type(other) is not Vec3 and isinstance(other, (Vec3Array, np.ndarray)):
+            return NotImplemented  # they handle it
+        v = _alloc(Vec3)
+        v.x = self.x - other.x
+        v.y = self.y - other.y
+        v.z = self.z - other.z
+        return v
 
     def __neg__(self):
-        return Vec3(-self.x, -self.y, -self.z)
+        v = _alloc(Vec3)
+        v.x = -self.x
+        v.y = -self.y
+        v.z = -self.z
+        return v
 
     def __mul__(self, scale: float) -> "Vec3":
-        return Vec3(self.x * scale, self.y * scale, self.z * scale)
+        v = _alloc(Vec3)
+        v.x = self.x * scale
+        v.y = self.y * scale
+        v.z = self.z * scale
+        return v
 
     def __rmul__(self, scale: float) -> "Vec3":
         return self * scale
@@ -51,6 +97,83 @@ class Vec3:
         scale = 1 / float(scale)
         return self * scale
 
+    def __iadd__(self, other: "Vec3") -> "Vec3":
+        if type(other) is not Vec3 and isinstance(other, (Vec3Array, np.ndarray)):
+            return NotImplemented
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        return self
+
+    def __isub__(self, other: "Vec3") -> "Vec3":
+        if type(other) is not Vec3 and isinstance(other, (Vec3Array, np.ndarray)):
+            return NotImplemented
+        self.x -= other.x
+        self.y -= other.y
+        self.z -= other.z
+        return self
+
+    def __imul__(self, scale: float) -> "Vec3":
+        self.x *= scale
+        self.y *= scale
+        self.z *= scale
+        return self
+
+    def __itruediv__(self, scale: float) -> "Vec3":
+        scale = 1 / float(scale)
+        self.x *= scale
+        self.y *= scale
+        self.z *= scale
+        return self
+
+    def set(self, x: float, y: float, z: float) -> "Vec3":
+        """Overwrite the components of this vector in place."""
+        self.x = x
+        self.y = y
+        self.z = z
+        return self
+
+    def assign(self, other: "Vec3") -> "Vec3":
+        """Copy the components of `other` (anything with x, y and z) into this one."""
+        self.x = float(other.x)
+        self.y = float(other.y)
+        self.z = float(other.z)
+        return self
+
+    def iadd_scaled(self, other: "Vec3", scale: float) -> "Vec3":
+        """In-place `self += scale * other`, without the temporary vector."""
+        self.x += scale * other.x
+        self.y += scale * other.y
+        self.z += scale * other.z
+        return self
+
+    def isub_scaled(self, other: "Vec3", scale: float) -> "Vec3":
+        """In-place `self -= scale * other`, without the temporary vector."""
+        self.x -= scale * other.x
+        self.y -= scale * other.y
+        self.z -= scale * other.z
+        return self
+
+    def ilerp(self, other: "Vec3", t: float) -> "Vec3":
+        """In-place version of `lerp`."""
+        self.x += t * (other.x - self.x)
+        self.y += t * (other.y - self.y)
+        self.z += t * (other.z - self.z)
+        return self
+
+    def inormalize(self) -> "Vec3":
+        """In-place version of `normalized`."""
+        scale = 1 / math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+        self.x *= scale
+        self.y *= scale
+        self.z *= scale
+        return self
+
+    def iflat(self) -> "Vec3":
+        """In-place version of `flat`."""
+        self.z = 0.0
+        return self
+
     def __str__(self):
         return "Vec3(" + str(self.x) + ", " + str(self.y) + ", " + str(self.z) + ")"
 
@@ -61,11 +184,11 @@ class Vec3:
         """Returns a new Vec3 that equals this Vec3 but projected onto the ground plane.
         I.e. where z=0.
         """
-        return Vec3(self.x, self.y, 0)
+        return Vec3._new(self.x, self.y, 0.0)
 
     def length(self) -> float:
         """Returns the length of the vector. Also called magnitude and norm."""
-        return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
 
     def to(self, other: "Vec3") -> "Vec3":
         return other - self
@@ -73,11 +196,15 @@ class Vec3:
     def dist(self, other: "Vec3") -> float:
         """Returns the distance between this vector and another vector using pythagoras.
         """
-        return (self - other).length()
+        dx = self.x - other.x
+        dy = self.y - other.y
+        dz = self.z - other.z
+        return math.sqrt(dx * dx + dy * dy + dz * dz)
 
     def normalized(self) -> "Vec3":
         """Returns a vector with the same direction but a length of one."""
-        return self / self.length()
+        scale = 1 / self.length()
+        return Vec3._new(self.x * scale, self.y * scale, self.z * scale)
 
     def rescale(self, new_len: float) -> "Vec3":
         """Returns a vector with the same direction but a different length."""
@@ -93,7 +220,7 @@ class Vec3:
 
     def cross(self, other: "Vec3") -> "Vec3":
         """Returns the cross product."""
-        return Vec3(
+        return Vec3._new(
             self.y * other.z - self.z * other.y,
             self.z * other.x - self.x * other.z,
             self.x * other.y - self.y * other.x,
@@ -109,8 +236,8 @@ class Vec3:
         return angle_diff(math.atan2(-self.x, self.y), math.atan2(-other.x, other.y))
 
     def proj(self, other: "Vec3") -> "Vec3":
-        other_dir = other.normalized()
-        return self.dot(other_dir) * other_dir
+        scale = self.dot(other) / other.dot(other)
+        return Vec3._new(other.x * scale, other.y * scale, other.z * scale)
 
     def decompose(self, other: "Vec3") -> ("Vec3", "Vec3"):
         other_dir = other.normalized()
@@ -120,15 +247,18 @@ class Vec3:
 
     def lerp(self, other: "Vec3", t: float) -> "Vec3":
         """Linearly interpolate beween self and `other`."""
-        return self + t * (self.to(other))
+        return Vec3._new(
+            self.x + t * (other.x - self.x),
+            self.y + t * (other.y - self.y),
+            self.z + t * (other.z - self.z),
+        )
 
     def midpoint(self, other: "Vec3") -> "Vec3":
         return self.lerp(other, 1 / 2)
 
     def nearest(self, *others: "Vec3", n=1):
         """Return the 'n' nearest vectors from `others`."""
-        dists = [(self.dist(v), v) for v in others]
-        return [pair[1] for pair in sorted(dists)[:n]]
+        return heapq.nsmallest(n, others, key=self.dist)
 
     def offline(self, other: "Vec3") -> float:
         """Return the distance from `other` to the closest point on the line parallel
@@ -137,21 +267,268 @@ class Vec3:
         return (self - self.proj(other)).length()
 
 
+def _as_array(vec) -> np.ndarray:
+    """Coerce a Vec3, Vec3Array or array-like into something numpy can broadcast."""
+    if isinstance(vec, Vec3Array):
+        return vec.data
+    if hasattr(vec, "x"):
+        return np.array((vec.x, vec.y, vec.z))
+    return np.asarray(vec, dtype=float)
+
+
+class Vec3Array:
+    """An N x 3 float64 array of vectors, with the same API as Vec3 but vectorized.
+
+    Methods that return a scalar for Vec3 return an array of length N here, and
+    methods that return a Vec3 return a Vec3Array. The `other` argument can be a
+    single Vec3 (broadcast against every row) or another Vec3Array of the same length.
+    Example:
+
+    targets = Vec3Array.from_vecs(candidates)
+    dists = targets.dist(car)
+    best = candidates[dists.argmin()]
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data=()):
+        self.data = np.asarray(data, dtype=np.float64).reshape(-1, 3)
+
+    @classmethod
+    def _wrap(cls, data: np.ndarray) -> "Vec3Array":
+        arr = _alloc(Vec3Array)
+        arr.data = data
+        return arr
+
+    @classmethod
+    def from_vecs(cls, vecs) -> "Vec3Array":
+        """Build from any iterable of objects with x, y and z (Vec3, ctypes Vector3)."""
+        vecs = list(vecs)
+        data = np.fromiter(
+            (c for v in vecs for c in (v.x, v.y, v.z)), np.float64, 3 * len(vecs)
+        )
+        return cls._wrap(data.reshape(-1, 3))
+
+    @classmethod
+    def zeros(cls, n: int) -> "Vec3Array":
+        return cls._wrap(np.zeros((n, 3)))
+
+    def to_vecs(self) -> ["Vec3"]:
+        return [Vec3._new(x, y, z) for x, y, z in self.data.tolist()]
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @property
+    def z(self) -> np.ndarray:
+        return self.data[:, 2]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, item):
+        """An integer index returns a Vec3, anything else (slice, mask, index array)
+        returns a Vec3Array."""
+        if isinstance(item, (int, np.integer)):
+            x, y, z = self.data[item].tolist()
+            return Vec3._new(x, y, z)
+        return Vec3Array._wrap(self.data[item])
+
+    def __iter__(self):
+        return iter(self.to_vecs())
+
+    def __str__(self):
+        return f"Vec3Array({len(self)})"
+
+    def __repr__(self):
+        return f"Vec3Array({self.data!r})"
+
+    def __add__(self, other) -> "Vec3Array":
+        return Vec3Array._wrap(self.data + _as_array(other))
+
+    def __radd__(self, other) -> "Vec3Array":
+        return Vec3Array._wrap(_as_array(other) + self.data)
+
+    def __sub__(self, other) -> "Vec3Array":
+        return Vec3Array._wrap(self.data - _as_array(other))
+
+    def __rsub__(self, other) -> "Vec3Array":
+        return Vec3Array._wrap(_as_array(other) - self.data)
+
+    def __neg__(self) -> "Vec3Array":
+        return Vec3Array._wrap(-self.data)
+
+    def __mul__(self, scale) -> "Vec3Array":
+        """Scale by a number, or row by row with an array of length N."""
+        scale = np.asarray(scale, dtype=np.float64)
+        if scale.ndim == 1:
+            scale = scale[:, None]
+        return Vec3Array._wrap(self.data * scale)
+
+    def __rmul__(self, scale) -> "Vec3Array":
+        return self * scale
+
+    def __truediv__(self, scale) -> "Vec3Array":
+        return self * (1 / np.asarray(scale, dtype=np.float64))
+
+    def __iadd__(self, other) -> "Vec3Array":
+        self.data += _as_array(other)
+        return self
+
+    def __isub__(self, other) -> "Vec3Array":
+        self.data -= _as_array(other)
+        return self
+
+    def __imul__(self, scale) -> "Vec3Array":
+        scale = np.asarray(scale, dtype=np.float64)
+        self.data *= scale[:, None] if scale.ndim == 1 else scale
+        return self
+
+    def flat(self) -> "Vec3Array":
+        data = self.data.copy()
+        data[:, 2] = 0
+        return Vec3Array._wrap(data)
+
+    def length(self) -> np.ndarray:
+        return np.sqrt(np.einsum("ij,ij->i", self.data, self.data))
+
+    def to(self, other) -> "Vec3Array":
+        return Vec3Array._wrap(_as_array(other) - self.data)
+
+    def dist(self, other) -> np.ndarray:
+        diff = self.data - _as_array(other)
+        return np.sqrt(np.einsum("ij,ij->i", diff, diff))
+
+    def normalized(self) -> "Vec3Array":
+        return Vec3Array._wrap(self.data / self.length()[:, None])
+
+    def rescale(self, new_len) -> "Vec3Array":
+        return self.normalized() * new_len
+
+    def dot(self, other) -> np.ndarray:
+        other = _as_array(other)
+        if other.ndim == 1:
+            return self.data @ other
+        return np.einsum("ij,ij->i", self.data, other)
+
+    def ndot(self, other) -> np.ndarray:
+        other = _as_array(other)
+        other = other / np.linalg.norm(other, axis=-1, keepdims=True)
+        return self.normalized().dot(other)
+
+    def cross(self, other) -> "Vec3Array":
+        return Vec3Array._wrap(np.cross(self.data, _as_array(other)))
+
+    def ang_to(self, ideal) -> np.ndarray:
+        ideal = Vec3Array(np.broadcast_to(_as_array(ideal), self.data.shape))
+        cos_ang = self.dot(ideal) / (self.length() * ideal.length())
+        return np.arccos(np.clip(cos_ang, -1, 1))
+
+    def yaw_to(self, other) -> np.ndarray:
+        other = _as_array(other)
+        return angle_diff(
+            np.arctan2(-self.data[:, 0], self.data[:, 1]),
+            np.arctan2(-other[..., 0], other[..., 1]),
+        )
+
+    def proj(self, other) -> "Vec3Array":
+        other = np.broadcast_to(_as_array(other), self.data.shape)
+        scale = np.einsum("ij,ij->i", self.data, other)
+        scale /= np.einsum("ij,ij->i", other, other)
+        return Vec3Array._wrap(other * scale[:, None])
+
+    def decompose(self, other) -> ("Vec3Array", "Vec3Array"):
+        proj = self.proj(other)
+        return proj, Vec3Array._wrap(self.data - proj.data)
+
+    def lerp(self, other, t) -> "Vec3Array":
+        t = np.asarray(t, dtype=np.float64)
+        if t.ndim == 1:
+            t = t[:, None]
+        return Vec3Array._wrap(self.data + t * (_as_array(other) - self.data))
+
+    def midpoint(self, other) -> "Vec3Array":
+        return self.lerp(other, 1 / 2)
+
+    def nearest_indices(self, point, n: int = 1) -> np.ndarray:
+        """Indices of the `n` rows nearest to `point`, nearest first."""
+        dists = self.dist(point)
+        if n < len(dists):
+            part = np.argpartition(dists, n)[:n]
+        else:
+            part = np.arange(len(dists))
+        return part[np.argsort(dists[part])]
+
+    def nearest(self, point, n: int = 1) -> "Vec3Array":
+        """The `n` rows nearest to `point`, nearest first."""
+        return self[self.nearest_indices(point, n)]
+
+    def offline(self, other) -> np.ndarray:
+        return (self - self.proj(other)).length()
+
+
 class Orientation:
     """
     This class describes the orientation of an object from the rotation of the object.
     Use this to find the direction of cars: forward, right, up.
     It can also be used to find relative locations.
+
+    The basis vectors and the rotation matrix are computed the first time they are
+    used, and then cached until the rotation changes.
     """
 
+    __slots__ = ("yaw", "roll", "pitch", "_forward", "_right", "_up", "_matrix")
+
     def __init__(self, rotation):
+        self.set_rotation(rotation)
+
+    @classmethod
+    def from_arrays(cls, pitch, yaw, roll) -> ["Orientation"]:
+        """Create many orientations at once. The rotation matrices for all of them are
+        computed in a single vectorized call (see `rotation_matrices`)."""
+        matrices = rotation_matrices(pitch, yaw, roll)
+        angles = zip(*(np.ravel(a).tolist() for a in (pitch, yaw, roll)))
+        orientations = []
+        for (p, y, r), matrix in zip(angles, matrices):
+            orientation = _alloc(Orientation)
+            orientation.pitch, orientation.yaw, orientation.roll = p, y, r
+            orientation._forward = orientation._right = orientation._up = None
+            orientation._matrix = matrix
+            orientations.append(orientation)
+        return orientations
+
+    def set_rotation(self, rotation):
+        """Change the rotation in place, from a Vec3 (yaw, roll, pitch) or anything with
+        yaw, roll and pitch attributes (e.g. a ctypes Rotator)."""
         if isinstance(rotation, Vec3):
             self.yaw, self.roll, self.pitch = rotation
         else:
             self.yaw = float(rotation.yaw)
             self.roll = float(rotation.roll)
             self.pitch = float(rotation.pitch)
-
+        self._forward = self._right = self._up = None
+        self._matrix = None
+
+    def set_angles(self, pitch: float, yaw: float, roll: float):
+        """Change the rotation in place, from plain angles."""
+        self.pitch = pitch
+        self.yaw = yaw
+        self.roll = roll
+        self._forward = self._right = self._up = None
+        self._matrix = None
+
+    def _compute_basis(self):
+        if self._matrix is not None:
+            (fx, rx, ux), (fy, ry, uy), (fz, rz, uz) = self._matrix.tolist()
+            self._forward = Vec3._new(fx, fy, fz)
+            self._right = Vec3._new(rx, ry, rz)
+            self._up = Vec3._new(ux, uy, uz)
+            return
         cr = math.cos(self.roll)
         sr = math.sin(self.roll)
         cp = math.cos(self.pitch)
@@ -159,15 +536,150 @@ class Orientation:
         cy = math.cos(self.yaw)
         sy = math.sin(self.yaw)
 
-        self.forward: Vec3 = Vec3(cp * cy, cp * sy, sp)
-        self.right: Vec3 = Vec3(
+        self._forward = Vec3._new(cp * cy, cp * sy, sp)
+        self._right = Vec3._new(
             cy * sp * sr - cr * sy, sy * sp * sr + cr * cy, -cp * sr
         )
-        self.up: Vec3 = Vec3(-cr * cy * sp - sr * sy, -cr * sy * sp + sr * cy, cp * cr)
+        self._up = Vec3._new(-cr * cy * sp - sr * sy, -cr * sy * sp + sr * cy, cp * cr)
+
+    @property
+    def forward(self) -> Vec3:
+        if self._forward is None:
+            self._compute_basis()
+        return self._forward
+
+    @forward.setter
+    def forward(self, value: Vec3):
+        if self._forward is None:
+            self._compute_basis()
+        self._forward = value
+        self._matrix = None
+
+    @property
+    def right(self) -> Vec3:
+        if self._right is None:
+            self._compute_basis()
+        return self._right
+
+    @right.setter
+    def right(self, value: Vec3):
+        if self._right is None:
+            self._compute_basis()
+        self._right = value
+        self._matrix = None
+
+    @property
+    def up(self) -> Vec3:
+        if self._up is None:
+            self._compute_basis()
+        return self._up
+
+    @up.setter
+    def up(self, value: Vec3):
+        if self._up is None:
+            self._compute_basis()
+        self._up = value
+        self._matrix = None
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """3x3 rotation matrix. Its columns are the forward, right and up vectors, so
+        `matrix @ local` is in world coordinates."""
+        if self._matrix is None:
+            f, r, u = self.forward, self.right, self.up
+            self._matrix = np.array(
+                [[f.x, r.x, u.x], [f.y, r.y, u.y], [f.z, r.z, u.z]]
+            )
+        return self._matrix
+
+    def to_local(self, vec):
+        """Express a world-space direction in local (forward, right, up) components.
+        Accepts a Vec3, a Vec3Array, or an (N, 3) array."""
+        if isinstance(vec, Vec3):
+            f, r, u = self.forward, self.right, self.up
+            return Vec3._new(vec.dot(f), vec.dot(r), vec.dot(u))
+        if isinstance(vec, Vec3Array):
+            return Vec3Array._wrap(vec.data @ self.matrix)
+        return np.asarray(vec) @ self.matrix
+
+    def to_world(self, vec):
+        """Inverse of `to_local`: turn (forward, right, up) components into a
+        world-space direction."""
+        if isinstance(vec, Vec3):
+            f, r, u = self.forward, self.right, self.up
+            return Vec3._new(
+                vec.x * f.x + vec.y * r.x + vec.z * u.x,
+                vec.x * f.y + vec.y * r.y + vec.z * u.y,
+                vec.x * f.z + vec.y * r.z + vec.z * u.z,
+            )
+        if isinstance(vec, Vec3Array):
+            return Vec3Array._wrap(vec.data @ self.matrix.T)
+        return np.asarray(vec) @ self.matrix.T
+
+
+def rotation_matrices(pitch, yaw, roll) -> np.ndarray:
+    """Rotation matrices for arrays of angles, as an (N, 3, 3) array. Each matrix has
+    the same layout as `Orientation.matrix`."""
+    angles = np.array([np.ravel(pitch), np.ravel(yaw), np.ravel(roll)], np.float64)
+    (cp, cy, cr), (sp, sy, sr) = np.cos(angles), np.sin(angles)
+    # Work on the x and y rows of all three basis vectors at once:
+    yaw_dir = np.array([cy, sy])
+    yaw_perp = np.array([-sy, cy])
+    matrices = np.empty((angles.shape[1], 3, 3))
+    matrices[:, :2, 0] = (yaw_dir * cp).T
+    matrices[:, :2, 1] = (yaw_dir * (sp * sr) + yaw_perp * cr).T
+    matrices[:, :2, 2] = (yaw_perp * sr - yaw_dir * (sp * cr)).T
+    matrices[:, 2, 0] = sp
+    matrices[:, 2, 1] = -cp * sr
+    matrices[:, 2, 2] = cp * cr
+    return matrices
+
+
+def spin_matrix(angular_velocity, dt: float) -> np.ndarray:
+    """3x3 matrix of the rotation made by spinning at `angular_velocity` (a Vec3, in
+    rad/s) for `dt` seconds. `spin_matrix(w, dt) @ o.matrix` is the orientation
+    `dt` seconds later."""
+    x, y, z = angular_velocity
+    rate = math.sqrt(x * x + y * y + z * z)
+    if rate * abs(dt) < 1e-9:
+        return np.identity(3)
+    x, y, z = x / rate, y / rate, z / rate
+    s, c = math.sin(rate * dt), math.cos(rate * dt)
+    t = 1 - c
+    return np.array(
+        [
+            [t * x * x + c, t * x * y - s * z, t * x * z + s * y],
+            [t * x * y + s * z, t * y * y + c, t * y * z - s * x],
+            [t * x * z - s * y, t * y * z + s * x, t * z * z + c],
+        ]
+    )
+
+
+def spin_matrices(angular_velocities: np.ndarray, dt) -> np.ndarray:
+    """Vectorized `spin_matrix`, for an (N, 3) array of angular velocities. `dt` may
+    be a scalar or an (N,) array. Returns an (N, 3, 3) array."""
+    rotvec = np.asarray(angular_velocities, np.float64) * np.reshape(dt, (-1, 1))
+    angle = np.linalg.norm(rotvec, axis=1)
+    axis = rotvec / np.maximum(angle, 1e-12)[:, None]
+    s, c = np.sin(angle), np.cos(angle)
+    # Rodrigues: R = I + sin * K + (1 - cos) * K^2, with K the cross-product matrix
+    skew = np.zeros((len(axis), 3, 3))
+    skew[:, 0, 1], skew[:, 0, 2] = -axis[:, 2], axis[:, 1]
+    skew[:, 1, 0], skew[:, 1, 2] = axis[:, 2], -axis[:, 0]
+    skew[:, 2, 0], skew[:, 2, 1] = -axis[:, 1], axis[:, 0]
+    return (
+        np.identity(3)
+        + s[:, None, None] * skew
+        + (1 - c)[:, None, None] * (skew @ skew)
+    )
 
 
 def angle_diff(a1: float, a2: float) -> float:
+    """Signed difference a2 - a1, wrapped to [-pi, pi]. Also works on arrays."""
     diff = a2 - a1
+    if isinstance(diff, np.ndarray):
+        wrap = np.abs(diff) > math.pi
+        return diff - np.where(wrap, np.copysign(2 * math.pi, diff), 0.0)
     if abs(diff) > math.pi:
         if diff < 0:
             diff += 2 * math.pi
@@ -184,12 +696,15 @@ class Line:
         self.dir = dir.flat().normalized()
 
     def offset(self, loc: Vec3) -> Vec3:
-        """Returns the shortest vector from `loc` to a point on the Line."""
+        """Returns the shortest vector from `loc` to a point on the Line. `loc` may
+        also be a Vec3Array, in which case a Vec3Array of offsets is returned.
+        """
         _, perp = loc.flat().to(self.pos).decompose(self.dir)
         return perp
 
     def nearest_point(self, loc: Vec3) -> Vec3:
-        """Return the nearest point on this line to the given point."""
+        """Return the nearest point on this line to the given point (or points, for a
+        Vec3Array)."""
         return loc + self.offset(loc)
 
     def intersection(self, other: "Line") -> Vec3:
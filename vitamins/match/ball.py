@@ -1,7 +1,15 @@
+import numpy as np
 from rlbot.utils.structures.game_data_struct import GameTickPacket, Touch
 
-from vitamins.geometry import Vec3
+from vitamins.geometry import Orientation, Vec3
 from vitamins.match.base import OrientedObject
+from vitamins.match.structs import (
+    ANGULAR_VELOCITY_COLUMN as AV,
+    LOCATION_COLUMN as LOC,
+    TIME_COLUMN,
+    VELOCITY_COLUMN as VEL,
+    slice_table,
+)
 
 
 class Ball(OrientedObject):
@@ -17,15 +25,14 @@ class Ball(OrientedObject):
         self.velocity: Vec3 = Vec3()
         self.angular_velocity = Vec3()
         self.time = time
-        self.update(packet, phys)
+        if packet is not None or phys is not None:
+            self.update(packet, phys)
 
     def update(self, packet=None, phys=None):
         if packet is not None:
             self.latest_touch = packet.game_ball.latest_touch
             phys = packet.game_ball.physics
-        self.position = Vec3(phys.location)
-        self.velocity = Vec3(phys.velocity)
-        self.angular_velocity = Vec3(phys.angular_velocity)
+        self.update_physics(phys)
 
     def is_rolling(self):
         return self.z < 95 and abs(self.velocity.z) < 1
@@ -74,13 +81,102 @@ class TheBall(Ball):
         self.position = bot.field.center + 5000 * dir + Vec3(z=500)
         self.reset(bot)
 
-    def get_bounces(self) -> [Ball]:
-        bounces = []
-        for i, dv in self.bounces:
-            b = Ball(
-                phys=self.prediction.slices[i].physics,
-                time=self.prediction.slices[i].game_seconds,
-            )
-            b.dv = dv
-            bounces.append(b)
-        return bounces
+    def get_bounces(self) -> ["BallSliceView"]:
+        table = slice_table(self.prediction)
+        return [BallSliceView(table, i, dv) for i, dv in self.bounces]
+
+
+class BallSliceView(Vec3):
+    """Read-only view of the ball at one slice of a ball prediction.
+
+    Nothing is copied when the view is created: the values are read from the
+    prediction table (see `vitamins.match.structs.slice_table`) when they are asked
+    for. It has the read-only parts of the Ball interface, and since it is a Vec3 of
+    the ball's location it can be used in vector math like a Ball can. Like a Ball's,
+    its orientation is the identity; the predictions don't include the rotation.
+    """
+
+    __slots__ = ("_table", "_index", "dv")
+    radius: float = Ball.radius
+    orientation = Orientation(Vec3())
+
+    # The read-only OrientedObject interface, which only needs the above:
+    up = OrientedObject.up
+    down = OrientedObject.down
+    left = OrientedObject.left
+    right = OrientedObject.right
+    forward = OrientedObject.forward
+    backward = OrientedObject.backward
+    yaw = OrientedObject.yaw
+    pitch = OrientedObject.pitch
+    roll = OrientedObject.roll
+    yaw_rate = OrientedObject.yaw_rate
+    pitch_rate = OrientedObject.pitch_rate
+    roll_rate = OrientedObject.roll_rate
+    yaw_to = OrientedObject.yaw_to
+
+    def __init__(self, table: np.ndarray, index: int, dv: Vec3 = None):
+        self._table = table
+        self._index = index
+        self.dv = dv
+
+    def __str__(self):
+        return f"BallSliceView({self.x}, {self.y}, {self.z}, time={self.time})"
+
+    @property
+    def x(self) -> float:
+        return self._table.item(self._index, LOC)
+
+    @property
+    def y(self) -> float:
+        return self._table.item(self._index, LOC + 1)
+
+    @property
+    def z(self) -> float:
+        return self._table.item(self._index, LOC + 2)
+
+    @property
+    def time(self) -> float:
+        return self._table.item(self._index, TIME_COLUMN)
+
+    @property
+    def index(self) -> int:
+        """Index of the slice in the prediction."""
+        return self._index
+
+    def _vec(self, column: int) -> Vec3:
+        item, i = self._table.item, self._index
+        return Vec3._new(item(i, column), item(i, column + 1), item(i, column + 2))
+
+    @property
+    def position(self) -> Vec3:
+        return self._vec(LOC)
+
+    @property
+    def velocity(self) -> Vec3:
+        return self._vec(VEL)
+
+    @property
+    def angular_velocity(self) -> Vec3:
+        return self._vec(AV)
+
+    @property
+    def speed(self) -> float:
+        return self.velocity.length()
+
+    @property
+    def direction(self) -> Vec3:
+        return self.velocity.normalized()
+
+    def relative_velocity(self, other: Vec3) -> Vec3:
+        if hasattr(other, "velocity"):
+            return self.velocity - other.velocity
+        else:
+            return self.velocity
+
+    def speed_toward(self, other) -> float:
+        """Closing speed (positive=approaching, negative=away)."""
+        return self.relative_velocity(other).dot(self.to(other).normalized())
+
+    def is_rolling(self):
+        return self.z < 95 and abs(self._table.item(self._index, VEL + 2)) < 1
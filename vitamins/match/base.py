@@ -110,6 +110,26 @@ class OrientedObject(Location):
     def roll_rate(self)->float:
         return self.angular_velocity.dot(-self.orientation.forward)
 
+    def update_physics(self, physics):
+        """Copy location, velocity and angular velocity from a ctypes Physics struct
+        into this object, in place."""
+        location = physics.location
+        self.x = location.x
+        self.y = location.y
+        self.z = location.z
+        self.velocity.assign(physics.velocity)
+        self.angular_velocity.assign(physics.angular_velocity)
+
+    def update_physics_row(self, row):
+        """Like `update_physics`, but from a sequence of PHYSICS_FLOATS floats (see
+        `vitamins.match.structs.player_table`). The rotation is ignored."""
+        x, y, z, _, _, _, vx, vy, vz, wx, wy, wz = row
+        self.x = x
+        self.y = y
+        self.z = z
+        self.velocity.set(vx, vy, vz)
+        self.angular_velocity.set(wx, wy, wz)
+
     def yaw_to(self, other: Vec3)->float:
         """Returns the yaw angle from the object's forward vector to the given location
         (projected onto the object's horizontal plane).
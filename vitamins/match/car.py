@@ -3,7 +3,7 @@ from rlbot.utils.structures.game_data_struct import GameTickPacket, PlayerInfo
 
 from vitamins.match.base import OrientedObject
 from vitamins.match.hitbox import Hitbox
-from vitamins.geometry import Vec3, Orientation
+from vitamins.match.structs import PHYSICS_FLOATS, player_table
 
 
 class Car(OrientedObject):
@@ -40,10 +40,11 @@ class Car(OrientedObject):
     def is_bot(self):
         return self.car_info.is_bot
 
-    def update(self, packet: GameTickPacket):
+    def update(self, packet: GameTickPacket, physics: list = None):
+        """Update in place from the packet. `physics` can be this car's row of
+        `player_table(packet)` as a list, if the caller already has it."""
         self.car_info = packet.game_cars[self.index]
-        physics = self.car_info.physics
-        self.position = Vec3(physics.location)
-        self.velocity = Vec3(physics.velocity)
-        self.angular_velocity = Vec3(physics.angular_velocity)
-        self.orientation = Orientation(physics.rotation)
+        if physics is None:
+            physics = player_table(packet)[self.index, :PHYSICS_FLOATS].tolist()
+        self.update_physics_row(physics)
+        self.orientation.set_angles(physics[3], physics[4], physics[5])
@@ -0,0 +1,139 @@
+"""vitamins.match.contact -- when and where the predicted ball will touch each car.
+
+Every car's hitbox is extrapolated to the time of every prediction slice, and the
+ball is tested against all of them in one batched box-vs-sphere distance call:
+
+    contacts = first_contacts(Match.current_prediction, Match.cars, Match.state)
+    contacts.time[car.index]   # game time of the first touch, or inf
+    contacts.first_car(Match.state.opponents(team))
+"""
+from collections import namedtuple
+from typing import List
+
+import numpy as np
+
+from vitamins.geometry import spin_matrices
+from vitamins.match.ball import Ball
+from vitamins.match.car import Car
+from vitamins.match.prediction import BallPredictor
+from vitamins.match.state import MatchState
+
+GRAVITY = 650
+CAR_REST_HEIGHT = 17.01  # height of the root of a car sitting on the ground
+
+
+def box_sphere_distance(centers, matrices, half_extents, spheres):
+    """Distance from sphere centers to oriented boxes (0 inside), and the point of
+    each box closest to its sphere, in the box's local coordinates relative to its
+    center (`center + matrix @ local` is the world position).
+
+    `centers` and `spheres` are (..., 3) arrays that broadcast together, and
+    `half_extents` is in local (forward, right, up) order. `matrices` (see
+    `Orientation.matrix`) is either (..., 3, 3), one per box, or, for (c, s, 3)
+    boxes, a (c, 3, 3) array holding one orientation per row of boxes. The latter
+    is much faster, because it becomes a batched matrix product.
+    """
+    offset = spheres - centers
+    if matrices.ndim == offset.ndim:
+        local = offset @ matrices
+    else:
+        local = np.einsum("...ij,...i->...j", matrices, offset)
+    closest = np.maximum(local, -half_extents)
+    np.minimum(closest, half_extents, out=closest)
+    local -= closest
+    distance = np.sqrt(np.einsum("...i,...i->...", local, local))
+    return distance, closest
+
+
+class Contacts(namedtuple("Contacts", ["time", "index", "point", "distance"])):
+    """Result of `first_contacts`, with one row per car (by packet index):
+    time: game time of the first touch, inf if none within the prediction
+    index: slice index of the first touch, -1 if none
+    point: (n, 3) closest point of the hitbox to the ball at that slice, or nan
+    distance: (n, s) ball-to-hitbox distance of every checked slice, minus the
+        ball's radius (<= 0 means touching)
+    """
+
+    def first_car(self, mask: np.ndarray = None) -> int:
+        """Index of the car (optionally among `mask`) that touches the ball first, or
+        -1 if none of them do."""
+        time = self.time if mask is None else np.where(mask, self.time, np.inf)
+        index = int(time.argmin())
+        return index if np.isfinite(time[index]) else -1
+
+
+def first_contacts(
+    predictor: BallPredictor,
+    cars: List[Car],
+    state: MatchState,
+    max_time: float = None,
+    margin: float = 0.0,
+    spin: bool = False,
+) -> Contacts:
+    """Find the first prediction slice at which the ball touches each car.
+
+    Cars are extrapolated at constant velocity from `state` (airborne cars also
+    fall, down to the ground). With `spin`, they also keep rotating at their
+    current angular velocity, which is only sensible for short horizons. Slices
+    before `state.time` or after `max_time` are skipped, and `margin` is added to
+    the ball's radius. Rows of cars that aren't in `cars` are left empty.
+    """
+    n = state.num_cars
+    start = int(predictor.times.searchsorted(state.time))
+    stop = predictor.prediction.num_slices
+    if max_time is not None:
+        stop = int(predictor.times.searchsorted(max_time, "right"))
+    times = predictor.times[start:stop].astype(np.float64)
+    balls = predictor.positions[start:stop].astype(np.float64)
+
+    time = np.full(n, np.inf)
+    index = np.full(n, -1)
+    point = np.full((n, 3), np.nan)
+    distance = np.full((n, len(times)), np.inf)
+    if len(times) == 0 or not cars:
+        return Contacts(time, index, point, distance)
+
+    rows = np.array([car.index for car in cars])
+    local_center = np.array([car.hitbox.local_center for car in cars])
+    half_extents = np.array([car.hitbox.half_extents for car in cars])
+    dt = times - state.time  # (s,)
+
+    # Root positions of every car at every slice, shape (c, s, 3):
+    positions = state.velocity[rows, None, :] * dt[:, None]
+    positions += state.position[rows, None, :]
+    airborne = ~state.has_wheel_contact[rows]
+    if airborne.any():
+        z = positions[airborne, :, 2] - 0.5 * GRAVITY * dt * dt
+        positions[airborne, :, 2] = np.maximum(z, CAR_REST_HEIGHT)
+
+    matrices = state.matrices[rows]  # (c, 3, 3)
+    if spin:
+        spins = spin_matrices(
+            np.repeat(state.angular_velocity[rows], len(dt), axis=0),
+            np.tile(dt, len(rows)),
+        ).reshape(len(rows), len(dt), 3, 3)
+        matrices = spins @ matrices[:, None]
+        centers = positions + np.einsum("csij,cj->csi", matrices, local_center)
+    else:
+        centers = positions + np.einsum("cij,cj->ci", matrices, local_center)[:, None]
+
+    dist, closest = box_sphere_distance(
+        centers, matrices, half_extents[:, None, :], balls[None, :, :]
+    )
+    dist -= Ball.radius
+    touching = dist <= margin
+    hit = touching.any(axis=1)
+    first = touching.argmax(axis=1)[hit]
+
+    distance[rows] = dist
+    hit_rows = rows[hit]
+    index[hit_rows] = start + first
+    time[hit_rows] = times[first]
+    if spin:
+        hit_matrices = matrices[hit, first]
+    else:
+        hit_matrices = matrices[hit]
+    point[hit_rows] = centers[hit, first] + np.einsum(
+        "cij,cj->ci", hit_matrices, closest[hit, first]
+    )
+    return Contacts(time, index, point, distance)
@@ -1,21 +1,207 @@
 """vitamins.match.field -- classes to represent the field and boosts."""
+from collections import namedtuple
 from typing import List
 
+import numpy as np
 from rlbot.utils.structures.game_data_struct import FieldInfoPacket, GameTickPacket
 
 from vitamins.geometry import Vec3, Orientation
 from vitamins.match.base import Location, OrientedObject
+from vitamins.match.structs import boost_states
+
+
+BoostEvent = namedtuple("BoostEvent", ["time", "index", "picked_up"])
+BoostEvent.__doc__ = """A pad changed state: picked up (picked_up=True) or respawned."""
 
 
 class BoostPickup(Location):
-    """Boost pickup. Duh."""
+    """Boost pickup. Duh. Its state is read from the BoostIndex it belongs to."""
 
     def __init__(self, location, index: int, is_big: bool):
         super().__init__(location)
         self.index = index
         self.is_big = is_big
-        self.is_ready = False
-        self.timer = 0
+        self.pads: "BoostIndex" = None  # set by the BoostIndex
+
+    @property
+    def is_ready(self) -> bool:
+        return bool(self.pads.is_ready[self.index])
+
+    @is_ready.setter
+    def is_ready(self, value: bool):
+        self.pads.set_pad(self.index, value, self.timer)
+
+    @property
+    def timer(self) -> float:
+        return float(self.pads.timer[self.index])
+
+    @timer.setter
+    def timer(self, value: float):
+        self.pads.set_pad(self.index, self.is_ready, value)
+
+    @property
+    def respawn_at(self) -> float:
+        """Predicted game time at which the pad is ready, -inf if it is ready now."""
+        return float(self.pads.respawn_at[self.index])
+
+    @respawn_at.setter
+    def respawn_at(self, value: float):
+        self.pads.respawn_at[self.index] = value
+        self.pads.version += 1
+        self.pads.sort_timeline()
+
+
+class BoostIndex:
+    """The boost pads as arrays, for distance queries about many points at once (e.g.
+    every car). Pads never move, so the locations are stored once; `refresh` copies
+    the pad states in every tick. With only a few dozen pads, comparing against all
+    of them in one vectorized step is faster than any tree or grid.
+
+    Pads rarely change state, so `refresh` also records what changed: `events` lists
+    the pickups and respawns of the latest tick, and `version` counts the ticks that
+    had any, so callers can keep their results until it moves. The predicted respawn
+    times of the waiting pads are kept sorted, for `respawns_until` and
+    `next_respawn`.
+
+    Query points are a Vec3, a (3,) array, or an (m, 3) array. Results for a single
+    point are 1-d; for many points they have one row per point.
+    """
+
+    big_respawn: float = 10
+    small_respawn: float = 4
+
+    def __init__(self, boosts: List[BoostPickup]):
+        self.boosts = boosts
+        self.positions = np.array([(b.x, b.y, b.z) for b in boosts]).reshape(-1, 3)
+        self.is_big = np.array([b.is_big for b in boosts], dtype=bool)
+        self.respawn_time = np.where(self.is_big, self.big_respawn, self.small_respawn)
+        self.is_ready = np.zeros(len(boosts), dtype=bool)
+        self.timer = np.zeros(len(boosts))
+        self.respawn_at = np.full(len(boosts), -np.inf)
+        self.time = 0.0
+        self.events: List[BoostEvent] = []
+        self.changed = False
+        self.version = 0
+        # Waiting pads, soonest respawn first:
+        self.timeline_times = np.zeros(0)
+        self.timeline_pads = np.zeros(0, dtype=int)
+        for boost in boosts:
+            boost.pads = self
+
+    def __len__(self):
+        return len(self.boosts)
+
+    def refresh(self, states: np.ndarray, time: float):
+        """Copy in the pad states (see `structs.boost_states`) at game time `time`,
+        and record the pads that were picked up or respawned since the last call.
+        The first call, and any call with an earlier `time` (a new match or a
+        replay), takes the states as they are, without events."""
+        reset = self.version == 0 or time < self.time
+        self.time = time
+        self.timer[:] = states["timer"]
+        if reset:
+            flipped = np.ones(len(self), dtype=bool)
+        else:
+            flipped = self.is_ready != states["is_active"]
+            if not flipped.any():
+                self.events = []
+                self.changed = False
+                return
+        self.is_ready[:] = states["is_active"]
+        indices = flipped.nonzero()[0]
+        picked_up = ~self.is_ready[indices]
+        if reset:
+            self.events = []
+        else:
+            self.events = [
+                BoostEvent(time, i, p)
+                for i, p in zip(indices.tolist(), picked_up.tolist())
+            ]
+        self.changed = True
+        self.version += 1
+        waiting = indices[picked_up]
+        self.respawn_at[indices[~picked_up]] = -np.inf
+        self.respawn_at[waiting] = time - self.timer[waiting]
+        self.respawn_at[waiting] += self.respawn_time[waiting]
+        self.sort_timeline()
+
+    def set_pad(self, index: int, is_ready: bool, timer: float):
+        """Overwrite the state of one pad, e.g. to plan with a pad taken. Its
+        respawn time is predicted as in `refresh`, without events."""
+        self.is_ready[index] = is_ready
+        self.timer[index] = timer
+        if is_ready:
+            self.respawn_at[index] = -np.inf
+        else:
+            self.respawn_at[index] = self.time - timer + self.respawn_time[index]
+        self.version += 1
+        self.sort_timeline()
+
+    def sort_timeline(self):
+        """Sort the waiting pads by predicted respawn time."""
+        pads = (~self.is_ready).nonzero()[0]
+        order = self.respawn_at[pads].argsort(kind="stable")
+        self.timeline_pads = pads[order]
+        self.timeline_times = self.respawn_at[self.timeline_pads]
+
+    def respawns_until(self, time: float) -> np.ndarray:
+        """Indices of the waiting pads predicted to be ready by game time `time`,
+        soonest first."""
+        return self.timeline_pads[: self.timeline_times.searchsorted(time, "right")]
+
+    def next_respawn(self):
+        """(game time, index) of the next pad to respawn, or (inf, -1) if all are
+        ready."""
+        if len(self.timeline_pads) == 0:
+            return np.inf, -1
+        return float(self.timeline_times[0]), int(self.timeline_pads[0])
+
+    def ready_in(self) -> np.ndarray:
+        """Seconds until each pad is ready, 0 for pads that are ready now."""
+        return np.maximum(self.respawn_at - self.time, 0)
+
+    def distances(self, points) -> np.ndarray:
+        """Distance from the point(s) to every pad: (n,) or (m, n)."""
+        if isinstance(points, Vec3):
+            points = (points.x, points.y, points.z)
+        points = np.asarray(points, dtype=float)
+        offset = self.positions - points[..., None, :]
+        return np.sqrt(np.einsum("...i,...i->...", offset, offset))
+
+    def nearest(self, points, k: int = 1, mask: np.ndarray = None) -> np.ndarray:
+        """Indices of the `k` nearest pads to the point(s), nearest first, optionally
+        only among the pads in the boolean `mask`."""
+        dist = self.distances(points)
+        if mask is not None:
+            dist = np.where(mask, dist, np.inf)
+        k = min(k, len(self))
+        if k < len(self):
+            part = np.argpartition(dist, k - 1, axis=-1)[..., :k]
+        else:
+            part = np.broadcast_to(np.arange(len(self)), dist.shape)
+        order = np.take_along_axis(dist, part, axis=-1).argsort(axis=-1)
+        return np.take_along_axis(part, order, axis=-1)
+
+    def within(self, points, radius: float) -> np.ndarray:
+        """Boolean mask of the pads within `radius` of the point(s)."""
+        return self.distances(points) <= radius
+
+    def nearest_ready(self, points, dt=0.0, big: bool = None) -> np.ndarray:
+        """Index of the nearest pad to the point(s) that will be ready within `dt`
+        seconds (a number, or one per point), or -1 if there is none. With `big`,
+        only big (True) or small (False) pads are considered."""
+        dist = self.distances(points)
+        ready = self.ready_in() <= np.asarray(dt, dtype=float)[..., None]
+        if big is not None:
+            ready &= self.is_big == big
+        dist = np.where(ready, dist, np.inf)
+        index = dist.argmin(axis=-1)
+        found = np.take_along_axis(dist, np.expand_dims(index, -1), -1)[..., 0]
+        return np.where(np.isfinite(found), index, -1)
+
+    def pickups(self, indices) -> List[BoostPickup]:
+        """The BoostPickup objects for an array of indices (-1 is skipped)."""
+        return [self.boosts[i] for i in np.ravel(indices).tolist() if i >= 0]
 
 
 class Field(OrientedObject):
@@ -24,6 +210,7 @@ class Field(OrientedObject):
     to_side_wall = 4096
     to_end_wall = 5120
     to_ceiling = 2044
+    to_corner = 5702  # distance from center to the diagonal corner walls
     goal_height = 642.775
     goal_width = 2 * 892.755
     own_goal_center: Location
@@ -33,6 +220,7 @@ class Field(OrientedObject):
     opp_left_post: Location
     opp_right_post: Location
     boosts: List[BoostPickup]
+    boost_index: BoostIndex
     big_boosts: List[BoostPickup]
     little_boosts: List[BoostPickup]
     boostBL: BoostPickup
@@ -42,14 +230,21 @@ class Field(OrientedObject):
     boostFL: BoostPickup
     boostFR: BoostPickup
 
-    def __init__(self, team: int, field_info_packet: FieldInfoPacket):
+    def __init__(
+        self,
+        team: int,
+        field_info_packet: FieldInfoPacket,
+        boost_index: BoostIndex = None,
+    ):
+        """With `boost_index` (another Field's), the pads are shared instead of
+        created, so one `update` refreshes both Fields."""
         orientation = Orientation(Vec3(0))
         orientation.up = Vec3(0, 0, 1)
         orientation.right = Vec3(1 if team else -1, 0, 0)
         orientation.forward = Vec3(0, -1 if team else 1, 0)
         super().__init__(orientation=orientation)
         self.boosts = []
-        self.init_boosts(field_info_packet)
+        self.init_boosts(field_info_packet, boost_index)
         self.init_goals()
 
     @property
@@ -73,10 +268,16 @@ class Field(OrientedObject):
             self.opp_goal_center + (goal_width / 2) * self.left
         )
 
-    def init_boosts(self, field_info_packet: FieldInfoPacket):
-        for i in range(field_info_packet.num_boosts):
-            boost = field_info_packet.boost_pads[i]
-            self.boosts.append(BoostPickup(boost.location, i, boost.is_full_boost))
+    def init_boosts(
+        self, field_info_packet: FieldInfoPacket, boost_index: BoostIndex = None
+    ):
+        if boost_index is None:
+            for i in range(field_info_packet.num_boosts):
+                boost = field_info_packet.boost_pads[i]
+                self.boosts.append(BoostPickup(boost.location, i, boost.is_full_boost))
+            boost_index = BoostIndex(self.boosts)
+        self.boosts = boost_index.boosts
+        self.boost_index = boost_index
         self.big_boosts = [b for b in self.boosts if b.is_big]
         self.little_boosts = [b for b in self.boosts if not b.is_big]
         for b in self.big_boosts:
@@ -99,10 +300,10 @@ class Field(OrientedObject):
                     self.boostMR = b
 
     def update(self, packet: GameTickPacket):
-        """Update from match tick packet (boost pickup status)."""
-        for i in range(packet.num_boost):
-            self.boosts[i].is_ready = packet.game_boosts[i].is_active
-            self.boosts[i].timer = packet.game_boosts[i].timer
+        """Update from match tick packet (boost pickup status). The BoostPickups read
+        their state from `boost_index`, which also records what changed."""
+        time = packet.game_info.seconds_elapsed
+        self.boost_index.refresh(boost_states(packet), time)
 
     def is_near_wall(self, pos: Location, dist=500):
         """Return True if the location is close to a wall."""
@@ -1,9 +1,58 @@
 """vitamins.match.hitbox -- hitbox class and data."""
+from itertools import product
 
-from functools import partial
+import numpy as np
 
-from vitamins.match.base import OrientedObject
 from vitamins import draw
+from vitamins.geometry import Vec3, spin_matrix
+from vitamins.match.base import OrientedObject
+
+# Every named location on a hitbox (see `Hitbox.location`), with the 8 corners first
+# and the car's root ("") last. Each table of hitbox points has rows in this order.
+CORNER_NAMES = ["".join(p) for p in product("FB", "LR", "UD")]
+POINT_NAMES = CORNER_NAMES + [
+    "".join(p)
+    for p in product(("F", "B", ""), ("L", "R", ""), ("U", "D", ""))
+    if "".join(p) not in CORNER_NAMES
+]
+POINT_INDEX = {name: i for i, name in enumerate(POINT_NAMES)}
+# Pairs of corner indices that make up the 12 edges of the box:
+EDGES = [
+    (i, j)
+    for i, a in enumerate(CORNER_NAMES)
+    for j, b in enumerate(CORNER_NAMES)
+    if i < j and sum(x != y for x, y in zip(a, b)) == 1
+]
+
+_spellings = {}
+
+
+def _letter(name: str, pair: str) -> str:
+    """Whichever letter of `pair` is in `name`, or ""."""
+    return next((c for c in name if c in pair), "")
+
+
+def point_index(corner_str: str) -> int:
+    """Row of the point named by `corner_str` (any order, any case) in the tables."""
+    index = _spellings.get(corner_str)
+    if index is None:
+        upper = corner_str.upper()
+        name = "".join(_letter(upper, pair) for pair in ("FB", "LR", "UD"))
+        index = _spellings[corner_str] = POINT_INDEX[name]
+    return index
+
+
+def hitbox_points(positions, matrices, local_points) -> np.ndarray:
+    """World positions of hitbox points for many cars at once. `positions` is (N, 3),
+    `matrices` is (N, 3, 3) (see `Orientation.matrix`) and `local_points` is a
+    (P, 3) table shared by all cars, or an (N, P, 3) table per car. Returns an
+    (N, P, 3) array."""
+    local_points = np.asarray(local_points)
+    if local_points.ndim == 2:
+        rotated = np.einsum("nij,pj->npi", matrices, local_points)
+    else:
+        rotated = np.einsum("nij,npj->npi", matrices, local_points)
+    return rotated + np.asarray(positions)[:, None, :]
 
 
 class Hitbox:
@@ -15,6 +64,38 @@ class Hitbox:
     root_to_top: float
     root_to_side: float
     root_to_back: float
+    # Offsets of the named points from the car's root, in local (forward, right, up)
+    # coordinates, one row per entry of POINT_NAMES. Computed once per car type.
+    local_points: np.ndarray
+    # The box as a center offset from the root (local coordinates) and half-sizes:
+    local_center: np.ndarray
+    half_extents: np.ndarray
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        f = {"F": cls.root_to_front, "B": -cls.root_to_back, "": 0}
+        r = {"L": -cls.root_to_side, "R": cls.root_to_side, "": 0}
+        u = {"U": cls.root_to_top, "D": cls.root_to_top - cls.height, "": 0}
+        cls.local_points = np.array(
+            [
+                [f[_letter(n, "FB")], r[_letter(n, "LR")], u[_letter(n, "UD")]]
+                for n in POINT_NAMES
+            ]
+        )
+        cls.local_center = np.array(
+            [
+                (cls.root_to_front - cls.root_to_back) / 2,
+                0.0,
+                cls.root_to_top - cls.height / 2,
+            ]
+        )
+        cls.half_extents = np.array(
+            [
+                (cls.root_to_front + cls.root_to_back) / 2,
+                cls.root_to_side,
+                cls.height / 2,
+            ]
+        )
 
     def __init__(self, car: OrientedObject, width: float):
         self.car = car
@@ -33,37 +114,59 @@ class Hitbox:
         self.root_to_top = hitbox_class.root_to_top
         self.root_to_side = hitbox_class.root_to_side
         self.root_to_back = hitbox_class.root_to_back
-
-    def __call__(self, corner_str: str, dt: float = 0):
-        return self.location(corner_str, dt)
-
-    @property
-    def _fwd(self):
-        return self.car.forward * self.root_to_front
-
-    @property
-    def _back(self):
-        return self.car.backward * self.root_to_back
-
-    @property
-    def _left(self):
-        return self.car.left * self.root_to_side
-
-    @property
-    def _up(self):
-        return self.car.up * self.root_to_top
+        self.local_points = hitbox_class.local_points
+        self.local_center = hitbox_class.local_center
+        self.half_extents = hitbox_class.half_extents
+        self._points = None
+        self._points_matrix = None
+        self._points_key = None
+
+    def __call__(self, corner_str: str, dt: float = 0, spin: bool = True):
+        return self.location(corner_str, dt, spin)
+
+    def points(self, dt: float = 0, spin: bool = True) -> np.ndarray:
+        """World positions of all the named points, as a (len(POINT_NAMES), 3) array,
+        extrapolated `dt` seconds. With `spin`, the extrapolation includes the car's
+        rotation at its current angular velocity. The result is cached until the car
+        moves, rotates, or (with `dt`) changes velocity, so don't modify it.
+        """
+        car = self.car
+        matrix = car.orientation.matrix
+        pos = car.position
+        key = (pos.x, pos.y, pos.z, dt, spin)
+        if dt:
+            velocity = car.velocity
+            key += (velocity.x, velocity.y, velocity.z)
+            if spin:
+                av = car.angular_velocity
+                key += (av.x, av.y, av.z)
+        if matrix is self._points_matrix and key == self._points_key:
+            return self._points
+        if dt:
+            pos = pos + dt * car.velocity
+            if spin:
+                matrix = spin_matrix(car.angular_velocity, dt) @ matrix
+        points = self.local_points @ matrix.T
+        points += (pos.x, pos.y, pos.z)
+        self._points_matrix = car.orientation.matrix
+        self._points_key = key
+        self._points = points
+        return points
 
     @property
-    def _down(self):
-        return self.car.down * (self.height - self.root_to_top)
+    def corners(self) -> np.ndarray:
+        """(8, 3) array of the current world positions of the corners, in the order
+        of CORNER_NAMES."""
+        return self.points()[:8]
 
-    def location(self, corner_str: str, dt: float = 0):
+    def location(self, corner_str: str, dt: float = 0, spin: bool = True) -> Vec3:
         """Returns a location on the hitbox.
         Args:
             corner_str: Specifies the location on the hibox (see below).
             dt: Estimates the position `dt` seconds into the future (or past if <0).
                 This is useful for drawing the hitbox since rendering is a couple
                 of frames behind.
+            spin: Take the angular velocity into account when extrapolating.
 
         Location specifier:
             FB: front/back
@@ -81,38 +184,14 @@ class Hitbox:
             to RUB than to RUF, because the center of rotation for all cars is shifted
             somewhat toward the rear of the hitbox.
         """
-        corner_str = corner_str.upper()
-        # todo: take angular velocity into account, too:
-        pos = self.car.position + dt * self.car.velocity
-        if "F" in corner_str:
-            pos += self._fwd
-        if "B" in corner_str:
-            pos += self._back
-        if "L" in corner_str:
-            pos += self._left
-        if "R" in corner_str:
-            pos -= self._left
-        if "U" in corner_str:
-            pos += self._up
-        if "D" in corner_str:
-            pos += self._down
-        return pos
-
-    def draw(self, color: str = "", dt: float = 0):
+        x, y, z = self.points(dt, spin)[point_index(corner_str)].tolist()
+        return Vec3._new(x, y, z)
+
+    def draw(self, color: str = "", dt: float = 0, spin: bool = True):
         """Draw a wireframe hitbox for visualization."""
-        c = partial(self.location, dt=dt)
-        draw.line_3d(c("blu"), c("flu"), color)
-        draw.line_3d(c("bru"), c("fru"), color)
-        draw.line_3d(c("bld"), c("fld"), color)
-        draw.line_3d(c("brd"), c("frd"), color)
-        draw.line_3d(c("flu"), c("fru"), color)
-        draw.line_3d(c("fld"), c("frd"), color)
-        draw.line_3d(c("blu"), c("bru"), color)
-        draw.line_3d(c("bld"), c("brd"), color)
-        draw.line_3d(c("fld"), c("flu"), color)
-        draw.line_3d(c("frd"), c("fru"), color)
-        draw.line_3d(c("bld"), c("blu"), color)
-        draw.line_3d(c("brd"), c("bru"), color)
+        corners = [Vec3._new(*c) for c in self.points(dt, spin)[:8].tolist()]
+        for i, j in EDGES:
+            draw.line_3d(corners[i], corners[j], color)
 
 
 # Specific hitbox data for each car type. Source:
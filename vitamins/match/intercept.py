@@ -0,0 +1,107 @@
+"""vitamins.match.intercept -- the earliest predicted ball each car can drive to.
+
+For every car and every prediction slice, estimate how long the car needs to drive
+to the ball's ground position (turn toward it, then accelerate along a straight
+line), and pick the first slice it can reach in time:
+
+    intercepts = earliest_intercepts(Match.current_prediction, Match.state)
+    intercepts.time[car.index]  # game time of the intercept, or inf
+"""
+from collections import namedtuple
+from typing import List, Union
+
+import numpy as np
+
+from vitamins.match.ball import Ball
+from vitamins.match.car import Car
+from vitamins.match.prediction import BallPredictor
+from vitamins.match.state import MatchState
+from vitamins.physics import travel_time
+
+Intercepts = namedtuple("Intercepts", ["time", "index", "position", "travel_time"])
+Intercepts.__doc__ = """Result of `earliest_intercepts`, one row per car (by index):
+time: game time of the earliest reachable slice, inf if none
+index: slice index of it, -1 if none
+position: (n, 3) ball position at that slice, or nan
+travel_time: (n, s) estimated time to reach every checked slice
+"""
+
+
+def travel_times(state: MatchState, rows, targets, reach: float = 0) -> np.ndarray:
+    """Estimated ground travel time of cars `rows` (indices into `state`) to each of
+    an (s, 3) array of targets, as a (len(rows), s) array. Heights are ignored, and
+    the car only needs to get within `reach` of a target. Demolished cars get inf.
+
+    See `physics.travel_time` for the model; cars with any boost left are assumed
+    to boost all the way.
+    """
+    # (cars, targets) arrays of the offsets to the targets on the ground:
+    position = state.position[rows]
+    dx = targets[:, 0] - position[:, 0, None]
+    dy = targets[:, 1] - position[:, 1, None]
+    dist = np.sqrt(dx * dx + dy * dy)  # np.hypot is several times slower
+    fx, fy = state.forward[rows, 0, None], state.forward[rows, 1, None]
+    vx, vy = state.velocity[rows, 0, None], state.velocity[rows, 1, None]
+    # The angle off the heading, from the cross and dot products:
+    angle = np.arctan2(np.abs(fx * dy - fy * dx), fx * dx + fy * dy)
+    speed = (vx * dx + vy * dy) / np.maximum(dist, 1e-6)
+    dist = np.maximum(dist - reach, 0)
+    # One curve lookup per group of cars with and without boost:
+    boost = state.boost[rows] > 0
+    if boost.all() or not boost.any():
+        time = travel_time(dist, angle, speed, bool(boost.all()))
+    else:
+        time = np.empty(dist.shape)
+        for group in (boost, ~boost):
+            time[group] = travel_time(
+                dist[group], angle[group], speed[group], bool(boost[group][0])
+            )
+    time[state.is_demolished[rows]] = np.inf
+    return time
+
+
+def earliest_intercepts(
+    predictor: BallPredictor,
+    state: MatchState,
+    cars: Union[Car, List[Car]] = None,
+    max_height: float = 150,
+    reach: float = Ball.radius,
+    max_time: float = None,
+) -> Intercepts:
+    """Find the first prediction slice each car can get to in time. Only slices
+    after `state.time` (and up to `max_time`) with the ball below `max_height` are
+    considered. `cars` is a Car, a list of them, or None for all the cars in
+    `state`; rows of other cars are left empty.
+    """
+    if cars is None:
+        rows = np.arange(state.num_cars)
+    elif isinstance(cars, Car):
+        rows = np.array([cars.index])
+    else:
+        rows = np.array([car.index for car in cars], dtype=int)
+
+    start = int(predictor.times.searchsorted(state.time))
+    stop = predictor.prediction.num_slices
+    if max_time is not None:
+        stop = int(predictor.times.searchsorted(max_time, "right"))
+    times = predictor.times[start:stop].astype(np.float64)
+    balls = predictor.positions[start:stop].astype(np.float64)
+
+    n = state.num_cars
+    time = np.full(n, np.inf)
+    index = np.full(n, -1)
+    position = np.full((n, 3), np.nan)
+    travel = np.full((n, len(times)), np.inf)
+    if len(times) == 0 or len(rows) == 0:
+        return Intercepts(time, index, position, travel)
+
+    travel[rows] = travel_times(state, rows, balls, reach)
+    feasible = travel[rows] <= times - state.time
+    feasible &= balls[:, 2] <= max_height
+    hit = feasible.any(axis=1)
+    first = feasible.argmax(axis=1)[hit]
+    hit_rows = rows[hit]
+    index[hit_rows] = start + first
+    time[hit_rows] = times[first]
+    position[hit_rows] = balls[first]
+    return Intercepts(time, index, position, travel)
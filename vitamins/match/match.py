@@ -1,5 +1,6 @@
 """vitamins.match.match -- Class for representing the current match."""
-from typing import List
+import threading
+from typing import Dict, List
 
 from rlbot.agents.base_agent import BaseAgent
 from rlbot.utils.structures.game_data_struct import GameTickPacket
@@ -7,46 +8,210 @@ from rlbot.utils.structures.game_data_struct import GameTickPacket
 from vitamins.match.ball import Ball
 from vitamins.match.car import Car
 from vitamins.match.field import Field
-from vitamins.match.prediction import BallPredictor
+from vitamins.match.planning import PlanFuture, Planner
+from vitamins.match.prediction import (
+    BallPredictor,
+    PredictionWorker,
+    copy_prediction,
+)
+from vitamins.match.snapshot import SnapshotPublisher, SnapshotReader
+from vitamins.match.state import MatchState
+from vitamins.match.structs import PHYSICS_FLOATS, player_table
+from vitamins.util import TickProfiler
+
+
+class Perspective:
+    """One agent's view of a shared match: its car, its teammates and opponents, and
+    the field oriented for its team. These only reference the shared objects."""
+
+    def __init__(self, agent: BaseAgent, cars: List[Car], field: Field):
+        self.agent = agent
+        self.agent_car = cars[agent.index]
+        self.teammates = [car for car in cars if car.team == agent.team]
+        self.opponents = [car for car in cars if car.team != agent.team]
+        self.field = field
 
 
 class Match:
+    # With `shared` set, several agents in one process (e.g. a hivemind) use one
+    # Match: the packet is ingested once per game tick, and `activate` switches the
+    # agent-specific attributes to each agent's Perspective in turn.
+    shared: bool = False
+    perspectives: Dict[int, Perspective] = {}
+    fields: Dict[int, Field] = {}  # by team
+    ingested_time: float = None
     agent: BaseAgent = None
     time: float = 0
     current_prediction: BallPredictor = None
     next_prediction: BallPredictor = None
     max_prediction_age = 0.5
+    # Fetch and analyze new predictions on a background thread (see PredictionWorker):
+    prediction_thread: bool = False
+    prediction_worker: PredictionWorker = None
+    fetch_lock = threading.Lock()  # held while fetching, see `fetch_prediction`
+    # Sharing with other processes (see vitamins.match.snapshot):
+    snapshot_publisher: SnapshotPublisher = None
+    snapshot_reader: SnapshotReader = None
+    planner: Planner = None  # process pool for `plan`, started on first use
     agent_car: Car = None
     field: Field = None
     ball: Ball = None
     cars: List[Car] = []
     teammates: List[Car] = []
     opponents: List[Car] = []
+    state: MatchState = None
+    profiler: TickProfiler = TickProfiler(enabled=False)
 
     @classmethod
     def initialize(cls, agent: BaseAgent, packet: GameTickPacket):
+        """Set up the match for `agent`. In shared mode, agents after the first only
+        add their Perspective to the existing match."""
+        joining = cls.shared and cls.perspectives and len(cls.cars) == packet.num_cars
+        if not joining:
+            cls.create(agent, packet)
+        cls.perspectives[agent.index] = Perspective(
+            agent, cls.cars, cls.fields[agent.team]
+        )
+        cls.activate(agent)
+        cls.update(packet)
+
+    @classmethod
+    def create(cls, agent: BaseAgent, packet: GameTickPacket):
         cls.agent = agent
-        cls.field = Field(agent.team, agent.get_field_info())
+        field_info = agent.get_field_info()
+        field = Field(agent.team, field_info)
+        cls.fields = {agent.team: field}
+        if cls.shared:
+            # The other team's Field shares the boost pads, refreshed once per tick:
+            other = 1 - agent.team
+            cls.fields[other] = Field(other, field_info, field.boost_index)
+        cls.perspectives = {}
+        cls.ingested_time = None
         cls.cars = [Car(index=i, packet=packet) for i in range(packet.num_cars)]
-        cls.agent_car = cls.cars[cls.agent.index]
-        cls.teammates = [car for car in cls.cars if car.team == cls.agent.team]
-        cls.opponents = [car for car in cls.cars if car.team != cls.agent.team]
         cls.ball = Ball(packet=packet)
-        cls.current_prediction = BallPredictor(cls.agent.get_ball_prediction_struct())
-        cls.update(packet)
+        cls.state = MatchState()
+        if cls.prediction_thread:
+            cls.stop_prediction_worker()
+            cls.prediction_worker = PredictionWorker(
+                agent.get_ball_prediction_struct, cls.fetch_lock
+            )
+            cls.current_prediction = cls.prediction_worker.produce()
+            cls.prediction_worker.start()
+        else:
+            cls.current_prediction = BallPredictor(cls.fetch_prediction(), copy=False)
+
+    @classmethod
+    def activate(cls, agent: BaseAgent):
+        """Make `agent`, `agent_car`, `teammates`, `opponents` and `field` refer to
+        `agent`'s perspective."""
+        perspective = cls.perspectives[agent.index]
+        cls.agent = agent
+        cls.agent_car = perspective.agent_car
+        cls.teammates = perspective.teammates
+        cls.opponents = perspective.opponents
+        cls.field = perspective.field
+
+    @classmethod
+    def retire(cls, agent: BaseAgent):
+        """Remove `agent` from the match. The remaining agents take over fetching
+        the ball prediction; the prediction worker, snapshots and planner stop
+        after the last one."""
+        cls.perspectives.pop(agent.index, None)
+        if not cls.perspectives:
+            cls.stop_prediction_worker()
+            cls.stop_snapshots()
+            cls.stop_planner()
+            return
+        heir = next(iter(cls.perspectives.values())).agent
+        with cls.fetch_lock:
+            if cls.prediction_worker is not None:
+                cls.prediction_worker.fetch = heir.get_ball_prediction_struct
+            if cls.agent is agent:
+                cls.activate(heir)
+
+    @classmethod
+    def plan(cls, fn, *args, max_age: float = None) -> PlanFuture:
+        """Run `fn(world, *args)` in the planner's process pool, where `world` is a
+        WorldSnapshot of this tick. See vitamins.match.planning."""
+        if cls.planner is None:
+            cls.planner = Planner()
+        world = cls.planner.snapshot(
+            cls.state, cls.field.boost_index, cls.current_prediction
+        )
+        return cls.planner.submit(world, fn, *args, max_age=max_age)
+
+    @classmethod
+    def stop_planner(cls):
+        if cls.planner is not None:
+            cls.planner.shutdown()
+            cls.planner = None
+
+    @classmethod
+    def publish_snapshots(cls, name: str, max_cars: int = 8):
+        """Publish the state of every tick to other processes, in shared memory."""
+        cls.snapshot_publisher = SnapshotPublisher(name, max_cars)
+
+    @classmethod
+    def read_snapshots(cls, name: str):
+        """Take the ball prediction from another process's snapshots instead of
+        fetching and analyzing it here."""
+        cls.snapshot_reader = SnapshotReader(name)
+
+    @classmethod
+    def stop_snapshots(cls):
+        if cls.snapshot_publisher is not None:
+            cls.snapshot_publisher.close()
+            cls.snapshot_publisher = None
+        if cls.snapshot_reader is not None:
+            cls.snapshot_reader.close()
+            cls.snapshot_reader = None
+
+    @classmethod
+    def fetch_prediction(cls):
+        """A copy of a freshly fetched ball prediction. Use this rather than the
+        agent's `get_ball_prediction_struct` while the prediction worker runs: RLBot
+        refills one struct per process, and the worker may be copying it."""
+        with cls.fetch_lock:
+            return copy_prediction(cls.agent.get_ball_prediction_struct())
+
+    @classmethod
+    def stop_prediction_worker(cls):
+        if cls.prediction_worker is not None:
+            cls.prediction_worker.stop()
+            cls.prediction_worker = None
 
     @classmethod
     def update(cls, packet: GameTickPacket):
+        """Ingest a packet. In shared mode, packets of a game tick that was already
+        ingested (by another agent) are skipped."""
+        time = packet.game_info.seconds_elapsed
+        if cls.shared and time == cls.ingested_time:
+            return
+        cls.ingested_time = time
         cls.packet = packet
-        cls.time = packet.game_info.seconds_elapsed
-        for car in cls.cars:
-            car.update(packet=packet)
-        cls.ball.update(packet=packet)
-        cls.field.update(packet=packet)
-        cls.update_ball_prediction(packet=packet)
+        cls.time = time
+        with cls.profiler.section("match_update"):
+            rows = player_table(packet)[:, :PHYSICS_FLOATS].tolist()
+            for car in cls.cars:
+                car.update(packet, rows[car.index])
+            cls.ball.update(packet=packet)
+            cls.field.update(packet=packet)  # the Fields share the boost pads
+            cls.state.refresh(packet)
+        with cls.profiler.section("ball_prediction"):
+            if cls.snapshot_reader is not None:
+                cls.read_ball_prediction(packet)
+            else:
+                cls.update_ball_prediction(packet=packet)
+        if cls.snapshot_publisher is not None:
+            cls.snapshot_publisher.publish(
+                cls.state, cls.field.boost_index, cls.current_prediction
+            )
 
     @classmethod
     def update_ball_prediction(cls, packet):
+        if cls.prediction_worker is not None:
+            cls.swap_ball_prediction(packet)
+            return
         if (
             cls.current_prediction.valid
             and cls.current_prediction.age < cls.max_prediction_age
@@ -55,12 +220,36 @@ class Match:
         else:
             if cls.next_prediction is None:
                 cls.next_prediction = BallPredictor(
-                    cls.agent.get_ball_prediction_struct()
+                    cls.fetch_prediction(), copy=False
                 )
-            elif cls.next_prediction.ready:
+            cls.next_prediction.update(packet)
+            if cls.next_prediction.ready:
                 cls.current_prediction = cls.next_prediction
                 cls.next_prediction = None
 
+    @classmethod
+    def read_ball_prediction(cls, packet):
+        """Use the latest prediction published by another process, or our own until
+        there is one."""
+        predictor = cls.snapshot_reader.predictor()
+        if predictor is None:
+            cls.update_ball_prediction(packet)
+            return
+        cls.current_prediction = predictor
+        predictor.update(packet)
+
+    @classmethod
+    def swap_ball_prediction(cls, packet):
+        """Worker-thread mode: keep using the current prediction until a fresh one
+        has been published, then swap it in. Nothing is fetched or analyzed here."""
+        fresh = cls.prediction_worker.take()
+        if fresh is not None:
+            cls.current_prediction = fresh
+        current = cls.current_prediction
+        current.update(packet)
+        if not current.valid or current.age >= cls.max_prediction_age:
+            cls.prediction_worker.request()
+
     @classmethod
     def predict_ball(cls, dt: float = 0) -> Ball:
         if cls.current_prediction is None:
@@ -0,0 +1,144 @@
+"""vitamins.match.planning -- run slow planners in a process pool.
+
+Planning that takes longer than a tick (e.g. searching every prediction slice for
+shots) runs in other processes, on a picklable WorldSnapshot of the tick it was
+started on:
+
+    def find_shot(world: WorldSnapshot, car_index: int):
+        predictor = world.predictor()
+        ...
+
+    future = Match.plan(find_shot, Match.agent_car.index, max_age=0.3)
+    ...
+    if future.done() and not future.stale(Match.time):
+        shot = future.result()
+
+See `Activity.plan` for doing this from an Activity.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable
+
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction
+
+from vitamins.geometry import Vec3
+from vitamins.match.field import BoostIndex, BoostPickup
+from vitamins.match.prediction import BallPredictor
+from vitamins.match.state import MatchState
+from vitamins.match.structs import slice_table
+
+
+class WorldSnapshot:
+    """Compact copy of one tick of the match: the MatchState arrays, the boost pads
+    and the ball prediction slices. It pickles to a few tens of kB, and rebuilds
+    the usual objects on the other side."""
+
+    def __init__(self, state: MatchState, pads: BoostIndex, predictor: BallPredictor):
+        self.time = state.time
+        self.physics = state.physics.copy()
+        self.boost = state.boost.copy()
+        self.team = state.team.copy()
+        self.has_wheel_contact = state.has_wheel_contact.copy()
+        self.is_demolished = state.is_demolished.copy()
+        self.ball_physics = state.ball_physics.copy()
+        self.pad_positions = pads.positions
+        self.pad_is_big = pads.is_big
+        self.pad_is_ready = pads.is_ready.copy()
+        self.pad_timer = pads.timer.copy()
+        self.pad_respawn_at = pads.respawn_at.copy()
+        self.slices = slice_table(predictor.prediction).copy()
+
+    def state(self) -> MatchState:
+        state = MatchState()
+        state.time = self.time
+        state.num_cars = len(self.physics)
+        state._allocate(state.num_cars)
+        state.physics[:] = self.physics
+        state.boost[:] = self.boost
+        state.team[:] = self.team
+        state.has_wheel_contact[:] = self.has_wheel_contact
+        state.is_demolished[:] = self.is_demolished
+        state.ball_physics[:] = self.ball_physics
+        return state
+
+    def pads(self) -> BoostIndex:
+        boosts = [
+            BoostPickup(Vec3(*position), i, is_big)
+            for i, (position, is_big) in enumerate(
+                zip(self.pad_positions.tolist(), self.pad_is_big.tolist())
+            )
+        ]
+        pads = BoostIndex(boosts)
+        pads.time = self.time
+        pads.is_ready[:] = self.pad_is_ready
+        pads.timer[:] = self.pad_timer
+        pads.respawn_at[:] = self.pad_respawn_at
+        pads.sort_timeline()
+        return pads
+
+    def predictor(self) -> BallPredictor:
+        """A fully analyzed BallPredictor of the snapshot's prediction."""
+        prediction = BallPrediction()
+        prediction.num_slices = len(self.slices)
+        slice_table(prediction)[:] = self.slices
+        predictor = BallPredictor(prediction, copy=False)
+        predictor.game_time = self.time
+        while not predictor.ready:
+            predictor.analyze()
+        return predictor
+
+
+class PlanFuture:
+    """A planning job, stamped with the game time of the snapshot it started from.
+    Its result is stale once the game is more than `max_age` seconds past that."""
+
+    def __init__(self, future: Future, time: float, max_age: float):
+        self.future = future
+        self.time = time
+        self.max_age = max_age
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self):
+        """The result of the job (which must be done), or its exception raised."""
+        return self.future.result()
+
+    def stale(self, time: float) -> bool:
+        return time - self.time > self.max_age
+
+    def cancel(self) -> bool:
+        """Cancel the job if it hasn't started. A running job finishes anyway."""
+        return self.future.cancel()
+
+
+def _run(fn: Callable, world: WorldSnapshot, args):
+    return fn(world, *args)
+
+
+class Planner:
+    """Process pool for planning jobs. Each job runs `fn(world, *args)`, where
+    `world` is a WorldSnapshot; `fn` and `args` must be picklable, so `fn` has to be
+    a module-level function. One snapshot is taken per tick, however many jobs are
+    submitted."""
+
+    max_age: float = 0.5  # default for PlanFuture.max_age, in game seconds
+
+    def __init__(self, processes: int = None):
+        self.executor = ProcessPoolExecutor(processes)
+        self.world: WorldSnapshot = None
+
+    def snapshot(self, state, pads, predictor) -> WorldSnapshot:
+        if self.world is None or self.world.time != state.time:
+            self.world = WorldSnapshot(state, pads, predictor)
+        return self.world
+
+    def submit(
+        self, world: WorldSnapshot, fn: Callable, *args, max_age: float = None
+    ) -> PlanFuture:
+        future = self.executor.submit(_run, fn, world, args)
+        if max_age is None:
+            max_age = self.max_age
+        return PlanFuture(future, world.time, max_age)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,14 +1,51 @@
 """vitamins.match.prediction -- routines for predicting the future."""
+import ctypes
+import math
+import threading
+from collections import namedtuple
+from enum import IntEnum
+from typing import Callable
 
+import numpy as np
 from rlbot.utils.structures.game_data_struct import GameTickPacket
 from rlbot.utils.structures.ball_prediction_struct import BallPrediction
 
-from vitamins.match.ball import Ball
+from vitamins.match.ball import Ball, BallSliceView
+from vitamins.match.field import Field
+from vitamins.match.structs import SLICE_DTYPE, slice_table
 from vitamins.geometry import Vec3
 from vitamins.util import perf_counter_ns
 from vitamins import draw
 from vitamins.math import clamp
 
+SQRT_HALF = 0.5 ** 0.5
+UNIFORM_TOLERANCE = 0.01  # max deviation of slice spacing, as a fraction of dt
+INDEX_TOLERANCE = 1e-3  # float32 rounding slack when computing slice indices
+
+PredictedBalls = namedtuple(
+    "PredictedBalls", ["time", "position", "velocity", "angular_velocity"]
+)
+
+
+class Contact(IntEnum):
+    """What the ball is touching at a given slice of the prediction."""
+
+    NONE = 0
+    GROUND = 1
+    WALL = 2
+    CEILING = 3
+
+
+def copy_prediction(prediction: BallPrediction) -> BallPrediction:
+    """A new BallPrediction with the contents of `prediction`."""
+    copy = BallPrediction()
+    ctypes.memmove(
+        ctypes.addressof(copy),
+        ctypes.addressof(prediction),
+        ctypes.sizeof(BallPrediction),
+    )
+    return copy
+
 
 class BallPredictor:
     game_time: float = 0
@@ -18,17 +55,43 @@ class BallPredictor:
     accuracy_threshold_velocity: float = 30
     max_bounces: int = 5
     bounce_threshold: float = 300
+    contact_tolerance: float = 50  # how close to a surface counts as touching it
+    incremental: bool = False  # analyze a few slices per tick instead of all at once
 
-    def __init__(self, prediction: BallPrediction):
+    def __init__(self, prediction: BallPrediction, copy: bool = True):
+        # RLBot refills the same BallPrediction struct on every fetch, so by default
+        # the predictor keeps its own copy. Then the views below, and the slice
+        # views handed out by `predict` etc., never change. Only pass copy=False
+        # for a struct nothing else will write to.
+        if copy:
+            prediction = copy_prediction(prediction)
         self.prediction = prediction
+        # Zero-copy views of the prediction buffer:
+        self.slices = np.frombuffer(prediction, SLICE_DTYPE, prediction.num_slices)
+        self.times = self.slices["time"]
+        self.positions = self.slices["location"]
+        self.velocities = self.slices["velocity"]
+        self.angular_velocities = self.slices["angular_velocity"]
+        self.table = slice_table(prediction)
+        self.start_time = self.end_time = 0.0
+        self.slice_dt = 0.0  # slice spacing, or 0 if the spacing isn't uniform
+        if prediction.num_slices:
+            self.start_time = float(self.times[0])
+            self.end_time = float(self.times[-1])
+        if prediction.num_slices > 1:
+            dt = (self.end_time - self.start_time) / (prediction.num_slices - 1)
+            if np.abs(np.diff(self.times) - dt).max() < UNIFORM_TOLERANCE * dt:
+                self.slice_dt = dt
         self.slices_analyzed = 0
         self.index_now = 0
         self.bounces = []
+        self.bounce_surfaces = []
+        self.contacts: np.ndarray = None
         self.roll_time: float = None
 
     @property
     def age(self):
-        return self.game_time - self.prediction.slices[0].game_seconds
+        return self.game_time - self.times[0]
 
     @property
     def ready(self):
@@ -45,91 +108,264 @@ class BallPredictor:
         """Check the predicted ball against the actual current one."""
         actual_ball_velocity = Vec3(packet.game_ball.physics.velocity)
         # Advance to the current game time in our prediction structure:
-        while self.prediction.slices[self.index_now + 1].game_seconds <= self.game_time:
-            self.index_now += 1
-            if self.index_now >= self.prediction.num_slices:
-                self.valid = False
-                return
+        index = int(self.times.searchsorted(self.game_time, "right")) - 1
+        self.index_now = max(index, 0)
+        if self.index_now >= self.prediction.num_slices - 1:
+            self.valid = False
+            return
         # Make sure we're still close to the reality:
         self.valid = (
-            actual_ball_velocity
-            - self.prediction.slices[self.index_now].physics.velocity
-        ).length() < self.accuracy_threshold_velocity
+            actual_ball_velocity.dist(Vec3(*self.velocities[self.index_now].tolist()))
+            < self.accuracy_threshold_velocity
+        )
 
     def analyze(self, max_ms: float = 2):
+        """Find the bounces, the start of rolling, and the surface the ball is in
+        contact with at each slice. By default the whole prediction is analyzed in one
+        vectorized pass; with `incremental` set, slices are examined one at a time
+        until `max_ms` runs out, and the analysis resumes on the next call.
+        """
+        if self.incremental:
+            self.analyze_incremental(max_ms)
+            return
+        n = self.prediction.num_slices
+        dv = np.diff(self.velocities, axis=0)
+        dv_len = np.sqrt(np.einsum("ij,ij->i", dv, dv))
+        hits = np.flatnonzero(dv_len > self.bounce_threshold)[: self.max_bounces]
+        self.bounces = [(i, Vec3(*dv[i].tolist())) for i in hits.tolist()]
+        rolling = np.flatnonzero(
+            (np.abs(self.velocities[:, 2]) < self.bounce_threshold / 2)
+            & (self.positions[:, 2] - Ball.radius < 30)
+        )
+        self.roll_time = int(rolling[0]) if len(rolling) else None
+        self.classify_contacts()
+        self.slices_analyzed = n
+
+    def analyze_incremental(self, max_ms: float = 2):
         stop_ns = perf_counter_ns() + max_ms * 1e6
         while self.slices_analyzed < self.prediction.num_slices:
-            current_slice = self.prediction.slices[self.slices_analyzed]
-            if self.slices_analyzed > 0:
-                previous_slice = self.prediction.slices[self.slices_analyzed - 1]
+            i = self.slices_analyzed
+            if i > 0:
                 # See if the ball bounced:
                 if len(self.bounces) < self.max_bounces:
-                    v1 = Vec3(current_slice.physics.velocity)
-                    v2 = Vec3(previous_slice.physics.velocity)
-                    if (v1 - v2).length() > self.bounce_threshold:
-                        self.bounces.append((self.slices_analyzed - 1, v1 - v2))
+                    dv = Vec3(*(self.velocities[i] - self.velocities[i - 1]).tolist())
+                    if dv.length() > self.bounce_threshold:
+                        self.bounces.append((i - 1, dv))
             if self.roll_time is None:
-                if abs(current_slice.physics.velocity.z) < self.bounce_threshold / 2:
-                    if current_slice.physics.location.z - Ball.radius < 30:
-                        self.roll_time = self.slices_analyzed
+                if abs(self.velocities[i, 2]) < self.bounce_threshold / 2:
+                    if self.positions[i, 2] - Ball.radius < 30:
+                        self.roll_time = i
             self.slices_analyzed += 1
-            if perf_counter_ns() > stop_ns:
+            if perf_counter_ns() > stop_ns and not self.ready:
                 return
+        self.classify_contacts()
 
-    def predict(self, dt: float) -> Ball:
-        """Return a Ball instance predicted `dt` match seconds into the future."""
-        coarse_scan = 16  # step size for initial scan of slices
-        t = clamp(
-            self.game_time + dt,
-            self.prediction.slices[0].game_seconds,
-            self.prediction.slices[self.prediction.num_slices - 1].game_seconds,
+    def classify_contacts(self):
+        """Label each slice with the surface the ball is touching (see `Contact`), and
+        each bounce with the surface it bounces off of."""
+        x, y, z = np.abs(self.positions).T
+        reach = Ball.radius + self.contact_tolerance
+        contacts = np.full(len(z), Contact.NONE, dtype=np.int8)
+        wall = (
+            (x > Field.to_side_wall - reach)
+            | (y > Field.to_end_wall - reach)
+            | ((x + y) * SQRT_HALF > Field.to_corner - reach)
         )
-        index = 0
-        for index in range(0, self.prediction.num_slices - coarse_scan, coarse_scan):
-            if self.prediction.slices[index + coarse_scan].game_seconds > t:
-                break
-        while self.prediction.slices[index].game_seconds < t:
-            index += 1
-        phys = self.prediction.slices[index].physics
-        return Ball(phys=phys, time=self.prediction.slices[index].game_seconds)
+        contacts[wall] = Contact.WALL
+        contacts[z > Field.to_ceiling - reach] = Contact.CEILING
+        contacts[z < reach] = Contact.GROUND
+        self.contacts = contacts
+        self.bounce_surfaces = [Contact(contacts[i]) for i, _ in self.bounces]
+
+    def slice_index(self, t: float) -> int:
+        """Index of the first slice at or after match time `t`, clamped to the
+        prediction. Constant time when the slices are evenly spaced."""
+        last = self.prediction.num_slices - 1
+        if self.slice_dt:
+            index = math.ceil((t - self.start_time) / self.slice_dt - INDEX_TOLERANCE)
+        else:
+            index = int(self.times.searchsorted(t))
+        return 0 if index < 0 else last if index > last else index
+
+    def slice_indices(self, ts: np.ndarray) -> np.ndarray:
+        """Vectorized `slice_index`."""
+        if self.slice_dt:
+            index = np.ceil((ts - self.start_time) / self.slice_dt - INDEX_TOLERANCE)
+            index = index.astype(np.intp)
+        else:
+            index = self.times.searchsorted(ts)
+        return np.clip(index, 0, self.prediction.num_slices - 1)
+
+    def predict(self, dt: float, interpolate: str = None) -> Ball:
+        """Return the ball predicted `dt` match seconds into the future.
+
+        Without `interpolate`, this is a BallSliceView of the first slice at or after
+        that time, which is very cheap to create. With
+        `interpolate="linear"` or `"hermite"`, the ball is interpolated between the
+        two slices around that time. Hermite interpolation uses the slice velocities
+        as tangents, which follows the curve of the ball's flight much more closely.
+        """
+        t = clamp(self.game_time + dt, self.start_time, self.end_time)
+        index = self.slice_index(t)
+        if interpolate is None:
+            return BallSliceView(self.table, index)
+        pos, vel, ang_vel = self._interpolate(t, index, interpolate)
+        ball = Ball(time=t)
+        ball.position = Vec3(*pos.tolist())
+        ball.velocity = Vec3(*vel.tolist())
+        ball.angular_velocity = Vec3(*ang_vel.tolist())
+        return ball
+
+    def predict_many(self, dts, interpolate: str = None) -> "PredictedBalls":
+        """Vectorized `predict`: look up the ball at every offset in `dts` (seconds from
+        now) at once and return a PredictedBalls of arrays, one row per offset."""
+        ts = np.clip(
+            self.game_time + np.asarray(dts, dtype=np.float64),
+            self.start_time,
+            self.end_time,
+        )
+        index = self.slice_indices(ts)
+        if interpolate is None:
+            rows = self.slices[index]
+            return PredictedBalls(
+                rows["time"],
+                rows["location"],
+                rows["velocity"],
+                rows["angular_velocity"],
+            )
+        return PredictedBalls(ts, *self._interpolate(ts[:, None], index, interpolate))
+
+    def _interpolate(self, t, index, method: str):
+        """Interpolate between slices `index - 1` and `index`. `t` and `index` can be
+        scalars, or a column of times and the matching array of indices."""
+        prev = np.maximum(index - 1, 0)
+        t0 = self.times[prev].astype(np.float64)
+        h = self.times[index] - t0
+        h = np.where(h > 0, h, 1.0)
+        if np.ndim(t):
+            t0, h = t0[:, None], h[:, None]
+        u = (t - t0) / h
+        p0, p1 = self.positions[prev], self.positions[index]
+        v0, v1 = self.velocities[prev], self.velocities[index]
+        w0, w1 = self.angular_velocities[prev], self.angular_velocities[index]
+        ang_vel = w0 + u * (w1 - w0)
+        if method == "linear":
+            return p0 + u * (p1 - p0), v0 + u * (v1 - v0), ang_vel
+        if method == "hermite":
+            uu, uuu = u * u, u * u * u
+            pos = (
+                (2 * uuu - 3 * uu + 1) * p0
+                + (uuu - 2 * uu + u) * h * v0
+                + (3 * uu - 2 * uuu) * p1
+                + (uuu - uu) * h * v1
+            )
+            vel = (
+                (6 * uu - 6 * u) * (p0 - p1) / h
+                + (3 * uu - 4 * u + 1) * v0
+                + (3 * uu - 2 * u) * v1
+            )
+            return pos, vel, ang_vel
+        raise ValueError(f"Unknown interpolation method: {method}")
 
-    def next_bounce(self, game_time: float, min_dv: float = 500) -> Ball:
+    def next_bounce(self, game_time: float, min_dv: float = 500) -> BallSliceView:
         """Return the first bounce after the specified match time."""
         # If there is no bounce in the prediction (should be super rare), then just
         # just return the last moment in the prediction:
         bounce_slice, bounce_dv = self.prediction.num_slices - 1, 0.0
         for i, dv in self.bounces:
-            if (
-                self.prediction.slices[i].game_seconds > game_time
-                and abs(dv.z) >= min_dv
-            ):
+            if self.times[i] > game_time and abs(dv.z) >= min_dv:
                 bounce_slice, bounce_dv = i, dv
-        b = Ball(
-            phys=self.prediction.slices[bounce_slice].physics,
-            time=self.prediction.slices[bounce_slice].game_seconds,
-        )
-        b.dv = bounce_dv
-        return b
+                break
+        return BallSliceView(self.table, bounce_slice, bounce_dv)
 
     def draw_path(self, path_color="white", roll_color="cyan", step=4):
         roll = self.roll_time or self.prediction.num_slices
         if roll > step:
-            draw.polyline_3d(
-                [
-                    self.prediction.slices[i].physics.location
-                    for i in range(0, roll, step)
-                ],
-                color=path_color,
-            )
+            draw.polyline_3d(self.positions[0:roll:step], color=path_color)
         if roll < self.prediction.num_slices - step - 1:
-            draw.polyline_3d(
-                [
-                    self.prediction.slices[i].physics.location
-                    for i in range(roll, self.prediction.num_slices, step)
-                ],
-                color=roll_color,
-            )
+            draw.polyline_3d(self.positions[roll::step], color=roll_color)
 
     def draw_bounces(self, color="red"):
         for i, dv in self.bounces:
-            draw.cross(self.prediction.slices[i].physics.location, color=color)
+            draw.cross(self.positions[i], color=color)
+
+
+class PredictionWorker:
+    """Fetches and fully analyzes ball predictions on a background thread, so the
+    bot's tick only has to swap in the result:
+
+        worker = PredictionWorker(agent.get_ball_prediction_struct)
+        worker.start()
+        worker.request()       # when the current prediction goes stale
+        fresh = worker.take()  # on a later tick: a ready BallPredictor, or None
+
+    Each BallPredictor has its own copy of the fetched struct (see
+    `BallPredictor`), so the worker never writes to one the bot is using. RLBot
+    refills one struct on every fetch, so `fetch` and the copy are done holding
+    `fetch_lock`; anything else fetching in the same process while the worker runs
+    must hold it too (`Match.fetch_prediction` does).
+    """
+
+    def __init__(
+        self, fetch: Callable[[], BallPrediction], fetch_lock: threading.Lock = None
+    ):
+        self.fetch = fetch
+        self.fetch_lock = threading.Lock() if fetch_lock is None else fetch_lock
+        self.latest: BallPredictor = None  # published, not taken yet
+        self.error: BaseException = None
+        self.fetches = 0
+        self.lock = threading.Lock()
+        self.wanted = threading.Event()
+        self.stopped = False
+        self.thread: threading.Thread = None
+
+    def produce(self) -> BallPredictor:
+        """Fetch a prediction and analyze all of it."""
+        with self.fetch_lock:
+            prediction = copy_prediction(self.fetch())
+        predictor = BallPredictor(prediction, copy=False)
+        self.fetches += 1
+        while not predictor.ready:
+            predictor.analyze()
+        return predictor
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.run, name="ball-prediction", daemon=True
+        )
+        self.thread.start()
+
+    def run(self):
+        while True:
+            self.wanted.wait()
+            self.wanted.clear()
+            if self.stopped:
+                return
+            if self.latest is not None:
+                continue  # the last result hasn't been taken yet
+            try:
+                predictor = self.produce()
+            except Exception as e:
+                self.error = e
+                return
+            with self.lock:
+                self.latest = predictor
+
+    def request(self):
+        """Ask for a new prediction. Does nothing if one is already on the way."""
+        self.wanted.set()
+
+    def take(self) -> BallPredictor:
+        """The latest finished prediction, or None. Each result is returned once.
+        An exception in the worker is raised here."""
+        if self.error is not None:
+            raise self.error
+        with self.lock:
+            predictor, self.latest = self.latest, None
+        return predictor
+
+    def stop(self, timeout: float = 1.0):
+        self.stopped = True
+        self.wanted.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
@@ -0,0 +1,269 @@
+"""vitamins.match.snapshot -- share one process's match state with other processes.
+
+When every bot runs in its own process, one of them can publish its Match state
+each tick into a block of shared memory, and the others attach to it instead of
+fetching and analyzing the ball prediction themselves:
+
+    Match.publish_snapshots("ramen")  # in one process
+    Match.read_snapshots("ramen")     # in the others
+
+The block holds the car arrays of `MatchState`, the ball, the boost pads, and the
+latest ball prediction with its analysis (bounces, contacts, roll time). Writers
+bump a sequence number before and after each write (a seqlock), so readers never
+block the writer: they read and retry if the sequence changed underneath them.
+"""
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction, MAX_SLICES
+
+from vitamins.geometry import Vec3
+from vitamins.match.field import BoostIndex
+from vitamins.match.prediction import BallPredictor, Contact
+from vitamins.match.state import MatchState
+from vitamins.match.structs import PHYSICS_FLOATS, SLICE_DTYPE
+from vitamins.util import perf_counter_ns
+
+MAX_PADS = 64
+MAX_BOUNCES = 16
+
+
+def snapshot_dtype(max_cars: int) -> np.dtype:
+    """Layout of the shared block. `max_cars` comes first, so readers can find the
+    rest of the layout."""
+    return np.dtype(
+        [
+            ("max_cars", np.int32),
+            ("sequence", np.uint64),
+            ("time", np.float64),
+            ("num_cars", np.int32),
+            ("physics", np.float64, (max_cars, PHYSICS_FLOATS)),
+            ("boost", np.float64, max_cars),
+            ("team", np.uint8, max_cars),
+            ("has_wheel_contact", bool, max_cars),
+            ("is_demolished", bool, max_cars),
+            ("ball_physics", np.float64, PHYSICS_FLOATS),
+            ("num_pads", np.int32),
+            ("pad_is_ready", bool, MAX_PADS),
+            ("pad_timer", np.float64, MAX_PADS),
+            ("pad_respawn_at", np.float64, MAX_PADS),
+            ("prediction_version", np.int64),  # 0 until a prediction is published
+            ("num_slices", np.int32),
+            ("slices", SLICE_DTYPE, MAX_SLICES),
+            ("contacts", np.int8, MAX_SLICES),
+            ("num_bounces", np.int32),
+            ("bounce_index", np.int32, MAX_BOUNCES),
+            ("bounce_dv", np.float64, (MAX_BOUNCES, 3)),
+            ("roll_time", np.int32),  # -1 if the ball doesn't start rolling
+        ],
+        align=True,
+    )
+
+
+def _views(buffer, max_cars: int) -> dict:
+    """A zero-copy array for every field of the block, by name."""
+    record = np.ndarray((), snapshot_dtype(max_cars), buffer)
+    return {name: record[name] for name in record.dtype.names}
+
+
+def _attach(name: str) -> SharedMemory:
+    """Attach to an existing block without letting this process's resource tracker
+    delete it at exit (the publisher owns it)."""
+    try:
+        return SharedMemory(name, track=False)
+    except TypeError:  # before Python 3.13
+        pass
+    # Attaching registers the block with the resource tracker, and unregistering
+    # it afterwards would also drop the publisher's registration when the tracker
+    # is shared (same process, or started by multiprocessing). So don't register.
+    register = resource_tracker.register
+
+    def register_others(resource: str, rtype: str):
+        if rtype != "shared_memory":
+            register(resource, rtype)
+
+    resource_tracker.register = register_others
+    try:
+        return SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class SnapshotPublisher:
+    """Writes the match state into a new shared memory block called `name`."""
+
+    def __init__(self, name: str, max_cars: int = 8):
+        self.max_cars = max_cars
+        size = snapshot_dtype(max_cars).itemsize
+        self.memory = SharedMemory(name, create=True, size=size)
+        self.views = _views(self.memory.buf, max_cars)
+        self.views["max_cars"][...] = max_cars
+        self.views["roll_time"][...] = -1
+        self.sequence = self.views["sequence"]
+        self.predictor: BallPredictor = None  # the last one published
+
+    def publish(self, state: MatchState, pads: BoostIndex, predictor: BallPredictor):
+        """Write one tick. The prediction is only copied when `predictor` is a new,
+        fully analyzed one."""
+        if state.num_cars > self.max_cars:
+            raise ValueError(
+                f"Match has {state.num_cars} cars, snapshot max is {self.max_cars}."
+            )
+        if len(pads) > MAX_PADS:
+            raise ValueError(f"Field has {len(pads)} pads, snapshot max is {MAX_PADS}.")
+        self.sequence += 1  # odd: write in progress
+        try:
+            self.write(state, pads, predictor)
+        finally:
+            self.sequence += 1
+
+    def write(self, state: MatchState, pads: BoostIndex, predictor: BallPredictor):
+        v = self.views
+        n = state.num_cars
+        v["time"][...] = state.time
+        v["num_cars"][...] = n
+        v["physics"][:n] = state.physics
+        v["boost"][:n] = state.boost
+        v["team"][:n] = state.team
+        v["has_wheel_contact"][:n] = state.has_wheel_contact
+        v["is_demolished"][:n] = state.is_demolished
+        v["ball_physics"][...] = state.ball_physics
+        p = len(pads)
+        v["num_pads"][...] = p
+        v["pad_is_ready"][:p] = pads.is_ready
+        v["pad_timer"][:p] = pads.timer
+        v["pad_respawn_at"][:p] = pads.respawn_at
+        if predictor is not self.predictor and predictor.ready:
+            self.write_prediction(predictor)
+
+    def write_prediction(self, predictor: BallPredictor):
+        v = self.views
+        s = predictor.prediction.num_slices
+        v["num_slices"][...] = s
+        v["slices"][:s] = predictor.slices
+        v["contacts"][:s] = predictor.contacts
+        bounces = predictor.bounces[:MAX_BOUNCES]
+        v["num_bounces"][...] = len(bounces)
+        for i, (index, dv) in enumerate(bounces):
+            v["bounce_index"][i] = index
+            v["bounce_dv"][i] = (dv.x, dv.y, dv.z)
+        roll_time = predictor.roll_time
+        v["roll_time"][...] = -1 if roll_time is None else roll_time
+        v["prediction_version"] += 1
+        self.predictor = predictor
+
+    def close(self):
+        """Release and delete the block."""
+        self.views = None
+        self.sequence = None
+        self.memory.close()
+        self.memory.unlink()
+
+
+class SnapshotReader:
+    """Attaches to the block of a SnapshotPublisher. `views` are zero-copy arrays of
+    the block; read them between `begin` and `retry`:
+
+        while True:
+            seq = reader.begin()
+            if seq is None:
+                ...  # the publisher is stuck
+            ...  # read from reader.views
+            if not reader.retry(seq):
+                break
+
+    `read_state` and `predictor` do that for you.
+    """
+
+    # How long to wait for a write in progress. A write takes microseconds, so
+    # after this the publisher is taken to have died in the middle of one.
+    timeout_ms: float = 2.0
+
+    def __init__(self, name: str):
+        self.memory = _attach(name)
+        max_cars = int(np.frombuffer(self.memory.buf, np.int32, 1)[0])
+        self.views = _views(self.memory.buf, max_cars)
+        self.sequence = self.views["sequence"]
+        self.version = 0
+        self._predictor: BallPredictor = None
+
+    def begin(self) -> int:
+        """Wait for any write in progress to finish, and return the sequence. Returns
+        None if the write doesn't finish within `timeout_ms`."""
+        seq = int(self.sequence)
+        if not seq & 1:
+            return seq
+        deadline = perf_counter_ns() + self.timeout_ms * 1e6
+        while perf_counter_ns() < deadline:
+            seq = int(self.sequence)
+            if not seq & 1:
+                return seq
+        return None
+
+    def retry(self, seq: int) -> bool:
+        """Whether the block changed since `begin` returned `seq`."""
+        return int(self.sequence) != seq
+
+    def read_state(self, state: MatchState) -> bool:
+        """Copy the cars and the ball into `state`. Returns False if nothing has been
+        published yet, or the publisher is stuck (see `begin`)."""
+        v = self.views
+        while True:
+            seq = self.begin()
+            if seq is None:
+                return False
+            n = int(v["num_cars"])
+            if n != state.num_cars:
+                state.num_cars = n
+                state._allocate(n)
+            state.time = float(v["time"])
+            state.physics[:] = v["physics"][:n]
+            state._matrices = None
+            state.boost[:] = v["boost"][:n]
+            state.team[:] = v["team"][:n]
+            state.has_wheel_contact[:] = v["has_wheel_contact"][:n]
+            state.is_demolished[:] = v["is_demolished"][:n]
+            state.ball_physics[:] = v["ball_physics"]
+            if not self.retry(seq):
+                return seq > 0
+
+    def predictor(self) -> BallPredictor:
+        """The latest published prediction, already analyzed, or None if there is
+        none yet or the publisher is stuck (see `begin`). A new BallPredictor, with
+        a buffer of its own, is made only when the prediction changed."""
+        v = self.views
+        if int(v["prediction_version"]) == self.version:
+            return self._predictor
+        buffer = BallPrediction()
+        table = np.frombuffer(buffer, SLICE_DTYPE, MAX_SLICES)
+        while True:
+            seq = self.begin()
+            if seq is None:
+                return None
+            version = int(v["prediction_version"])
+            s = buffer.num_slices = int(v["num_slices"])
+            table[:s] = v["slices"][:s]
+            contacts = v["contacts"][:s].copy()
+            b = int(v["num_bounces"])
+            bounce_index = v["bounce_index"][:b].tolist()
+            bounce_dv = v["bounce_dv"][:b].tolist()
+            roll_time = int(v["roll_time"])
+            if not self.retry(seq):
+                break
+        predictor = BallPredictor(buffer, copy=False)
+        predictor.bounces = [
+            (i, Vec3(*dv)) for i, dv in zip(bounce_index, bounce_dv)
+        ]
+        predictor.contacts = contacts
+        predictor.bounce_surfaces = [Contact(contacts[i]) for i in bounce_index]
+        predictor.roll_time = None if roll_time < 0 else roll_time
+        predictor.slices_analyzed = s
+        self.version = version
+        self._predictor = predictor
+        return predictor
+
+    def close(self):
+        self.views = None
+        self.sequence = None
+        self.memory.close()
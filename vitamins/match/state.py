@@ -0,0 +1,157 @@
+"""vitamins.match.state -- structure-of-arrays snapshot of the match."""
+
+import numpy as np
+from rlbot.utils.structures.game_data_struct import GameTickPacket
+
+from vitamins.geometry import rotation_matrices
+from vitamins.physics import travel_time
+from vitamins.match.structs import (
+    PHYSICS_FLOATS,
+    ball_physics,
+    player_records,
+    player_table,
+)
+
+
+def _points(points) -> np.ndarray:
+    """A Vec3 (or anything with x, y, z) as a (3,) array, or an array-like of
+    points as a float array."""
+    if hasattr(points, "x"):
+        return np.array((points.x, points.y, points.z))
+    return np.asarray(points, dtype=np.float64)
+
+
+class MatchState:
+    """All cars and the ball, as contiguous NumPy arrays. Row `i` of every car array
+    belongs to the car with packet index `i`.
+
+    This is refreshed once per tick by `Match.update`, and is meant for questions
+    about many cars at once, e.g.:
+
+    state = Match.state
+    first = state.time_to_ball()[state.opponents(team)].min()
+    """
+
+    def __init__(self):
+        self.time = 0.0
+        self.num_cars = 0
+        self._allocate(0)
+        self.ball_physics = np.zeros(PHYSICS_FLOATS)
+        self.ball_position = self.ball_physics[0:3]
+        self.ball_velocity = self.ball_physics[6:9]
+        self.ball_angular_velocity = self.ball_physics[9:12]
+
+    def _allocate(self, n: int):
+        # One block for all the physics, with a view for each vector:
+        self.physics = np.zeros((n, PHYSICS_FLOATS))
+        self.position = self.physics[:, 0:3]
+        self.rotation = self.physics[:, 3:6]  # pitch, yaw, roll
+        self.velocity = self.physics[:, 6:9]
+        self.angular_velocity = self.physics[:, 9:12]
+        self._matrices = None
+        self.boost = np.zeros(n)
+        self.team = np.zeros(n, dtype=np.uint8)
+        self.has_wheel_contact = np.zeros(n, dtype=bool)
+        self.is_demolished = np.zeros(n, dtype=bool)
+
+    def refresh(self, packet: GameTickPacket):
+        """Copy the current state out of the packet, reusing the existing arrays."""
+        self.time = packet.game_info.seconds_elapsed
+        cars = player_records(packet)
+        if len(cars) != self.num_cars:
+            self.num_cars = len(cars)
+            self._allocate(self.num_cars)
+        self.physics[:] = player_table(packet)[:, :PHYSICS_FLOATS]
+        self._matrices = None
+        self.boost[:] = cars["boost"]
+        self.team[:] = cars["team"]
+        self.has_wheel_contact[:] = cars["has_wheel_contact"]
+        self.is_demolished[:] = cars["is_demolished"]
+        self.ball_physics[:] = ball_physics(packet)
+
+    @property
+    def matrices(self) -> np.ndarray:
+        """(n, 3, 3) rotation matrices of the cars, computed on first use each tick.
+        See `Orientation.matrix` for the layout."""
+        if self._matrices is None:
+            self._matrices = rotation_matrices(*self.rotation.T)
+        return self._matrices
+
+    @property
+    def forward(self) -> np.ndarray:
+        return self.matrices[:, :, 0]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.matrices[:, :, 1]
+
+    @property
+    def up(self) -> np.ndarray:
+        return self.matrices[:, :, 2]
+
+    def teammates(self, team: int) -> np.ndarray:
+        """Boolean mask of the cars on `team`."""
+        return self.team == team
+
+    def opponents(self, team: int) -> np.ndarray:
+        """Boolean mask of the cars not on `team`."""
+        return self.team != team
+
+    def distances_to(self, points) -> np.ndarray:
+        """Distance from every car to a point (a Vec3 or a (3,) array; shape (n,)),
+        or to each of an (m, 3) array of points (shape (n, m))."""
+        points = _points(points)
+        if points.ndim == 1:
+            return np.linalg.norm(self.position - points, axis=1)
+        diff = self.position[:, None, :] - points[None, :, :]
+        return np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+
+    def pairwise_distances(self) -> np.ndarray:
+        """(n, n) matrix of distances between cars."""
+        return self.distances_to(self.position)
+
+    def closing_speeds(self) -> np.ndarray:
+        """(n, n) matrix: how fast car `i` and car `j` are approaching each other
+        (positive = approaching, negative = separating)."""
+        offset = self.position[None, :, :] - self.position[:, None, :]
+        rel_vel = self.velocity[:, None, :] - self.velocity[None, :, :]
+        dist = np.sqrt(np.einsum("ijk,ijk->ij", offset, offset))
+        np.fill_diagonal(dist, 1.0)
+        return np.einsum("ijk,ijk->ij", rel_vel, offset) / dist
+
+    def ball_closing_speeds(self) -> np.ndarray:
+        """How fast each car is approaching the ball (positive = approaching)."""
+        offset = self.ball_position - self.position
+        dist = np.maximum(np.linalg.norm(offset, axis=1), 1e-6)
+        rel_vel = self.velocity - self.ball_velocity
+        return np.einsum("ij,ij->i", rel_vel, offset) / dist
+
+    def time_to_ball(self, target=None) -> np.ndarray:
+        """Estimated ground travel time of each car to `target` (default: the current
+        ball position), with the model of `physics.travel_time`, as in
+        `intercept.travel_times`. Cars with any boost left are assumed to boost all
+        the way; demolished cars get infinity.
+        """
+        target = self.ball_position if target is None else _points(target)
+        dx = target[0] - self.position[:, 0]
+        dy = target[1] - self.position[:, 1]
+        dist = np.sqrt(dx * dx + dy * dy)
+        fx, fy = self.forward[:, 0], self.forward[:, 1]
+        angle = np.arctan2(np.abs(fx * dy - fy * dx), fx * dx + fy * dy)
+        speed = self.velocity[:, 0] * dx + self.velocity[:, 1] * dy
+        speed /= np.maximum(dist, 1e-6)
+        time = np.asarray(travel_time(dist, angle, speed, self.boost > 0), dtype=float)
+        time[self.is_demolished] = np.inf
+        return time
+
+    def first_to_ball(self, mask: np.ndarray = None) -> int:
+        """Index of the car (optionally among `mask`) that reaches the ball first."""
+        time = self.time_to_ball()
+        if mask is not None:
+            time = np.where(mask, time, np.inf)
+        return int(time.argmin())
+
+    def nearest_cars(self, points) -> np.ndarray:
+        """For each of an (m, 3) array of points, the index of the nearest car (for
+        a single point, just the index)."""
+        return self.distances_to(points).argmin(axis=0)
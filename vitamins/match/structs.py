@@ -0,0 +1,121 @@
+"""vitamins.match.structs -- NumPy views of the RLBot ctypes structures.
+
+The dtypes here describe the memory layout of the ctypes structs that RLBot hands us,
+flattened so that every vector comes out as a (3,) float32 field. Combined with
+`np.frombuffer` this gives zero-copy array access to a whole struct at once, e.g.:
+
+    slices = np.frombuffer(prediction, SLICE_DTYPE, count=prediction.num_slices)
+    slices["location"]  # (n, 3) array, backed by the ctypes memory
+"""
+import ctypes
+
+import numpy as np
+from rlbot.utils.structures.ball_prediction_struct import Slice
+from rlbot.utils.structures.game_data_struct import (
+    BoostPadState,
+    GameTickPacket,
+    PlayerInfo,
+)
+
+VEC3_FORMAT = ("<f4", (3,))
+
+
+def field_offset(ctype, path: str) -> int:
+    """Byte offset of a (possibly nested, dot-separated) field in a ctypes struct."""
+    offset = 0
+    for name in path.split("."):
+        offset += getattr(ctype, name).offset
+        ctype = dict(ctype._fields_)[name]
+    return offset
+
+
+def flat_dtype(ctype, fields: dict) -> np.dtype:
+    """Build a structured dtype overlaying `ctype`. `fields` maps the name of each
+    output field to a (ctypes field path, numpy format) pair. Fields not mentioned
+    are skipped, but the itemsize always matches the ctypes struct.
+    """
+    return np.dtype(
+        {
+            "names": list(fields),
+            "formats": [fmt for _, fmt in fields.values()],
+            "offsets": [field_offset(ctype, path) for path, _ in fields.values()],
+            "itemsize": ctypes.sizeof(ctype),
+        }
+    )
+
+
+SLICE_DTYPE = flat_dtype(
+    Slice,
+    {
+        "time": ("game_seconds", "<f4"),
+        "location": ("physics.location", VEC3_FORMAT),
+        "rotation": ("physics.rotation", VEC3_FORMAT),
+        "velocity": ("physics.velocity", VEC3_FORMAT),
+        "angular_velocity": ("physics.angular_velocity", VEC3_FORMAT),
+    },
+)
+
+# Every field of a Slice is a float32, so a prediction can also be viewed as a plain
+# (n, 13) float32 table. `table.item(i, column)` is the cheapest way to read a single
+# value out of it.
+SLICE_FLOATS = SLICE_DTYPE.itemsize // 4
+LOCATION_COLUMN = SLICE_DTYPE.fields["location"][1] // 4
+VELOCITY_COLUMN = SLICE_DTYPE.fields["velocity"][1] // 4
+ANGULAR_VELOCITY_COLUMN = SLICE_DTYPE.fields["angular_velocity"][1] // 4
+TIME_COLUMN = SLICE_DTYPE.fields["time"][1] // 4
+
+
+# Likewise, the physics part of a PlayerInfo is its first 12 floats: location,
+# rotation (pitch, yaw, roll), velocity and angular velocity.
+PHYSICS_FLOATS = 12
+PLAYER_FLOATS = ctypes.sizeof(PlayerInfo) // 4
+BALL_PHYSICS_OFFSET = field_offset(GameTickPacket, "game_ball.physics")
+
+PLAYER_DTYPE = flat_dtype(
+    PlayerInfo,
+    {
+        "location": ("physics.location", VEC3_FORMAT),
+        "rotation": ("physics.rotation", VEC3_FORMAT),
+        "velocity": ("physics.velocity", VEC3_FORMAT),
+        "angular_velocity": ("physics.angular_velocity", VEC3_FORMAT),
+        "is_demolished": ("is_demolished", "?"),
+        "has_wheel_contact": ("has_wheel_contact", "?"),
+        "is_super_sonic": ("is_super_sonic", "?"),
+        "jumped": ("jumped", "?"),
+        "double_jumped": ("double_jumped", "?"),
+        "team": ("team", "u1"),
+        "boost": ("boost", "<i4"),
+    },
+)
+
+BOOST_STATE_DTYPE = flat_dtype(
+    BoostPadState, {"is_active": ("is_active", "?"), "timer": ("timer", "<f4")}
+)
+
+
+def slice_table(prediction) -> np.ndarray:
+    """Zero-copy (num_slices, SLICE_FLOATS) float32 view of a BallPrediction."""
+    count = prediction.num_slices * SLICE_FLOATS
+    return np.frombuffer(prediction, np.float32, count).reshape(-1, SLICE_FLOATS)
+
+
+def player_table(packet) -> np.ndarray:
+    """Zero-copy (num_cars, PLAYER_FLOATS) float32 view of the cars in a
+    GameTickPacket. Only the first PHYSICS_FLOATS columns hold floats."""
+    count = packet.num_cars * PLAYER_FLOATS
+    return np.frombuffer(packet.game_cars, np.float32, count).reshape(-1, PLAYER_FLOATS)
+
+
+def boost_states(packet) -> np.ndarray:
+    """Zero-copy BOOST_STATE_DTYPE view of the boost pads in a GameTickPacket."""
+    return np.frombuffer(packet.game_boosts, BOOST_STATE_DTYPE, packet.num_boost)
+
+
+def player_records(packet) -> np.ndarray:
+    """Zero-copy PLAYER_DTYPE view of the cars in a GameTickPacket."""
+    return np.frombuffer(packet.game_cars, PLAYER_DTYPE, packet.num_cars)
+
+
+def ball_physics(packet) -> np.ndarray:
+    """Zero-copy (PHYSICS_FLOATS,) float32 view of the ball physics in a packet."""
+    return np.frombuffer(packet, np.float32, PHYSICS_FLOATS, BALL_PHYSICS_OFFSET)
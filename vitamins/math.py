@@ -2,6 +2,8 @@
 from bisect import bisect_right
 from math import *
 
+import numpy as np
+
 
 def clamp(val, lo=-1, hi=1):
     return max(lo, min(val, hi))
@@ -19,8 +21,22 @@ def is_between_strict(lo, val, hi) -> bool:
     return (lo < val < hi) or (lo > val > hi)
 
 
+_NUMBERS = {float, int}
+
+
 class Lerp:
+    """Piecewise-linear interpolation through the points (x_list[i], y_list[i]).
+
+    Call it with a number or with an array (which is interpolated elementwise). Values
+    outside of the x range raise ValueError, unless `clamp` is set. If the x values
+    are evenly spaced, the segment is found in O(1) instead of by binary search;
+    `Lerp.sample` builds such a table from a function.
+    """
+
+    uniform_tolerance = 1e-9  # relative to the grid spacing
+
     def __init__(self, x_list, y_list, clamp=False):
+        x_list, y_list = list(x_list), list(y_list)
         if any(y - x <= 0 for x, y in zip(x_list, x_list[1:])):
             raise ValueError("x_list must be in strictly ascending order!")
         self.x_list = x_list
@@ -28,8 +44,27 @@ class Lerp:
         intervals = zip(x_list, x_list[1:], y_list, y_list[1:])
         self.slopes = [(y2 - y1) / (x2 - x1) for x1, x2, y1, y2 in intervals]
         self.clamp = clamp
+        self.xs = np.array(x_list, dtype=float)
+        self.ys = np.array(y_list, dtype=float)
+        self.slope_array = np.array(self.slopes, dtype=float)
+        self.last_segment = max(len(x_list) - 2, 0)
+        # Uniform grid: remember the spacing, so the segment is (x - x0) / step.
+        self.inv_step = 0.0
+        if len(x_list) > 1:
+            step = (x_list[-1] - x_list[0]) / (len(x_list) - 1)
+            grid = self.xs[0] + step * np.arange(len(x_list))
+            if np.abs(self.xs - grid).max() <= self.uniform_tolerance * step:
+                self.inv_step = 1 / step
+
+    @classmethod
+    def sample(cls, func, lo: float, hi: float, num: int = 1000, clamp=False):
+        """Tabulate `func` at `num` evenly spaced points from `lo` to `hi`."""
+        x_list = np.linspace(lo, hi, num).tolist()
+        return cls(x_list, [func(x) for x in x_list], clamp)
 
     def __call__(self, x):
+        if type(x) not in _NUMBERS and isinstance(x, (np.ndarray, list, tuple)):
+            return self.interpolate(np.asarray(x, dtype=float))
         if not (self.x_list[0] <= x <= self.x_list[-1]):
             if self.clamp:
                 x = clamp(x, self.x_list[0], self.x_list[-1])
@@ -37,5 +72,25 @@ class Lerp:
                 raise ValueError(f"x={x} out of bounds!")
         if x == self.x_list[-1]:
             return self.y_list[-1]
-        i = bisect_right(self.x_list, x) - 1
+        if self.inv_step:
+            i = min(int((x - self.x_list[0]) * self.inv_step), self.last_segment)
+        else:
+            i = bisect_right(self.x_list, x) - 1
         return self.y_list[i] + self.slopes[i] * (x - self.x_list[i])
+
+    def interpolate(self, x: np.ndarray) -> np.ndarray:
+        """Vectorized version of calling the Lerp."""
+        lo, hi = self.xs[0], self.xs[-1]
+        # np.minimum/maximum rather than np.clip, which has a lot more overhead per
+        # call; e.g. physics.travel_time does several lookups.
+        if self.clamp:
+            x = np.minimum(np.maximum(x, lo), hi)
+        elif x.size and (x.min() < lo or x.max() > hi):
+            raise ValueError(f"x out of bounds [{lo}, {hi}]!")
+        if self.inv_step:
+            i = ((x - lo) * self.inv_step).astype(np.intp)
+        else:
+            i = np.searchsorted(self.xs, x, "right") - 1
+        np.maximum(i, 0, out=i)
+        np.minimum(i, self.last_segment, out=i)
+        return self.ys.take(i) + self.slope_array.take(i) * (x - self.xs.take(i))
@@ -0,0 +1,180 @@
+"""vitamins.physics -- lookup tables for how cars accelerate and turn on the ground.
+
+Everything here accepts numbers or NumPy arrays, so travel times for thousands of
+candidate targets are a handful of table lookups:
+
+    time = travel_time(distances, angles, speed, boost=True)
+"""
+import numpy as np
+
+from vitamins.math import Lerp
+
+TICK = 1 / 120
+MAX_SPEED = 2300
+MAX_THROTTLE_SPEED = 1410
+BOOST_ACCELERATION = 991.667
+BRAKE_ACCELERATION = 3500
+COAST_ACCELERATION = 525
+TURN_MIN_SPEED = 500  # cars speed up while turning, so don't assume a slower turn
+
+THROTTLE_ACCELERATION = Lerp(
+    [0, 1400, MAX_THROTTLE_SPEED, MAX_SPEED], [1600, 160, 0, 0], clamp=True
+)
+# Curvature (1 / turning radius) at full steer, from measurements in game:
+CURVATURE = Lerp(
+    [0, 500, 1000, 1500, 1750, MAX_SPEED],
+    [0.0069, 0.00398, 0.00235, 0.001375, 0.0011, 0.00088],
+    clamp=True,
+)
+
+
+def _scalar(result):
+    return float(result) if np.ndim(result) == 0 else result
+
+
+def throttle_acceleration(speed):
+    """Acceleration at full throttle, without boost."""
+    return THROTTLE_ACCELERATION(abs(speed))
+
+
+def boost_acceleration(speed):
+    """Acceleration at full throttle while boosting."""
+    boost = np.where(np.abs(speed) < MAX_SPEED, BOOST_ACCELERATION, 0.0)
+    return _scalar(THROTTLE_ACCELERATION(abs(speed)) + boost)
+
+
+def curvature(speed):
+    return CURVATURE(abs(speed))
+
+
+def turn_radius(speed):
+    """Radius of the tightest circle a car can drive at `speed`."""
+    return 1 / CURVATURE(abs(speed))
+
+
+def yaw_rate(speed):
+    """Yaw rate (rad/s) at full steer and constant `speed`."""
+    return abs(speed) * CURVATURE(abs(speed))
+
+
+class DriveCurve:
+    """Straight-line driving at full throttle (and optionally boost) from rest,
+    precomputed as tables. Starting at speed `v0` is the same as joining the curve
+    at the time it reaches `v0`, so that covers every start speed below the top
+    speed; above it, the car is assumed to hold its speed.
+
+    All methods accept numbers or arrays (broadcast together).
+    """
+
+    duration: float = 6  # seconds of driving to tabulate, then constant speed
+    resolution: int = 1000  # points in each lookup table
+
+    def __init__(self, boost: bool):
+        self.boost = boost
+        accel = boost_acceleration if boost else throttle_acceleration
+        times, speeds, distances = [0.0], [0.0], [0.0]
+        v = d = 0.0
+        for i in range(1, int(self.duration / TICK) + 1):
+            v = min(v + accel(v) * TICK, MAX_SPEED)
+            d += v * TICK
+            times.append(i * TICK)
+            speeds.append(v)
+            distances.append(d)
+        self.top_speed = v
+        self.end_time = times[-1]
+        self.end_distance = d
+        self.speed = Lerp(times, speeds, clamp=True)
+        self.distance = Lerp(times, distances, clamp=True)
+        # Speed only increases until it tops out, so invert that part:
+        rising = next(
+            (i for i in range(1, len(speeds)) if speeds[i] <= speeds[i - 1]),
+            len(speeds),
+        )
+        rising_times = Lerp(speeds[:rising], times[:rising], clamp=True)
+        time_at_distance = Lerp(distances, times, clamp=True)
+        self.time_at_speed = Lerp.sample(
+            rising_times, 0, speeds[rising - 1], self.resolution, clamp=True
+        )
+        # distance(time_at_speed(v)) in one lookup, for `time_for`:
+        self.distance_at_speed = Lerp.sample(
+            lambda v: self.distance(rising_times(v)),
+            0,
+            speeds[rising - 1],
+            self.resolution,
+            clamp=True,
+        )
+        self.time_at_distance = Lerp.sample(
+            time_at_distance, 0, d, self.resolution, clamp=True
+        )
+
+    def _start_time(self, start_speed):
+        """Time at which the curve passes `start_speed`."""
+        return self.time_at_speed(np.clip(start_speed, 0, self.top_speed))
+
+    def time_for(self, distance, start_speed=0.0):
+        """Time to drive `distance`, starting at `start_speed`."""
+        distance = np.maximum(distance, 0)
+        v0 = np.minimum(np.maximum(start_speed, 0), self.top_speed)
+        target = self.distance_at_speed(v0) + distance
+        time = self.time_at_distance(np.minimum(target, self.end_distance))
+        time -= self.time_at_speed(v0)
+        time += np.maximum(target - self.end_distance, 0) / self.top_speed
+        above = np.asarray(start_speed) >= self.top_speed
+        if above.any():
+            cruising = distance / np.maximum(start_speed, 1e-6)
+            time = np.where(above, cruising, time)
+        return _scalar(time)
+
+    def distance_in(self, time, start_speed=0.0):
+        """Distance covered in `time`, starting at `start_speed`."""
+        time = np.maximum(time, 0)
+        t0 = self._start_time(start_speed)
+        t1 = t0 + time
+        on_curve = self.distance(np.minimum(t1, self.end_time)) - self.distance(t0)
+        beyond = np.maximum(t1 - self.end_time, 0) * self.top_speed
+        cruising = np.asarray(start_speed) * time
+        above = np.asarray(start_speed) >= self.top_speed
+        return _scalar(np.where(above, cruising, on_curve + beyond))
+
+    def speed_after(self, time, start_speed=0.0):
+        """Speed after accelerating for `time`, starting at `start_speed`."""
+        t1 = self._start_time(start_speed) + np.maximum(time, 0)
+        speed = self.speed(np.minimum(t1, self.end_time))
+        return _scalar(np.maximum(speed, start_speed))
+
+
+THROTTLE_CURVE = DriveCurve(boost=False)
+BOOST_CURVE = DriveCurve(boost=True)
+
+
+# Seconds per radian of turning at full steer, by speed (up to the top speed), as
+# one uniform table:
+TURN_TIME = Lerp.sample(
+    lambda v: 1 / yaw_rate(max(v, TURN_MIN_SPEED)), 0, MAX_SPEED, 1000, clamp=True
+)
+
+
+def turn_time(angle, speed):
+    """Rough time to turn through `angle` (rad) at full steer, from `speed`."""
+    return _scalar(np.abs(angle) * TURN_TIME(np.abs(speed)))
+
+
+def travel_time(distance, angle, speed, boost=True):
+    """Rough time for a car to drive to a target on the ground `distance` away and
+    `angle` off its heading: turn toward it at full steer, then drive straight at
+    full throttle, boosting if `boost` (a bool or an array of them). `speed` is the
+    car's speed toward the target."""
+    speed = np.asarray(speed, dtype=float)
+    if np.ndim(boost) == 0:
+        curve = BOOST_CURVE if boost else THROTTLE_CURVE
+        straight = curve.time_for(distance, speed)
+    else:
+        # Look up each element in its own curve only:
+        distance, speed, boost = np.broadcast_arrays(distance, speed, boost)
+        straight = np.empty(distance.shape)
+        straight[boost] = BOOST_CURVE.time_for(distance[boost], speed[boost])
+        no_boost = ~boost
+        straight[no_boost] = THROTTLE_CURVE.time_for(
+            distance[no_boost], speed[no_boost]
+        )
+    return _scalar(turn_time(angle, speed) + straight)
@@ -0,0 +1,228 @@
+"""vitamins.replay -- record packets from a live match and replay them headless.
+
+Recording, from inside an Agent (see `Agent.start_recording`):
+
+    recorder = PacketRecorder("kickoff.rec", agent.get_field_info())
+    recorder.record(packet, Match.current_prediction.prediction)  # every tick
+    recorder.close()
+
+Replaying, with no game running:
+
+    stats = replay(MyAgent("bot", 0, 0), "kickoff.rec")
+    print(stats)
+
+or from the command line:
+
+    python -m vitamins.replay kickoff.rec mybot.agent:MyAgent
+"""
+import argparse
+import ctypes
+import importlib
+from time import perf_counter
+
+import numpy as np
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction
+from rlbot.utils.structures.game_data_struct import (
+    FieldInfoPacket,
+    GameTickPacket,
+    PlayerInfo,
+)
+
+from vitamins.util import perf_counter_ns
+
+MAGIC = b"RAVREC01"
+
+# Everything in a GameTickPacket after the car array:
+PACKET_TAIL_OFFSET = GameTickPacket.num_cars.offset
+PACKET_TAIL_SIZE = ctypes.sizeof(GameTickPacket) - PACKET_TAIL_OFFSET
+PREDICTION_SIZE = ctypes.sizeof(BallPrediction)
+FIELD_INFO_SIZE = ctypes.sizeof(FieldInfoPacket)
+
+
+class RecordingHeader(ctypes.Structure):
+    _fields_ = [
+        ("magic", ctypes.c_char * 8),
+        ("max_cars", ctypes.c_uint32),
+        ("packet_tail_size", ctypes.c_uint32),
+        ("prediction_size", ctypes.c_uint32),
+        ("field_info_size", ctypes.c_uint32),
+    ]
+
+
+HEADER_SIZE = ctypes.sizeof(RecordingHeader) + FIELD_INFO_SIZE
+
+
+def record_dtype(max_cars: int) -> np.dtype:
+    """Layout of one tick in a recording. Only the first `max_cars` cars of the
+    packet are stored, which keeps records small (the packet has room for 64)."""
+    return np.dtype(
+        [
+            ("cars", f"V{max_cars * ctypes.sizeof(PlayerInfo)}"),
+            ("packet_tail", f"V{PACKET_TAIL_SIZE}"),
+            ("prediction", f"V{PREDICTION_SIZE}"),
+        ]
+    )
+
+
+class PacketRecorder:
+    """Appends GameTickPackets and BallPredictions to a recording file, one record
+    per tick. The FieldInfoPacket doesn't change during a match, so it is stored
+    once, in the header.
+    """
+
+    def __init__(self, path: str, field_info: FieldInfoPacket, max_cars: int = 8):
+        self.max_cars = max_cars
+        self.cars_size = max_cars * ctypes.sizeof(PlayerInfo)
+        self.ticks = 0
+        self.file = open(path, "wb")
+        header = RecordingHeader(
+            MAGIC, max_cars, PACKET_TAIL_SIZE, PREDICTION_SIZE, FIELD_INFO_SIZE
+        )
+        self.file.write(bytes(header))
+        self.file.write(bytes(field_info))
+
+    def record(self, packet: GameTickPacket, prediction: BallPrediction):
+        if packet.num_cars > self.max_cars:
+            raise ValueError(
+                f"Packet has {packet.num_cars} cars, recorder max is {self.max_cars}."
+            )
+        address = ctypes.addressof(packet)
+        self.file.write(ctypes.string_at(address, self.cars_size))
+        self.file.write(
+            ctypes.string_at(address + PACKET_TAIL_OFFSET, PACKET_TAIL_SIZE)
+        )
+        self.file.write(bytes(prediction))
+        self.ticks += 1
+
+    def close(self):
+        self.file.close()
+
+
+class Recording:
+    """Memory-mapped recording made by a PacketRecorder."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            header = RecordingHeader.from_buffer_copy(
+                file.read(ctypes.sizeof(RecordingHeader))
+            )
+        if header.magic != MAGIC:
+            raise ValueError(f"{path} is not a packet recording.")
+        if (
+            header.packet_tail_size != PACKET_TAIL_SIZE
+            or header.prediction_size != PREDICTION_SIZE
+            or header.field_info_size != FIELD_INFO_SIZE
+        ):
+            raise ValueError(f"{path} was recorded with different RLBot structs.")
+        self.max_cars = header.max_cars
+        self.cars_size = self.max_cars * ctypes.sizeof(PlayerInfo)
+        # Copy-on-write, so ctypes can wrap the mapped memory without copying:
+        self.data = np.memmap(path, np.uint8, mode="c")
+        self.field_info = FieldInfoPacket.from_buffer(
+            self.data, ctypes.sizeof(RecordingHeader)
+        )
+        self.records = np.memmap(
+            path, record_dtype(self.max_cars), mode="c", offset=HEADER_SIZE
+        )
+        self.record_size = self.records.dtype.itemsize
+        self._packet = GameTickPacket()
+
+    def __len__(self):
+        return len(self.records)
+
+    def packet(self, i: int) -> GameTickPacket:
+        """The packet for tick `i`. The same GameTickPacket object is reused (and
+        overwritten) on every call, like RLBot does."""
+        offset = HEADER_SIZE + i * self.record_size
+        address = ctypes.addressof(self._packet)
+        source = self.data[offset : offset + self.cars_size + PACKET_TAIL_SIZE]
+        ctypes.memmove(address, source.ctypes.data, self.cars_size)
+        ctypes.memmove(
+            address + PACKET_TAIL_OFFSET,
+            source.ctypes.data + self.cars_size,
+            PACKET_TAIL_SIZE,
+        )
+        return self._packet
+
+    def prediction(self, i: int) -> BallPrediction:
+        """The ball prediction for tick `i`, backed directly by the mapped file."""
+        offset = HEADER_SIZE + i * self.record_size + self.cars_size + PACKET_TAIL_SIZE
+        return BallPrediction.from_buffer(self.data, offset)
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+class StubRenderer:
+    """Accepts every RenderingManager call and does nothing."""
+
+    def __getattr__(self, name):
+        return _noop
+
+
+class ReplayStats:
+    """Timing results of a replay. `latencies` has one entry per tick, in ms."""
+
+    def __init__(self, latencies: np.ndarray, seconds: float):
+        self.latencies = latencies
+        self.ticks = len(latencies)
+        self.seconds = seconds
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.seconds if self.seconds else 0.0
+
+    def percentile(self, pct: float) -> float:
+        return float(np.percentile(self.latencies, pct)) if self.ticks else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.ticks} ticks in {self.seconds:.2f}s "
+            f"({self.ticks_per_second:.0f} ticks/s), latency ms: "
+            f"p50 {self.percentile(50):.3f}, p95 {self.percentile(95):.3f}, "
+            f"p99 {self.percentile(99):.3f}, max {self.percentile(100):.3f}"
+        )
+
+
+def replay(agent, recording, max_ticks: int = None) -> ReplayStats:
+    """Feed a recording through `agent.get_output` as fast as possible.
+
+    `agent` is an instance of an Agent subclass. It gets a StubRenderer, and its
+    `get_field_info` and `get_ball_prediction_struct` are replaced with ones that
+    return the recorded structs for the current tick.
+    """
+    if not isinstance(recording, Recording):
+        recording = Recording(recording)
+    ticks = len(recording) if max_ticks is None else min(max_ticks, len(recording))
+    tick = 0
+    agent.renderer = StubRenderer()
+    agent.get_field_info = lambda: recording.field_info
+    agent.get_ball_prediction_struct = lambda: recording.prediction(tick)
+    latencies = np.zeros(ticks)
+    start = perf_counter()
+    for tick in range(ticks):
+        packet = recording.packet(tick)
+        tick_start = perf_counter_ns()
+        agent.get_output(packet)
+        latencies[tick] = (perf_counter_ns() - tick_start) / 1e6
+    return ReplayStats(latencies, perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a packet recording.")
+    parser.add_argument("recording", help="file made by PacketRecorder")
+    parser.add_argument("agent", help="agent class, as module.path:ClassName")
+    parser.add_argument("--index", type=int, default=0, help="car index of the bot")
+    parser.add_argument("--ticks", type=int, default=None, help="max ticks to run")
+    args = parser.parse_args()
+    module_name, class_name = args.agent.split(":")
+    agent_class = getattr(importlib.import_module(module_name), class_name)
+    recording = Recording(args.recording)
+    team = recording.packet(0).game_cars[args.index].team
+    agent = agent_class(class_name, team, args.index)
+    print(replay(agent, recording, args.ticks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""vitamins.sim -- headless stand-in for the game, producing synthetic packets.
+
+This is not a physics engine. The ball flies ballistically and bounces off the
+planes of the `Field`, cars drive around on the ground with simple kinematics, and
+a car that runs into the ball knocks it away. That is enough to exercise `Match`,
+`BallPredictor` and friends with many cars and long horizons, e.g.:
+
+    sim = Simulator(num_cars=8, seed=1)
+    agent = sim.agent(0)
+    Match.initialize(agent, sim.packet)
+    for _ in range(1200):
+        sim.step()
+        Match.update(sim.packet)
+
+Scenarios can also be recorded to files for `vitamins.replay`, in parallel:
+
+    python -m vitamins.sim scenarios/ --scenarios 100 --cars 6 --ticks 1200
+"""
+import argparse
+import math
+import os
+from multiprocessing import Pool
+from typing import List
+
+import numpy as np
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction, MAX_SLICES
+from rlbot.utils.structures.game_data_struct import FieldInfoPacket, GameTickPacket
+
+from vitamins.geometry import angle_diff
+from vitamins.match.ball import Ball
+from vitamins.match.field import Field
+from vitamins.match.prediction import SQRT_HALF
+from vitamins.match.structs import (
+    ANGULAR_VELOCITY_COLUMN as AV,
+    LOCATION_COLUMN as LOC,
+    PHYSICS_FLOATS,
+    TIME_COLUMN,
+    VELOCITY_COLUMN as VEL,
+    ball_physics,
+    boost_states,
+    player_records,
+    player_table,
+    slice_table,
+)
+from vitamins.physics import (
+    BOOST_ACCELERATION,
+    BRAKE_ACCELERATION,
+    COAST_ACCELERATION,
+    MAX_SPEED,
+    TICK,
+    curvature,
+    throttle_acceleration,
+)
+from vitamins.replay import PacketRecorder
+
+PREDICTION_STRIDE = 2  # RLBot's prediction has one slice per 1/60 s
+GRAVITY = 650
+BALL_DRAG = 0.0305
+BALL_RESTITUTION = 0.6
+BALL_BOUNCE_FRICTION = 0.2  # fraction of tangential speed lost per bounce
+ROLL_THRESHOLD = 40  # slower impacts than this just stop the ball going into a plane
+
+CAR_HEIGHT = 17.01
+CAR_REACH = 70  # distance from the car's center to the ball's surface for a touch
+CAR_HITBOX = (118.01, 84.2, 36.16)  # Octane
+BOOST_PER_SECOND = 33.3
+
+BIG_PAD_RADIUS = 208
+SMALL_PAD_RADIUS = 144
+BIG_PAD_RESPAWN = 10
+SMALL_PAD_RESPAWN = 4
+
+# Standard soccar boost pads, in the order RLBot reports them.
+BOOST_PADS = [
+    (0.0, -4240.0, 70.0, False),
+    (-1792.0, -4184.0, 70.0, False),
+    (1792.0, -4184.0, 70.0, False),
+    (-3072.0, -4096.0, 73.0, True),
+    (3072.0, -4096.0, 73.0, True),
+    (-940.0, -3308.0, 70.0, False),
+    (940.0, -3308.0, 70.0, False),
+    (0.0, -2816.0, 70.0, False),
+    (-3584.0, -2484.0, 70.0, False),
+    (3584.0, -2484.0, 70.0, False),
+    (-1788.0, -2300.0, 70.0, False),
+    (1788.0, -2300.0, 70.0, False),
+    (-2048.0, -1036.0, 70.0, False),
+    (0.0, -1024.0, 70.0, False),
+    (2048.0, -1036.0, 70.0, False),
+    (-3584.0, 0.0, 73.0, True),
+    (-1024.0, 0.0, 70.0, False),
+    (1024.0, 0.0, 70.0, False),
+    (3584.0, 0.0, 73.0, True),
+    (-2048.0, 1036.0, 70.0, False),
+    (0.0, 1024.0, 70.0, False),
+    (2048.0, 1036.0, 70.0, False),
+    (-1788.0, 2300.0, 70.0, False),
+    (1788.0, 2300.0, 70.0, False),
+    (-3584.0, 2484.0, 70.0, False),
+    (3584.0, 2484.0, 70.0, False),
+    (0.0, 2816.0, 70.0, False),
+    (-940.0, 3310.0, 70.0, False),
+    (940.0, 3308.0, 70.0, False),
+    (-3072.0, 4096.0, 73.0, True),
+    (3072.0, 4096.0, 73.0, True),
+    (-1792.0, 4184.0, 70.0, False),
+    (1792.0, 4184.0, 70.0, False),
+    (0.0, 4240.0, 70.0, False),
+]
+
+
+def field_planes():
+    """Inward-facing planes bounding the field, as (normals, offsets) arrays such
+    that `normals @ point + offsets` is the distance of `point` from each plane.
+    The goals are not modelled: the end walls are solid.
+    """
+    normals = [(0, 0, 1), (0, 0, -1)]
+    offsets = [0, Field.to_ceiling]
+    for sign in (1, -1):
+        normals += [(-sign, 0, 0), (0, -sign, 0)]
+        offsets += [Field.to_side_wall, Field.to_end_wall]
+    for sx in (1, -1):
+        for sy in (1, -1):
+            normals.append((-sx * SQRT_HALF, -sy * SQRT_HALF, 0))
+            offsets.append(Field.to_corner)
+    return np.array(normals, dtype=float), np.array(offsets, dtype=float)
+
+
+FIELD_PLANES = field_planes()
+
+
+def step_balls(position: np.ndarray, velocity: np.ndarray, dt: float = TICK):
+    """Advance (n, 3) arrays of ball positions and velocities by `dt`, in place."""
+    velocity[:, 2] -= GRAVITY * dt
+    velocity *= 1 - BALL_DRAG * dt
+    position += velocity * dt
+    normals, offsets = FIELD_PLANES
+    dist = position @ normals.T + offsets
+    for i, j in zip(*np.nonzero(dist < Ball.radius)):
+        normal = normals[j]
+        position[i] += (Ball.radius - dist[i, j]) * normal
+        normal_speed = velocity[i] @ normal
+        if normal_speed >= 0:
+            continue
+        tangent = velocity[i] - normal_speed * normal
+        if normal_speed < -ROLL_THRESHOLD:
+            tangent *= 1 - BALL_BOUNCE_FRICTION
+            velocity[i] = tangent - BALL_RESTITUTION * normal_speed * normal
+        else:
+            velocity[i] = tangent
+
+
+def simulate_ball(position, velocity, steps: int, dt: float = TICK):
+    """Trajectory of a single ball: (steps + 1, 3) arrays of positions and
+    velocities, starting with the given state."""
+    positions = np.empty((steps + 1, 3))
+    velocities = np.empty((steps + 1, 3))
+    pos = np.array(position, dtype=float).reshape(1, 3)
+    vel = np.array(velocity, dtype=float).reshape(1, 3)
+    positions[0], velocities[0] = pos, vel
+    for i in range(1, steps + 1):
+        step_balls(pos, vel, dt)
+        positions[i], velocities[i] = pos, vel
+    return positions, velocities
+
+
+def field_info() -> FieldInfoPacket:
+    info = FieldInfoPacket()
+    info.num_boosts = len(BOOST_PADS)
+    for pad, (x, y, z, is_big) in zip(info.boost_pads, BOOST_PADS):
+        pad.location.x, pad.location.y, pad.location.z = x, y, z
+        pad.is_full_boost = is_big
+    return info
+
+
+class SimAgent:
+    """Just enough of an RLBot agent for `Match.initialize`, backed by a Simulator."""
+
+    def __init__(self, sim: "Simulator", index: int):
+        self.sim = sim
+        self.index = index
+        self.team = index % 2
+
+    def get_field_info(self):
+        return self.sim.field_info
+
+    def get_ball_prediction_struct(self):
+        return self.sim.ball_prediction()
+
+
+class Simulator:
+    """Cars and a ball on a soccar field. Cars on team 0 have even indices.
+
+    `throttle`, `steer` and `boosting` hold the controls of every car; they are
+    overwritten each step unless `autopilot` is False (by default every car chases
+    the ball). `packet` is a GameTickPacket that is updated in place by `step`.
+    """
+
+    horizon: float = 6  # seconds of ball trajectory kept ahead of the current time
+    autopilot: bool = True
+
+    def __init__(self, num_cars: int = 6, seed: int = 0, time: float = 10.0):
+        rng = np.random.default_rng(seed)
+        self.num_cars = num_cars
+        self.time = time
+        self.position = np.zeros((num_cars, 3))
+        self.position[:, 0] = rng.uniform(-3500, 3500, num_cars)
+        self.position[:, 1] = rng.uniform(-4500, 4500, num_cars)
+        self.position[:, 2] = CAR_HEIGHT
+        self.yaw = rng.uniform(-math.pi, math.pi, num_cars)
+        self.speed = rng.uniform(0, 1500, num_cars)
+        self.yaw_rate = np.zeros(num_cars)
+        self.boost = rng.uniform(0, 100, num_cars)
+        self.throttle = np.ones(num_cars)
+        self.steer = np.zeros(num_cars)
+        self.boosting = np.zeros(num_cars, dtype=bool)
+
+        self.pads = np.array([pad[:3] for pad in BOOST_PADS])
+        self.pad_is_big = np.array([pad[3] for pad in BOOST_PADS])
+        self.pad_radius = np.where(self.pad_is_big, BIG_PAD_RADIUS, SMALL_PAD_RADIUS)
+        self.pad_respawn = np.where(
+            self.pad_is_big, BIG_PAD_RESPAWN, SMALL_PAD_RESPAWN
+        )
+        self.pad_active = rng.random(len(self.pads)) < 0.7
+        timers = rng.uniform(0, SMALL_PAD_RESPAWN, len(self.pads))
+        self.pad_timer = np.where(self.pad_active, 0.0, timers)
+
+        ball_position = (
+            rng.uniform(-3000, 3000),
+            rng.uniform(-4000, 4000),
+            rng.uniform(Ball.radius, 1200),
+        )
+        ball_velocity = rng.uniform(-1500, 1500, 3)
+        self.ball_angular_velocity = rng.uniform(-3, 3, 3)
+        self.plan_ball(ball_position, ball_velocity)
+
+        self.field_info = field_info()
+        self.packet = GameTickPacket()
+        self.prediction = BallPrediction()
+        self.init_packet()
+        self.write_packet()
+
+    def agent(self, index: int = 0) -> SimAgent:
+        return SimAgent(self, index)
+
+    @property
+    def ball_position(self) -> np.ndarray:
+        return self.ball_path[self.ball_step]
+
+    @property
+    def ball_velocity(self) -> np.ndarray:
+        return self.ball_velocities[self.ball_step]
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self.forward * self.speed[:, None]
+
+    @property
+    def forward(self) -> np.ndarray:
+        forward = np.zeros((self.num_cars, 3))
+        forward[:, 0] = np.cos(self.yaw)
+        forward[:, 1] = np.sin(self.yaw)
+        return forward
+
+    def plan_ball(self, position, velocity):
+        """Precompute the ball's trajectory from the given state. It only changes
+        when a car touches the ball, so predictions are slices of this path."""
+        steps = 2 * int(self.horizon / TICK)
+        self.ball_path, self.ball_velocities = simulate_ball(position, velocity, steps)
+        self.ball_step = 0
+
+    def step(self, dt: float = TICK):
+        self.time += dt
+        if self.autopilot:
+            self.chase_ball()
+        self.step_cars(dt)
+        self.ball_step += 1
+        if self.ball_step + self.horizon / TICK >= len(self.ball_path) - 1:
+            self.plan_ball(self.ball_position, self.ball_velocity)
+        self.touch_ball()
+        self.pick_up_boost(dt)
+        self.write_packet()
+
+    def chase_ball(self):
+        """Drive every car straight at the ball, boosting when facing it."""
+        offset = self.ball_position - self.position
+        angle = angle_diff(self.yaw, np.arctan2(offset[:, 1], offset[:, 0]))
+        self.steer[:] = np.clip(3 * angle, -1, 1)
+        self.throttle[:] = 1
+        self.boosting[:] = np.abs(angle) < 0.3
+
+    def step_cars(self, dt: float):
+        speed = self.speed
+        accel = throttle_acceleration(speed) * self.throttle
+        braking = speed * self.throttle < 0
+        accel[braking] = BRAKE_ACCELERATION * self.throttle[braking]
+        coasting = self.throttle == 0
+        accel[coasting] = -np.sign(speed[coasting]) * COAST_ACCELERATION
+        boosting = self.boosting & (self.boost > 0)
+        accel[boosting] += BOOST_ACCELERATION
+        self.boost[boosting] = np.maximum(
+            self.boost[boosting] - BOOST_PER_SECOND * dt, 0
+        )
+        speed += accel * dt
+        np.clip(speed, -MAX_SPEED, MAX_SPEED, out=speed)
+
+        self.yaw_rate = self.steer * curvature(speed) * speed
+        self.yaw = angle_diff(0, self.yaw + self.yaw_rate * dt)
+        self.position += self.velocity * dt
+
+        # Cars stop dead at the walls:
+        margin = CAR_HITBOX[0] / 2
+        limits = (Field.to_side_wall - margin, Field.to_end_wall - margin)
+        for axis, limit in enumerate(limits):
+            out = np.abs(self.position[:, axis]) > limit
+            self.position[out, axis] = np.copysign(limit, self.position[out, axis])
+            speed[out] = 0
+
+    def touch_ball(self):
+        offset = self.ball_position - self.position
+        dist = np.linalg.norm(offset, axis=1)
+        direction = offset / np.maximum(dist, 1e-6)[:, None]
+        closing = np.einsum("ij,ij->i", self.velocity - self.ball_velocity, direction)
+        # Only cars moving into the ball touch it, so a touch happens once:
+        touching = np.nonzero((dist < Ball.radius + CAR_REACH) & (closing > 0))[0]
+        if len(touching) == 0:
+            return
+        index = touching[dist[touching].argmin()]
+        direction = direction[index]
+        velocity = self.ball_velocity + direction * (1.5 * closing[index] + 300)
+        self.plan_ball(self.ball_position, velocity)
+        touch = self.packet.game_ball.latest_touch
+        touch.player_index = int(index)
+        touch.team = int(index % 2)
+        touch.time_seconds = self.time
+        hit = self.ball_position - direction * Ball.radius
+        touch.hit_location.x, touch.hit_location.y, touch.hit_location.z = hit
+        touch.hit_normal.x, touch.hit_normal.y, touch.hit_normal.z = direction
+
+    def pick_up_boost(self, dt: float):
+        self.pad_timer[~self.pad_active] += dt
+        respawned = ~self.pad_active & (self.pad_timer >= self.pad_respawn)
+        self.pad_active[respawned] = True
+        self.pad_timer[respawned] = 0
+        offset = self.pads[None, :, :2] - self.position[:, None, :2]
+        in_range = np.einsum("ijk,ijk->ij", offset, offset) < self.pad_radius ** 2
+        in_range &= self.pad_active[None, :] & (self.boost < 100)[:, None]
+        for pad in np.nonzero(in_range.any(axis=0))[0]:
+            car = in_range[:, pad].argmax()
+            amount = 100 if self.pad_is_big[pad] else 12
+            self.boost[car] = min(self.boost[car] + amount, 100)
+            self.pad_active[pad] = False
+
+    def init_packet(self):
+        """Fill in the parts of the packet that don't change."""
+        packet = self.packet
+        packet.num_cars = self.num_cars
+        packet.num_boost = len(self.pads)
+        packet.game_info.is_round_active = True
+        packet.game_info.world_gravity_z = -GRAVITY
+        packet.game_info.game_speed = 1.0
+        for i in range(self.num_cars):
+            car = packet.game_cars[i]
+            car.name = f"sim{i}"
+            car.team = i % 2
+            car.is_bot = True
+            car.spawn_id = i + 1
+            car.hitbox.length, car.hitbox.width, car.hitbox.height = CAR_HITBOX
+            car.hitbox_offset.x, car.hitbox_offset.z = 13.88, 20.75
+
+    def write_packet(self):
+        packet = self.packet
+        packet.game_info.seconds_elapsed = self.time
+        packet.game_info.game_time_remaining = max(300 - self.time, 0)
+        physics = player_table(packet)[:, :PHYSICS_FLOATS]
+        physics[:, 0:3] = self.position
+        physics[:, 3:6] = 0
+        physics[:, 4] = self.yaw
+        physics[:, 6:9] = self.velocity
+        physics[:, 9:12] = 0
+        physics[:, 11] = self.yaw_rate
+        cars = player_records(packet)
+        cars["boost"] = self.boost
+        cars["has_wheel_contact"] = True
+        cars["is_super_sonic"] = np.abs(self.speed) > 2200
+        pads = boost_states(packet)
+        pads["is_active"] = self.pad_active
+        pads["timer"] = self.pad_timer
+        ball = ball_physics(packet)
+        ball[0:3] = self.ball_position
+        ball[3:6] = 0
+        ball[6:9] = self.ball_velocity
+        ball[9:12] = self.ball_angular_velocity
+
+    def ball_prediction(self, num_slices: int = MAX_SLICES) -> BallPrediction:
+        """Prediction of the ball from the current time, in the same (reused)
+        BallPrediction object every call, like RLBot does."""
+        prediction = self.prediction
+        prediction.num_slices = num_slices
+        table = slice_table(prediction)
+        start = self.ball_step
+        path = slice(start, start + num_slices * PREDICTION_STRIDE, PREDICTION_STRIDE)
+        table[:, LOC : LOC + 3] = self.ball_path[path]
+        table[:, VEL : VEL + 3] = self.ball_velocities[path]
+        table[:, AV : AV + 3] = self.ball_angular_velocity
+        table[:, TIME_COLUMN] = self.time + np.arange(num_slices) * (
+            PREDICTION_STRIDE * TICK
+        )
+        return prediction
+
+
+def run_scenario(seed: int, num_cars: int = 6, ticks: int = 1200):
+    """Yield (packet, ball prediction) for every tick of a simulated scenario. Both
+    objects are reused, so copy them if they need to outlive the iteration."""
+    sim = Simulator(num_cars, seed)
+    for _ in range(ticks):
+        sim.step()
+        yield sim.packet, sim.ball_prediction()
+
+
+def record_scenario(path: str, seed: int, num_cars: int = 6, ticks: int = 1200) -> str:
+    """Record a simulated scenario to `path`, for `vitamins.replay`."""
+    recorder = PacketRecorder(path, field_info(), max(num_cars, 1))
+    for packet, prediction in run_scenario(seed, num_cars, ticks):
+        recorder.record(packet, prediction)
+    recorder.close()
+    return path
+
+
+def record_scenarios(
+    directory: str,
+    seeds,
+    num_cars: int = 6,
+    ticks: int = 1200,
+    processes: int = None,
+) -> List[str]:
+    """Record one scenario per seed into `directory`, using a pool of processes."""
+    os.makedirs(directory, exist_ok=True)
+    jobs = [
+        (os.path.join(directory, f"scenario_{seed}.rec"), seed, num_cars, ticks)
+        for seed in seeds
+    ]
+    with Pool(processes) as pool:
+        return pool.starmap(record_scenario, jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record simulated scenarios.")
+    parser.add_argument("directory", help="where to put the recordings")
+    parser.add_argument("--scenarios", type=int, default=10)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--cars", type=int, default=6)
+    parser.add_argument("--ticks", type=int, default=1200)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+    seeds = range(args.first_seed, args.first_seed + args.scenarios)
+    paths = record_scenarios(
+        args.directory, seeds, args.cars, args.ticks, args.processes
+    )
+    print(f"Recorded {len(paths)} scenarios in {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
 """vitamins.util -- utility routines."""
+import csv
+import json
+from collections import deque
+from math import log10
 from time import perf_counter
 from platform import node
 from hashlib import md5
@@ -47,9 +51,218 @@ class TickStats:
         self.total_all += tick_ms
         self.tick += 1
         if self.tick % self.interval == 0:
-            out = f"Avg {self.name}: {self.total_all/self.tick:.2f}{self.unit}, "
-            out += f"last {self.interval}: "
-            out += f"{self.total_interval/self.interval:.2f}{self.unit}"
-            print(out)
+            self.report()
             self.total_interval = 0
 
+    def report(self):
+        """Called every `interval` samples."""
+        out = f"Avg {self.name}: {self.total_all/self.tick:.2f}{self.unit}, "
+        out += f"last {self.interval}: "
+        out += f"{self.total_interval/self.interval:.2f}{self.unit}"
+        print(out)
+
+
+class StageStats(TickStats):
+    """TickStats that also keeps a histogram of the samples, so that percentiles can
+    be reported. Memory use is fixed: the histogram has log-spaced bins from
+    `min_ms` to `max_ms`, and the summaries of the last `history` windows of
+    `interval` samples are kept.
+    """
+
+    bins_per_decade = 20
+    min_ms = 1e-3
+    max_ms = 1e3
+
+    def __init__(self, name: str, interval=120, startup=0, history=60):
+        super().__init__(name, "ms", interval, startup)
+        self.num_bins = int(log10(self.max_ms / self.min_ms) * self.bins_per_decade) + 1
+        self.window = [0] * self.num_bins
+        self.window_max = 0.0
+        self.overall = [0] * self.num_bins
+        self.overall_max = 0.0
+        self.windows = deque(maxlen=history)
+
+    def update(self, tick_ms):
+        if self.startup <= 0:
+            if tick_ms > self.min_ms:
+                i = int(log10(tick_ms / self.min_ms) * self.bins_per_decade) + 1
+                i = min(i, self.num_bins - 1)
+            else:
+                i = 0
+            self.window[i] += 1
+            self.overall[i] += 1
+            if tick_ms > self.window_max:
+                self.window_max = tick_ms
+        super().update(tick_ms)
+
+    def report(self):
+        self.windows.append(
+            self.summarize(
+                self.window, self.total_interval, self.interval, self.window_max
+            )
+        )
+        self.overall_max = max(self.overall_max, self.window_max)
+        self.window = [0] * self.num_bins
+        self.window_max = 0.0
+
+    def bin_edge(self, i: int) -> float:
+        """Upper edge of histogram bin `i`, in ms."""
+        return self.min_ms * 10 ** (i / self.bins_per_decade)
+
+    def percentile(self, histogram: list, count: int, pct: float) -> float:
+        """Approximate percentile: the upper edge of the bin it falls into."""
+        target = count * pct / 100
+        seen = 0
+        for i, n in enumerate(histogram):
+            seen += n
+            if n and seen >= target:
+                return self.bin_edge(i)
+        return 0.0
+
+    def summarize(self, histogram, total, count, max_ms) -> dict:
+        if count == 0:
+            return dict(count=0, mean=0.0, p50=0.0, p95=0.0, p99=0.0, max=0.0)
+        return dict(
+            count=count,
+            mean=total / count,
+            p50=min(self.percentile(histogram, count, 50), max_ms),
+            p95=min(self.percentile(histogram, count, 95), max_ms),
+            p99=min(self.percentile(histogram, count, 99), max_ms),
+            max=max_ms,
+        )
+
+    def summary(self) -> dict:
+        """Statistics over every sample so far."""
+        max_ms = max(self.overall_max, self.window_max)
+        return self.summarize(self.overall, self.total_all, self.tick, max_ms)
+
+    def latest(self) -> dict:
+        """Statistics over the last complete window (or the current one, if no
+        window has been completed yet)."""
+        if self.windows:
+            return self.windows[-1]
+        count = self.tick % self.interval
+        return self.summarize(self.window, self.total_interval, count, self.window_max)
+
+
+class _Section:
+    """Context manager that times one named stage of a TickProfiler. It can be
+    re-entered (e.g. a recursive stage): each `with` times itself."""
+
+    __slots__ = ("stats", "starts")
+
+    def __init__(self, stats: StageStats):
+        self.stats = stats
+        self.starts = []
+
+    def __enter__(self):
+        self.starts.append(perf_counter_ns())
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.update((perf_counter_ns() - self.starts.pop()) / 1e6)
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_null_section = _NullSection()
+
+
+class TickProfiler:
+    """Times the stages of each tick. Usage:
+
+    profiler.start_tick()
+    with profiler.section("planning"):
+        ...
+    profiler.end_tick()
+
+    Every stage keeps a StageStats (p50/p95/p99/max over rolling windows), and
+    ticks that take longer than `budget_ms` are counted. A disabled profiler costs
+    next to nothing, so the sections can stay in the code.
+    """
+
+    def __init__(
+        self, enabled=True, budget_ms=1000 / 120, interval=120, startup=0, history=60
+    ):
+        self.enabled = enabled
+        self.budget_ms = budget_ms
+        self.interval = interval
+        self.startup = startup
+        self.history = history
+        self.stages = {}
+        self.sections = {}
+        self.over_budget = 0
+        self.stats("tick")
+
+    def stats(self, name: str) -> StageStats:
+        if name not in self.stages:
+            self.stages[name] = StageStats(
+                name, self.interval, self.startup, self.history
+            )
+            self.sections[name] = _Section(self.stages[name])
+        return self.stages[name]
+
+    def section(self, name: str):
+        """Context manager that times the enclosed code as stage `name`."""
+        if not self.enabled:
+            return _null_section
+        section = self.sections.get(name)
+        if section is None:
+            self.stats(name)
+            section = self.sections[name]
+        return section
+
+    def start_tick(self):
+        if self.enabled:
+            section = self.sections["tick"]
+            section.starts.clear()  # from a tick that never ended
+            section.__enter__()
+
+    def end_tick(self):
+        if self.enabled:
+            section = self.sections["tick"]
+            tick_ms = (perf_counter_ns() - section.starts.pop()) / 1e6
+            section.stats.update(tick_ms)
+            if tick_ms > self.budget_ms:
+                self.over_budget += 1
+
+    def summary(self) -> dict:
+        """Overall and latest-window statistics for every stage."""
+        return {
+            name: dict(overall=stats.summary(), latest=stats.latest())
+            for name, stats in self.stages.items()
+        }
+
+    def rows(self):
+        """One row per stage per completed window, for exporting."""
+        for name, stats in self.stages.items():
+            for i, window in enumerate(stats.windows):
+                yield dict(stage=name, window=i, **window)
+
+    def to_csv(self, path: str):
+        fields = ["stage", "window", "count", "mean", "p50", "p95", "p99", "max"]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.rows())
+
+    def to_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(
+                dict(
+                    budget_ms=self.budget_ms,
+                    over_budget=self.over_budget,
+                    stages=self.summary(),
+                    windows=list(self.rows()),
+                ),
+                f,
+                indent=2,
+            )